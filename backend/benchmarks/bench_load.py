@@ -0,0 +1,274 @@
+"""Load test: simulated rooms of users joining, polling questions and betting.
+
+Run with `python -m backend.benchmarks.bench_load --rooms 10 --users 200`
+against a migrated scratch database (DATABASE_URL). The app and a question
+worker run in process, with the stub question provider and a sped-up game
+clock, so questions keep arriving during a short run. Pass --url to drive a
+running server instead; it needs question workers of its own.
+
+Prints one JSON document (or writes it to --output) with overall and
+per-route throughput and p50/p95/p99 latency, so runs from different commits
+can be compared.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+import uuid
+from collections import defaultdict
+from typing import Dict, List
+
+# Must be set before the app (and its question generator) is imported
+os.environ.setdefault("QUESTION_PROVIDER", "stub")
+
+import httpx
+from sqlalchemy import delete
+
+from ..db import async_session, engine
+from ..models.room import Room
+from ..models.user import User
+from ..models.userbetstats import UserBetStats
+
+
+class Recorder:
+    """Latencies and status codes per route template"""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.statuses: Dict[str, Dict[int, int]] = defaultdict(lambda: defaultdict(int))
+        self.started = time.perf_counter()
+        self.stopped = None
+
+    async def call(self, client: httpx.AsyncClient, route: str, method: str, url: str, **kw):
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kw)
+            status = response.status_code
+        except httpx.HTTPError:
+            response, status = None, 0
+        self.latencies[route].append(time.perf_counter() - started)
+        self.statuses[route][status] += 1
+        return response
+
+    def report(self) -> dict:
+        elapsed = (self.stopped or time.perf_counter()) - self.started
+        routes = {
+            route: summarize(samples, elapsed, self.statuses[route])
+            for route, samples in sorted(self.latencies.items())
+        }
+        everything = [s for samples in self.latencies.values() for s in samples]
+        statuses = defaultdict(int)
+        for counts in self.statuses.values():
+            for status, n in counts.items():
+                statuses[status] += n
+        return {"elapsed_seconds": round(elapsed, 3), "overall": summarize(everything, elapsed, statuses), "routes": routes}
+
+
+def summarize(samples: List[float], elapsed: float, statuses) -> dict:
+    ordered = sorted(samples)
+    if len(ordered) > 1:
+        cuts = statistics.quantiles(ordered, n=100, method="inclusive")
+        p50, p95, p99 = cuts[49], cuts[94], cuts[98]
+    else:
+        p50 = p95 = p99 = ordered[0] if ordered else 0.0
+    return {
+        "requests": len(ordered),
+        "throughput_rps": round(len(ordered) / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(p50 * 1e3, 3),
+        "p95_ms": round(p95 * 1e3, 3),
+        "p99_ms": round(p99 * 1e3, 3),
+        "max_ms": round(ordered[-1] * 1e3, 3) if ordered else 0.0,
+        "statuses": {str(k): v for k, v in sorted(statuses.items())},
+    }
+
+
+async def simulate_user(
+    client: httpx.AsyncClient,
+    recorder: Recorder,
+    username: str,
+    room_id: int,
+    deadline: float,
+    poll_interval: float,
+    bet_amount: int,
+    rng: random.Random,
+):
+    await recorder.call(
+        client, "POST /api/room/join/{room_id}", "POST", f"/api/room/join/{room_id}", params={"username": username}
+    )
+    seen = set()
+    while time.perf_counter() < deadline:
+        response = await recorder.call(client, "GET /api/questionfr/{room_id}", "GET", f"/api/questionfr/{room_id}")
+        if response is not None and response.status_code == 200:
+            for question in response.json():
+                if question["id"] in seen:
+                    continue
+                seen.add(question["id"])
+                options = question["options"].split("_")
+                await recorder.call(
+                    client,
+                    "POST /api/bet/",
+                    "POST",
+                    "/api/bet/",
+                    json={
+                        "username": username,
+                        "question_id": question["id"],
+                        "user_answer": str(rng.randrange(len(options))),
+                        "bet_amount": bet_amount,
+                    },
+                )
+        # Jitter so users in a room don't poll in lockstep
+        await asyncio.sleep(poll_interval * rng.uniform(0.5, 1.5))
+
+
+async def run(args) -> dict:
+    rng = random.Random(args.seed)
+    prefix = f"load_{uuid.uuid4().hex[:8]}"
+    owners = [f"{prefix}_owner_{i}" for i in range(args.rooms)]
+    users = [f"{prefix}_user_{i}" for i in range(args.users)]
+
+    if args.url:
+        transport = httpx.AsyncHTTPTransport(limits=httpx.Limits(max_connections=args.connections))
+        client = httpx.AsyncClient(base_url=args.url, transport=transport, timeout=30)
+    else:
+        from ..main import app
+        from ..services.question_jobs import question_worker_from_env
+        from ..services.questionFR import game_scheduler
+
+        game_scheduler.clock_options["speed"] = args.clock_speed
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://load", timeout=30)
+        # Questions are generated off the request path, by the job queue
+        worker = question_worker_from_env()
+        worker_task = asyncio.create_task(worker.run())
+
+    room_ids = []
+    try:
+        async with client:
+            setup = Recorder()
+            for username in owners + users:
+                await setup.call(client, "POST /api/user/{username}", "POST", f"/api/user/{username}")
+                await setup.call(
+                    client,
+                    "PUT /api/user/{username}/tokens/{tokens}",
+                    "PUT",
+                    f"/api/user/{username}/tokens/{args.tokens}",
+                )
+            for owner in owners:
+                response = await setup.call(
+                    client, "POST /api/room/create", "POST", "/api/room/create", params={"username": owner}
+                )
+                response.raise_for_status()
+                room_ids.append(response.json()["id"])
+            for room_id in room_ids:
+                await setup.call(
+                    client,
+                    "POST /api/questionfr/start-timer/{room_id}",
+                    "POST",
+                    f"/api/questionfr/start-timer/{room_id}",
+                )
+
+            recorder = Recorder()
+            deadline = time.perf_counter() + args.duration
+            await asyncio.gather(
+                *(
+                    simulate_user(
+                        client,
+                        recorder,
+                        username,
+                        room_ids[i % len(room_ids)],
+                        deadline,
+                        args.poll_interval,
+                        args.bet_amount,
+                        random.Random(rng.random()),
+                    )
+                    for i, username in enumerate(users)
+                )
+            )
+            recorder.stopped = time.perf_counter()
+    finally:
+        if not args.url:
+            from ..services.questionFR import game_scheduler
+
+            for room_id in room_ids:
+                for game_id in list(game_scheduler.clocks):
+                    game_scheduler.unsubscribe(game_id, room_id)
+            worker_task.cancel()
+            await asyncio.gather(worker_task, return_exceptions=True)
+            await worker.release()
+        if not args.keep:
+            await cleanup(room_ids, owners + users)
+
+    return {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "target": args.url or "in-process",
+        "config": {
+            "rooms": args.rooms,
+            "users": args.users,
+            "duration_seconds": args.duration,
+            "poll_interval_seconds": args.poll_interval,
+            "clock_speed": args.clock_speed,
+            "seed": args.seed,
+        },
+        "setup": setup.report(),
+        "load": recorder.report(),
+    }
+
+
+async def cleanup(room_ids: List[int], usernames: List[str]):
+    async with async_session() as db:
+        # Questions and bets cascade with their room
+        await db.exec(delete(User).where(User.username.in_(usernames)))
+        await db.exec(delete(Room).where(Room.id.in_(room_ids)))
+        await db.exec(delete(UserBetStats).where(UserBetStats.username.in_(usernames)))
+        await db.commit()
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rooms", type=int, default=5)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds of simulated load")
+    parser.add_argument("--poll-interval", type=float, default=1.0, help="seconds between question polls")
+    parser.add_argument("--clock-speed", type=float, default=10.0, help="game seconds per real second")
+    parser.add_argument("--tokens", type=int, default=1000)
+    parser.add_argument("--bet-amount", type=int, default=1)
+    parser.add_argument("--connections", type=int, default=100, help="connection limit with --url")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--url", help="base URL of a running server instead of the in-process app")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    parser.add_argument("--keep", action="store_true", help="keep the users and rooms created")
+    return parser.parse_args(argv)
+
+
+async def main(argv=None):
+    args = parse_args(argv)
+    engine.echo = False
+    try:
+        report = await run(args)
+    finally:
+        await engine.dispose()
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    asyncio.run(main(sys.argv[1:]))
@@ -0,0 +1,49 @@
+"""Micro-benchmark: linear get_next_plays scan vs PlayIndex bisect lookups.
+
+Run with `python -m backend.benchmarks.bench_play_index`. Replays every clock
+second of every quarter of a four-quarter log built from the recorded Q1 feed.
+"""
+
+import json
+import timeit
+from pathlib import Path
+
+from ..services.play_index import PlayIndex, get_next_plays
+
+Q1_PLAYS = Path(__file__).resolve().parent.parent / "lakers_celtics_q1_full.json"
+
+
+def four_quarter_log():
+    q1 = json.loads(Q1_PLAYS.read_text())
+    return [dict(play, quarter=q) for q in range(1, 5) for play in q1]
+
+
+def main(n: int = 20, repeat: int = 5):
+    plays = four_quarter_log()
+    ticks = range(720, -1, -1)
+
+    def linear():
+        for t in ticks:
+            get_next_plays(plays, t, n)
+
+    index = PlayIndex(plays)
+
+    def indexed():
+        for quarter in range(1, 5):
+            for t in ticks:
+                index.window(t, n, quarter)
+
+    build = min(timeit.repeat(lambda: PlayIndex(plays), number=10, repeat=repeat)) / 10
+    # The linear scan can only ever find Q1, so it does a quarter of the lookups
+    linear_s = min(timeit.repeat(linear, number=1, repeat=repeat)) / len(ticks)
+    indexed_s = min(timeit.repeat(indexed, number=1, repeat=repeat)) / (4 * len(ticks))
+
+    print(f"plays: {len(plays)} ({index.quarters} quarters), window n={n}")
+    print(f"index build:             {build * 1e6:9.1f} us (once per game)")
+    print(f"get_next_plays (linear): {linear_s * 1e6:9.2f} us/lookup")
+    print(f"PlayIndex.window:        {indexed_s * 1e6:9.2f} us/lookup")
+    print(f"speedup:                 {linear_s / indexed_s:9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
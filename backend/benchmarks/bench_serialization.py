@@ -0,0 +1,81 @@
+"""Micro-benchmark: FastAPI's default list serialization vs list_response.
+
+Run with `python -m backend.benchmarks.bench_serialization`. For each hot list
+model, serializes rows the way a response_model=List[Model] route does
+(validate, jsonable dump, json.dumps) and the way FastJSONResponse routes do
+(one precompiled TypeAdapter dump_json), and checks both give the same JSON.
+"""
+
+import argparse
+import asyncio
+import json
+import timeit
+from datetime import datetime
+from typing import List
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from ..models.bet import Bet
+from ..models.Player import Player
+from ..models.questionFR import QuestionFR
+from ..models.room import Room  # noqa: F401 (resolves User.room)
+from ..models.user import User
+from ..services.serialization import list_response
+
+
+def sample_rows(model, n: int):
+    now = datetime(2025, 1, 1, 12, 0, 0)
+    if model is QuestionFR:
+        return [
+            QuestionFR(id=i, question=f"Will the next play be a three? #{i}", options="Yes_No_Maybe_Never", answer=i % 4, room_id=1)
+            for i in range(n)
+        ]
+    if model is Bet:
+        return [
+            Bet(id=i, username=f"user_{i % 97}", question_id=i, user_answer=str(i % 4), bet_amount=10,
+                correct_answer="1", is_correct=i % 2 == 0, outcome=10 if i % 2 == 0 else -10, created_at=now)
+            for i in range(n)
+        ]
+    if model is Player:
+        return [Player(id=i, name=f"Player {i}", game_id=1, team="LAL" if i % 2 else "BOS") for i in range(n)]
+    return [User(username=f"user_{i}", room_id=i % 10, tokens=1000 - i) for i in range(n)]
+
+
+def default_path(model):
+    field = create_model_field(name="Response", type_=List[model], mode="serialization")
+
+    def render(rows):
+        content = asyncio.run(serialize_response(field=field, response_content=rows))
+        return JSONResponse(content).body
+
+    return render
+
+
+def fast_path(model):
+    return lambda rows: list_response(model, rows).body
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--number", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    print(f"{'model':<12}{'default us/1k':>15}{'fast us/1k':>13}{'speedup':>10}")
+    for model in (QuestionFR, Bet, Player, User):
+        rows = sample_rows(model, args.rows)
+        slow, fast = default_path(model), fast_path(model)
+        assert json.loads(slow(rows)) == json.loads(fast(rows)), f"{model.__name__} output differs"
+        # asyncio.run costs the same on every call, time it alone to take it out
+        overhead = min(timeit.repeat(lambda: asyncio.run(asyncio.sleep(0)), number=args.number, repeat=args.repeat))
+        slow_s = (min(timeit.repeat(lambda: slow(rows), number=args.number, repeat=args.repeat)) - overhead) / args.number
+        fast_s = min(timeit.repeat(lambda: fast(rows), number=args.number, repeat=args.repeat)) / args.number
+        per_k = 1000 / args.rows * 1e6
+        print(f"{model.__name__:<12}{slow_s * per_k:>15.1f}{fast_s * per_k:>13.1f}{slow_s / fast_s:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Benchmark: set-based bet settlement time versus number of bets.
+
+Run with `python -m backend.benchmarks.bench_settlement` against a migrated
+scratch database (DATABASE_URL). Seeds one room, one question and one bet per
+synthetic user for each size, settles it, then removes everything it created.
+"""
+
+import asyncio
+import sys
+import time
+
+from sqlalchemy import delete, insert
+
+from ..db import async_session, engine
+from ..models.bet import Bet
+from ..models.questionFR import QuestionFR
+from ..models.room import Room
+from ..models.user import User
+from ..models.userbetstats import UserBetStats
+from ..services.bet import settle_bets
+
+SIZES = (100, 1_000, 10_000)
+
+
+async def run(bet_count: int) -> float:
+    usernames = [f"bench_settle_{i}" for i in range(bet_count)]
+    async with async_session() as db:
+        room = Room(game_id=0)
+        db.add(room)
+        await db.flush()
+        question = QuestionFR(question="bench", options="A_B", answer=0, room_id=room.id)
+        db.add(question)
+        await db.flush()
+        await db.exec(insert(User), params=[{"username": u, "tokens": 100} for u in usernames])
+        await db.exec(
+            insert(Bet),
+            params=[
+                {"username": u, "question_id": question.id, "user_answer": str(i % 2), "bet_amount": 10}
+                for i, u in enumerate(usernames)
+            ],
+        )
+        await db.commit()
+
+        try:
+            started = time.perf_counter()
+            await settle_bets(db, question.id, "0", 2.0)
+            await db.commit()
+            return time.perf_counter() - started
+        finally:
+            # Bets cascade with the question, the question with the room
+            await db.exec(delete(Room).where(Room.id == room.id))
+            await db.exec(delete(User).where(User.username.in_(usernames)))
+            await db.exec(delete(UserBetStats).where(UserBetStats.username.in_(usernames)))
+            await db.commit()
+
+
+async def main(sizes=SIZES):
+    engine.echo = False
+    print(f"{'bets':>8} {'settle (ms)':>12} {'us/bet':>8}")
+    for size in sizes:
+        elapsed = await run(size)
+        print(f"{size:>8} {elapsed * 1e3:>12.1f} {elapsed / size * 1e6:>8.1f}")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(tuple(int(n) for n in sys.argv[1:]) or SIZES))
@@ -1,7 +1,10 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
+from ..db import read_only
 from ..services.bet import BetService
+from ..services.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, set_next_cursor
+from ..services.serialization import FastJSONResponse, list_response
 from ..models.bet import Bet
-from typing import List
+from typing import List, Optional
 
 openapi_tags = {
     "name": "Bets",
@@ -13,30 +16,42 @@ api = APIRouter(prefix="/bet", tags=["Bets"])
 
 @api.post("/", response_model=Bet, tags=["Bets"])
 async def create_bet(bet: Bet, bet_svc: BetService = Depends(BetService)):
-    return bet_svc.create_bet(
+    return await bet_svc.create_bet(
         bet.username, bet.question_id, bet.user_answer, bet.bet_amount
     )
 
 
 @api.get("/bet/{bet_id}", response_model=Bet, tags=["Bets"])
 async def get_bet_by_id(bet_id: int, bet_svc: BetService = Depends(BetService)):
-    return bet_svc.get_user_bets(bet_id)
+    return await bet_svc.get_user_bets(bet_id)
 
 
-@api.get("/user/{username}", response_model=List[Bet], tags=["Bets"])
+@api.get("/user/{username}", response_model=List[Bet], response_class=FastJSONResponse, tags=["Bets"])
 async def get_bets_by_username(
-    username: str, bet_svc: BetService = Depends(BetService)
+    username: str,
+    after: Optional[int] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    bet_svc: BetService = Depends(read_only(BetService)),
 ):
-    return bet_svc.get_user_bets(username)
+    bets, cursor = await bet_svc.get_user_bets(username, after, limit)
+    response = list_response(Bet, bets)
+    set_next_cursor(response, cursor)
+    return response
 
 
-@api.get("/question/{question_id}", response_model=List[Bet], tags=["Bets"])
+@api.get("/question/{question_id}", response_model=List[Bet], response_class=FastJSONResponse, tags=["Bets"])
 async def get_bets_by_question_id(
-    question_id: int, bet_svc: BetService = Depends(BetService)
+    question_id: int,
+    after: Optional[int] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    bet_svc: BetService = Depends(read_only(BetService)),
 ):
-    return bet_svc.get_bets_by_question_id(question_id)
+    bets, cursor = await bet_svc.get_bets_by_question_id(question_id, after, limit)
+    response = list_response(Bet, bets)
+    set_next_cursor(response, cursor)
+    return response
 
 
 @api.get("/summary/{username}", response_model=dict, tags=["Bets"])
 async def get_bet_summary(username: str, bet_svc: BetService = Depends(BetService)):
-    return bet_svc.get_bet_summary(username)
+    return await bet_svc.get_bet_summary(username)
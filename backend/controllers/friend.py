@@ -1,5 +1,6 @@
 from fastapi import APIRouter, Depends
 from ..services.friend import FriendService
+from ..services.friend_graph import friend_graph
 from ..models.usertofriend import UserToFriend
 from ..models.user import User
 from typing import List
@@ -15,4 +16,19 @@ api = APIRouter(prefix="", tags=["Friends"])
 async def get_friends(
     username: str, friend_svc: FriendService = Depends(FriendService)
 ):
-    return friend_svc.get_friends(username)
+    return await friend_svc.get_friends(username)
+
+
+@api.get("/{username}/friends/in-room/{room_id}", response_model=List[str], tags=["Friends"])
+async def get_friends_in_room(username: str, room_id: int):
+    return friend_graph.in_room(username, room_id)
+
+
+@api.get("/{username}/friends/mutual/{other}", response_model=List[str], tags=["Friends"])
+async def get_mutual_friends(username: str, other: str):
+    return friend_graph.mutual(username, other)
+
+
+@api.get("/{username}/friends/online", response_model=List[str], tags=["Friends"])
+async def get_online_friends(username: str):
+    return friend_graph.online(username)
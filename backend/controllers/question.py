@@ -15,14 +15,14 @@ api = APIRouter(prefix="/question", tags=["Questions"])
 async def create_question(
     question: Question, question_svc: QuestionService = Depends(QuestionService)
 ):
-    return question_svc.create_question(question)
+    return await question_svc.create_question(question)
 
 
 @api.get("/{game_id}", response_model=List[Question], tags=["Questions"])
 async def get_questions(
     game_id: int, question_svc: QuestionService = Depends(QuestionService)
 ):
-    return question_svc.get_questions(game_id)
+    return await question_svc.get_questions(game_id)
 
 
 @api.get(
@@ -33,7 +33,7 @@ async def get_questions(
 async def get_questions_by_game_room(
     game_id: int, room_id: int, question_svc: QuestionService = Depends(QuestionService)
 ):
-    return question_svc.get_questions_by_game_room(game_id, room_id)
+    return await question_svc.get_questions_by_game_room(game_id, room_id)
 
 
 @api.put("/{question_id}", response_model=Question, tags=["Questions"])
@@ -42,7 +42,7 @@ async def update_question(
     question: Question,
     question_svc: QuestionService = Depends(QuestionService),
 ):
-    return question_svc.update_question(question_id, question)
+    return await question_svc.update_question(question_id, question)
 
 
 @api.post("/{question_id}/resolve", response_model=Question, tags=["Questions"])
@@ -51,11 +51,20 @@ async def resolve_question(
     actual_value: float,
     question_svc: QuestionService = Depends(QuestionService),
 ):
-    return question_svc.solve_question(question_id, actual_value)
+    return await question_svc.solve_question(question_id, actual_value)
+
+
+@api.post("/resolve-due/{game_key}", response_model=List[Question], tags=["Questions"])
+async def resolve_due_questions(
+    game_key: str,
+    final: bool = False,
+    question_svc: QuestionService = Depends(QuestionService),
+):
+    return await question_svc.resolve_due_questions(game_key, final)
 
 
 @api.get("/{question_id}", response_model=Question, tags=["Questions"])
 async def get_question(
     question_id: int, question_svc: QuestionService = Depends(QuestionService)
 ):
-    return question_svc.get_question(question_id)
+    return await question_svc.get_question(question_id)
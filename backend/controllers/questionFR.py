@@ -1,9 +1,12 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Request, Response, WebSocket, WebSocketDisconnect
 from ..models.user import User
 from fastapi import Depends
-from typing import List
-from ..services.questionFR import QuestionFRService
+from typing import List, Optional
+from ..db import read_only
+from ..services.questionFR import QuestionFRService, latest_question_id
 from ..models.questionFR import QuestionFR
+from ..services.hub import room_hub
+from ..services.serialization import FastJSONResponse, list_response
 from fastapi import BackgroundTasks
 import asyncio
 
@@ -14,13 +17,77 @@ openapi_tags = {
 
 api = APIRouter(prefix="/questionfr", tags=["QuestionsFR"])
 
-@api.get("/{room_id}", response_model=List[QuestionFR], tags=["QuestionsFR"])
-def get_questions(room_id: int, ques_svc: QuestionFRService = Depends(QuestionFRService)):
-    return ques_svc.get_questions(room_id)
+def question_etag(last_id: int) -> str:
+    return f'"q{last_id}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if header is None:
+        return False
+    tags = [tag.strip().removeprefix("W/") for tag in header.split(",")]
+    return "*" in tags or etag in tags
+
+
+@api.get(
+    "/{room_id}",
+    response_model=List[QuestionFR],
+    response_class=FastJSONResponse,
+    tags=["QuestionsFR"],
+    responses={304: {"description": "No questions since the ETag's"}},
+)
+async def get_questions(
+    room_id: int,
+    request: Request,
+    since_id: Optional[int] = None,
+    ques_svc: QuestionFRService = Depends(read_only(QuestionFRService)),
+):
+    """Questions in the room, only those with an id above since_id if given.
+
+    The ETag names the newest question the client holds. While that is
+    still the room's newest question, polls get a 304 without any query.
+    """
+    latest = await latest_question_id(room_id)
+    if latest is not None and etag_matches(request, question_etag(latest)):
+        return Response(status_code=304, headers={"ETag": question_etag(latest)})
+
+    questions = await ques_svc.get_questions(room_id, since_id)
+    # Tag what was actually returned, a lagging replica may not have the newest yet
+    last_id = questions[-1].id if questions else (since_id or 0)
+    return list_response(QuestionFR, questions, headers={"ETag": question_etag(last_id)})
 
 
 @api.post("/start-timer/{room_id}")
 async def start_timer(room_id: int, background_tasks: BackgroundTasks, ques_svc: QuestionFRService = Depends(QuestionFRService)):
-    # Schedule timer to run in background
-    asyncio.create_task(ques_svc.timer_start(room_id))
-    return {"status": "Timer started"}
\ No newline at end of file
+    # Rooms share one clock per game, which runs in the background
+    await ques_svc.start_timer(room_id)
+    return {"status": "Timer started"}
+
+
+@api.websocket("/ws/{room_id}")
+async def question_feed(websocket: WebSocket, room_id: int, username: Optional[str] = None):
+    """Push each new question for the room to the client as soon as it is created"""
+    await websocket.accept()
+    queue = room_hub.subscribe(room_id)
+    # Clients that pass their username count as online for their friends
+    if username is not None:
+        room_hub.connect(username)
+    # Clients never send anything, so a pending receive only completes on disconnect
+    disconnect = asyncio.create_task(websocket.receive())
+    try:
+        while True:
+            next_message = asyncio.create_task(queue.get())
+            done, _ = await asyncio.wait(
+                {next_message, disconnect}, return_when=asyncio.FIRST_COMPLETED
+            )
+            if disconnect in done:
+                next_message.cancel()
+                break
+            await websocket.send_json(next_message.result())
+    except WebSocketDisconnect:
+        pass
+    finally:
+        disconnect.cancel()
+        room_hub.unsubscribe(room_id, queue)
+        if username is not None:
+            room_hub.disconnect(username)
@@ -20,7 +20,7 @@ async def send_request(
     username2: str,
     request_svc: RequestService = Depends(RequestService),
 ):
-    result = request_svc.send_request(username1, username2)
+    result = await request_svc.send_request(username1, username2)
     if result is None:
         raise HTTPException(
             status_code=404, detail="Request not found or could not be created"
@@ -33,7 +33,7 @@ async def get_requests(
     username: str,
     request_svc: RequestService = Depends(RequestService),
 ):
-    return request_svc.get_requests(username)
+    return await request_svc.get_requests(username)
 
 
 @api.post("/{username2}/accept/{username1}", response_model=Request, tags=["Requests"])
@@ -42,7 +42,7 @@ async def accept_request(
     username2: str,
     request_svc: RequestService = Depends(RequestService),
 ):
-    return request_svc.accept_request(username1, username2)
+    return await request_svc.accept_request(username1, username2)
 
 
 @api.post("/{username2}/decline/{username1}", response_model=Request, tags=["Requests"])
@@ -51,4 +51,4 @@ async def decline_request(
     username2: str,
     request_svc: RequestService = Depends(RequestService),
 ):
-    return request_svc.decline_request(username1, username2)
+    return await request_svc.decline_request(username1, username2)
@@ -1,14 +1,18 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
 from ..services.friend import FriendService
 from ..models.usertofriend import UserToFriend
 from ..models.user import User
-from typing import List
+from typing import List, Optional
 from ..services.request import RequestService
 from ..models.request import Request
 from fastapi import HTTPException
 from ..models.room import Room
 from ..services.room import RoomService
+from ..db import read_only
 from ..services.user import UserService
+from ..services.leaderboard import leaderboards
+from ..services.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, set_next_cursor
+from ..services.serialization import FastJSONResponse, list_response
 
 openapi_tags = {
     "name": "Rooms",
@@ -17,9 +21,16 @@ openapi_tags = {
 api = APIRouter(prefix="/room", tags=["Rooms"])
 
 
-@api.get("", response_model=List[Room], tags=["Rooms"])
-async def get_rooms(room_svc: RoomService = Depends(RoomService)):
-    return room_svc.get_rooms()
+@api.get("", response_model=List[Room], response_class=FastJSONResponse, tags=["Rooms"])
+async def get_rooms(
+    after: Optional[int] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    room_svc: RoomService = Depends(read_only(RoomService)),
+):
+    rooms, cursor = await room_svc.get_rooms(after, limit)
+    response = list_response(Room, rooms)
+    set_next_cursor(response, cursor)
+    return response
 
 
 @api.post("/create", response_model=Room, tags=["Rooms"])
@@ -28,9 +39,9 @@ async def create_room(
     room_svc: RoomService = Depends(RoomService),
     user_svc: UserService = Depends(UserService),
 ):
-    room = room_svc.create_room(game_id=1)
+    room = await room_svc.create_room(game_id=1)
     print(room.id)
-    user_svc.update_user_room(username, room.id)
+    await user_svc.update_user_room(username, room.id)
     return room
 
 
@@ -41,7 +52,7 @@ async def join_room(
     room_svc: RoomService = Depends(RoomService),
     user_svc: UserService = Depends(UserService),
 ):
-    user_svc.update_user_room(username, room_id)
+    await user_svc.update_user_room(username, room_id)
     return True
 
 
@@ -51,10 +62,10 @@ async def leave_room(
     room_svc: RoomService = Depends(RoomService),
     user_svc: UserService = Depends(UserService),
 ):
-    user = user_svc.get_user(username)
+    user = await user_svc.get_user(username)
     if user.room_id == None:
         raise HTTPException(status_code=400, detail="User is not in this room")
-    user_svc.update_user_room(username, None)
+    await user_svc.update_user_room(username, None)
     return True
 
 
@@ -62,4 +73,17 @@ async def leave_room(
 async def update_room(
     room_id: int, started: bool, room_svc: RoomService = Depends(RoomService)
 ):
-    return room_svc.update_room(room_id, started)
+    return await room_svc.update_room(room_id, started)
+
+
+@api.get("/{room_id}/leaderboard", response_model=List[dict], tags=["Rooms"])
+async def get_leaderboard(room_id: int, top: int = Query(10, ge=1, le=1000)):
+    return leaderboards.top(room_id, top)
+
+
+@api.get("/{room_id}/leaderboard/{username}", response_model=dict, tags=["Rooms"])
+async def get_leaderboard_rank(room_id: int, username: str):
+    standing = leaderboards.rank(room_id, username)
+    if standing is None:
+        raise HTTPException(status_code=404, detail="User is not in this room")
+    return standing
@@ -1,8 +1,10 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Query
 from ..services.user import UserService
+from ..services.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, set_next_cursor
+from ..services.serialization import FastJSONResponse, list_response
 from ..models.user import User
 from fastapi import Depends
-from typing import List
+from typing import List, Optional
 
 openapi_tags = {
     "name": "Users",
@@ -14,21 +16,28 @@ api = APIRouter(prefix="/user", tags=["Users"])
 
 @api.get("/{username}", response_model=User, tags=["Users"])
 async def get_user(username: str, user_svc: UserService = Depends(UserService)):
-    return user_svc.get_user(username)
+    return await user_svc.get_user(username)
 
 
 @api.post("/{username}", response_model=User, tags=["Users"])
 async def create_user(username: str, user_svc: UserService = Depends(UserService)):
-    return user_svc.create_user(username)
+    return await user_svc.create_user(username)
 
 
-@api.get("/", response_model=List[User], tags=["Users"])
-async def get_all_users(user_svc: UserService = Depends(UserService)):
-    return user_svc.get_all_users()
+@api.get("/", response_model=List[User], response_class=FastJSONResponse, tags=["Users"])
+async def get_all_users(
+    after: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    user_svc: UserService = Depends(UserService),
+):
+    users, cursor = await user_svc.get_all_users(after, limit)
+    response = list_response(User, users)
+    set_next_cursor(response, cursor)
+    return response
 
 
 @api.put("/{username}/tokens/{tokens}", response_model=User, tags=["Users"])
 async def update_user_tokens(
     username: str, tokens: int, user_svc: UserService = Depends(UserService)
 ):
-    return user_svc.update_user_tokens(username, tokens)
+    return await user_svc.update_user_tokens(username, tokens)
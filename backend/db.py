@@ -1,6 +1,12 @@
-from sqlmodel import create_engine, Session
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
 from dotenv import load_dotenv
+from fastapi import Depends, Request
+from typing import List
+import asyncio
+import math
 import os
+import time
 
 __authors__ = ["Mustafa Aljumayli"]
 
@@ -9,16 +15,140 @@ load_dotenv()  # Load .env file
 # Read DB URL from env
 db_url = os.getenv("DATABASE_URL")
 
-# Set echo=True only in development
-engine = create_engine(
-    db_url, echo=True, connect_args={"options": "-c statement_timeout=5000"}
-)  # You can set echo=False in prod
 
+def async_db_url(url: str) -> str:
+    """Point a plain postgres:// URL at the asyncpg driver"""
+    for prefix in ("postgres://", "postgresql://", "postgresql+psycopg2://"):
+        if url.startswith(prefix):
+            return "postgresql+asyncpg://" + url[len(prefix) :]
+    return url
 
-def db_session():
-    """Generator function to add dependency injection of SQLModel Sessions"""
-    session = Session(engine)
-    try:
+
+def make_engine(url: str) -> AsyncEngine:
+    # Set SQL_ECHO=true only in development, /metrics has query counts and timings
+    return create_async_engine(
+        async_db_url(url),
+        echo=os.getenv("SQL_ECHO", "false").lower() == "true",
+        connect_args={"server_settings": {"statement_timeout": "5000"}},
+    )
+
+
+engine = make_engine(db_url)
+
+# Optional streaming replicas, comma separated, used for read-only routes
+replica_urls = [u.strip() for u in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if u.strip()]
+
+# Seconds of replay lag a replica may have before reads go back to the primary
+REPLICA_LAG_SQL = """
+SELECT CASE
+    WHEN NOT pg_is_in_recovery() THEN 0
+    -- Caught up with everything received: idle, not lagging
+    WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+    ELSE coalesce(extract(epoch FROM now() - pg_last_xact_replay_timestamp()), 0)
+END
+"""
+
+
+class ReplicaRouter:
+    """Picks the engine for read-only sessions.
+
+    Replicas are tried round robin. Each one's replay lag is sampled at most
+    every check_interval seconds; one that lags more than max_lag, or can't be
+    reached, is skipped until its next check. With no usable replica, reads
+    go to the primary.
+    """
+
+    def __init__(
+        self,
+        primary: AsyncEngine,
+        replicas: List[AsyncEngine],
+        max_lag: float = 5.0,
+        check_interval: float = 1.0,
+        check_timeout: float = 0.5,
+    ):
+        self.primary = primary
+        self.replicas = replicas
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.check_timeout = check_timeout
+        # Unknown until first checked, so a new replica starts out skipped
+        self.lags = [math.inf] * len(replicas)
+        self._checked_at = [-math.inf] * len(replicas)
+        self._next = 0
+
+    async def _measure(self, replica: AsyncEngine) -> float:
+        async with replica.connect() as conn:
+            return float((await conn.exec_driver_sql(REPLICA_LAG_SQL)).scalar())
+
+    async def lag(self, i: int) -> float:
+        now = time.monotonic()
+        if now - self._checked_at[i] >= self.check_interval:
+            # Claim the check first so concurrent reads use the last sample
+            self._checked_at[i] = now
+            try:
+                self.lags[i] = await asyncio.wait_for(
+                    self._measure(self.replicas[i]), self.check_timeout
+                )
+            except Exception as e:
+                print(f"Replica {i} unavailable: {e!r}")
+                self.lags[i] = math.inf
+        return self.lags[i]
+
+    async def read_engine(self) -> AsyncEngine:
+        for _ in range(len(self.replicas)):
+            i = self._next
+            self._next = (i + 1) % len(self.replicas)
+            if await self.lag(i) <= self.max_lag:
+                return self.replicas[i]
+        return self.primary
+
+
+replica_router = ReplicaRouter(
+    engine,
+    [make_engine(url) for url in replica_urls],
+    max_lag=float(os.getenv("REPLICA_MAX_LAG_SECONDS", "5")),
+    check_interval=float(os.getenv("REPLICA_LAG_CHECK_SECONDS", "1")),
+)
+
+# Cookie set after a write so that client's next reads see it on the primary
+PRIMARY_PIN_COOKIE = "raptor_read_primary"
+PRIMARY_PIN_SECONDS = int(os.getenv("REPLICA_PIN_SECONDS", str(math.ceil(replica_router.max_lag) + 1)))
+
+
+def async_session() -> AsyncSession:
+    """Create a session outside of a request, e.g. for background timers"""
+    # Objects are returned after commit, so don't expire them (no lazy IO in async)
+    return AsyncSession(engine, expire_on_commit=False)
+
+
+async def db_session():
+    """Generator function to add dependency injection of SQLModel AsyncSessions"""
+    async with async_session() as session:
+        yield session
+
+
+# session.info key telling the read cache where a read session's rows come from
+READ_SOURCE = "read_source"
+PINNED, REPLICA = "pinned", "replica"
+
+
+async def read_db_session(request: Request):
+    """Like db_session, but served by a fresh enough replica when there is one"""
+    # A client that just wrote reads from the primary until replicas catch up
+    pinned = request.cookies.get(PRIMARY_PIN_COOKIE)
+    bind = engine if pinned else await replica_router.read_engine()
+    async with AsyncSession(bind, expire_on_commit=False) as session:
+        if pinned:
+            session.info[READ_SOURCE] = PINNED
+        elif bind is not engine:
+            session.info[READ_SOURCE] = REPLICA
         yield session
-    finally:
-        session.close()
+
+
+def read_only(service_cls):
+    """Dependency building a service on a read session, for routes that never write"""
+
+    def dependency(db: AsyncSession = Depends(read_db_session)):
+        return service_cls(db)
+
+    return dependency
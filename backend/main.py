@@ -1,14 +1,26 @@
 """Entry of the backend for the Raptor HFB. Sets up FastAPI and exception handlers"""
 
+import asyncio
 import os
+from contextlib import asynccontextmanager
 from pathlib import Path
+import time
 from fastapi import FastAPI, Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.middleware.cors import CORSMiddleware
 from sqlmodel import SQLModel
-
-from .db import engine
+from starlette.routing import Match
+
+from .db import PRIMARY_PIN_COOKIE, PRIMARY_PIN_SECONDS, async_session, engine, replica_router
+from .services import metrics
+from .services.events import event_bus
+from .services.friend_graph import friend_graph
+from .services.hub import room_hub
+from .services.leaderboard import leaderboards
+from .services.pagination import NEXT_CURSOR_HEADER
+from .services.read_cache import check_workers, read_cache
+from .services.questionFR import clock_leases, game_scheduler, question_delivery
 
 # from .services.exceptions import (
 #     InvalidCredentialsException,
@@ -31,7 +43,48 @@ description = """
 This RESTful API is designed to simulate High Frequency Betting in Real Time.
 """
 
+# API processes across the deployment; uvicorn and gunicorn take --workers from it
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "1"))
+# How often standings and friends are reloaded, to repair any event a worker missed
+STATE_REFRESH_SECONDS = float(os.getenv("STATE_REFRESH_SECONDS", "60"))
+
+
+async def load_shared_state():
+    async with async_session() as db:
+        await leaderboards.rebuild(db)
+        await friend_graph.rebuild(db)
+
+
+async def refresh_shared_state():
+    while True:
+        await asyncio.sleep(STATE_REFRESH_SECONDS)
+        try:
+            await load_shared_state()
+        except Exception as e:
+            print(f"Reloading leaderboards and friends failed: {e!r}")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    check_workers(read_cache.backend, WEB_CONCURRENCY)
+    # Listen before loading, so no change lands between the two
+    event_bus.ensure_started()
+    # Standings and friends are only kept in memory, so start from what is stored
+    await load_shared_state()
+    refresh = asyncio.create_task(refresh_shared_state()) if event_bus.url else None
+    # Take over game clocks whose worker went away, and hand ours back on exit
+    clock_leases.ensure_started()
+    question_delivery.ensure_started()
+    yield
+    question_delivery.stop()
+    await clock_leases.stop()
+    if refresh is not None:
+        refresh.cancel()
+    await event_bus.stop()
+
+
 app = FastAPI(
+    lifespan=lifespan,
     title="Raptor HFB Backend API",
     version="1.0.0",
     description=description,
@@ -74,7 +127,83 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Readable by cross-origin clients: poll versions and next page cursors
+    expose_headers=["ETag", NEXT_CURSOR_HEADER],
+)
+
+@app.middleware("http")
+async def record_metrics(request: Request, call_next):
+    """Record latency and SQL issued per route template"""
+    route = route_template(request)
+    labels = {"method": request.method, "route": route}
+    stats = metrics.QueryStats()
+    token = metrics.current_query_stats.set(stats)
+    metrics.http_requests_in_progress.inc(**labels)
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        metrics.http_request_duration.observe(time.perf_counter() - started, **labels)
+        metrics.http_requests_in_progress.dec(**labels)
+        metrics.http_requests.inc(status=status, **labels)
+        metrics.request_db_queries.observe(stats.count, **labels)
+        metrics.request_db_duration.observe(stats.seconds, **labels)
+        metrics.current_query_stats.reset(token)
+
+
+def route_template(request: Request) -> str:
+    # Templates, not raw paths, so ids don't each become a separate series
+    for route in app.router.routes:
+        if route.matches(request.scope)[0] == Match.FULL:
+            return route.path
+    return "unmatched"
+
+
+for db_engine in [engine, *replica_router.replicas]:
+    metrics.instrument_engine(db_engine)
+
+metrics.registry.gauge(
+    "game_clocks_active", "Game clocks currently running", function=lambda: len(game_scheduler.clocks)
+)
+metrics.registry.gauge(
+    "room_timers_active",
+    "Rooms subscribed to a running game clock",
+    function=lambda: sum(len(clock.rooms) for clock in game_scheduler.clocks.values()),
+)
+metrics.registry.gauge(
+    "websocket_clients", "Open question feed WebSockets", function=room_hub.total_subscribers
 )
+metrics.registry.gauge(
+    "db_pool_checked_out",
+    "Connections currently checked out of each pool",
+    ("engine",),
+    function=lambda: {
+        ("primary",): engine.pool.checkedout(),
+        **{(f"replica_{i}",): e.pool.checkedout() for i, e in enumerate(replica_router.replicas)},
+    },
+)
+
+
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    return Response(metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
+
+
+@app.middleware("http")
+async def pin_reads_after_write(request: Request, call_next):
+    """Send a client's reads to the primary for a while after it writes"""
+    response = await call_next(request)
+    if (
+        replica_router.replicas
+        and request.method not in ("GET", "HEAD", "OPTIONS")
+        and response.status_code < 400
+    ):
+        response.set_cookie(PRIMARY_PIN_COOKIE, "1", max_age=PRIMARY_PIN_SECONDS, httponly=True)
+    return response
+
 
 # ! Plug in each separate API file here (make sure to import above)
 # feature_apis = [team, auth, question, docs, submission, session_obj, problem, scores]
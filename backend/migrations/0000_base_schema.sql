@@ -0,0 +1,241 @@
+-- Schema as the app expected it before versioned migrations existed. Every
+-- statement is idempotent so databases created implicitly are left untouched.
+DO $$ BEGIN
+    CREATE TYPE questiontype AS ENUM ('OVER_UNDER', 'YES_NO');
+EXCEPTION WHEN duplicate_object THEN NULL;
+END $$;
+
+DO $$ BEGIN
+    CREATE TYPE playermetrictype AS ENUM (
+        'passing_yards', 'rushing_yards', 'receiving_yards', 'touchdowns',
+        'interceptions', 'fumbles', 'sacks', 'tackles', 'tackles_for_loss',
+        'passes_completed'
+    );
+EXCEPTION WHEN duplicate_object THEN NULL;
+END $$;
+
+CREATE TABLE IF NOT EXISTS game (
+    id SERIAL PRIMARY KEY,
+    name VARCHAR NOT NULL,
+    start_time TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+    end_time TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+    status VARCHAR NOT NULL,
+    away_team VARCHAR NOT NULL,
+    home_team VARCHAR NOT NULL,
+    away_team_score INTEGER NOT NULL,
+    home_team_score INTEGER NOT NULL,
+    created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+    updated_at TIMESTAMP WITHOUT TIME ZONE NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS game_data (
+    game_key VARCHAR PRIMARY KEY,
+    season_type INTEGER NOT NULL,
+    season INTEGER NOT NULL,
+    week INTEGER NOT NULL,
+    date TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+    away_team VARCHAR NOT NULL,
+    home_team VARCHAR NOT NULL,
+    channel VARCHAR,
+    point_spread FLOAT,
+    over_under FLOAT,
+    away_team_money_line INTEGER,
+    home_team_money_line INTEGER,
+    stadium_id INTEGER,
+    geo_lat FLOAT,
+    geo_long FLOAT,
+    forecast_temp_low INTEGER,
+    forecast_temp_high INTEGER,
+    forecast_description VARCHAR,
+    forecast_wind_chill INTEGER,
+    forecast_wind_speed INTEGER,
+    canceled BOOLEAN NOT NULL,
+    status VARCHAR NOT NULL,
+    is_closed BOOLEAN NOT NULL,
+    day TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+    date_time TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+    date_time_utc TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+    global_game_id INTEGER NOT NULL,
+    global_away_team_id INTEGER NOT NULL,
+    global_home_team_id INTEGER NOT NULL,
+    score_id INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS room (
+    id SERIAL PRIMARY KEY,
+    game_id INTEGER NOT NULL,
+    started BOOLEAN NOT NULL
+);
+
+-- room_id is nullable: users exist before they join a room
+CREATE TABLE IF NOT EXISTS "user" (
+    username VARCHAR PRIMARY KEY,
+    room_id INTEGER REFERENCES room (id),
+    tokens VARCHAR NOT NULL DEFAULT '0'
+);
+
+CREATE TABLE IF NOT EXISTS questionfr (
+    id SERIAL PRIMARY KEY,
+    question VARCHAR NOT NULL,
+    options VARCHAR NOT NULL,
+    answer INTEGER NOT NULL,
+    room_id INTEGER NOT NULL REFERENCES room (id) ON DELETE CASCADE
+);
+-- Question ids come from the sequence, which the old explicit max(id) + 1
+-- inserts never advanced
+SELECT setval(pg_get_serial_sequence('questionfr', 'id'), COALESCE(MAX(id), 0) + 1, false)
+FROM questionfr;
+
+CREATE TABLE IF NOT EXISTS bet (
+    id SERIAL PRIMARY KEY,
+    username VARCHAR NOT NULL,
+    question_id INTEGER NOT NULL REFERENCES questionfr (id) ON DELETE CASCADE,
+    user_answer VARCHAR NOT NULL,
+    bet_amount INTEGER NOT NULL,
+    created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS request (
+    id SERIAL PRIMARY KEY,
+    username1 VARCHAR NOT NULL,
+    username2 VARCHAR NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS usertofriend (
+    id SERIAL PRIMARY KEY,
+    username VARCHAR NOT NULL,
+    friend_username VARCHAR NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS player (
+    id SERIAL PRIMARY KEY,
+    name VARCHAR NOT NULL,
+    game_id INTEGER NOT NULL REFERENCES game (id),
+    team VARCHAR NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS question (
+    id SERIAL PRIMARY KEY,
+    game_id VARCHAR NOT NULL REFERENCES game_data (game_key),
+    room_id INTEGER NOT NULL REFERENCES room (id),
+    question VARCHAR NOT NULL,
+    question_type questiontype NOT NULL,
+    player_id INTEGER NOT NULL REFERENCES player (id) ON DELETE CASCADE,
+    metric_type playermetrictype NOT NULL,
+    metric_value FLOAT NOT NULL,
+    answer VARCHAR,
+    actual_value FLOAT,
+    multiplier FLOAT,
+    is_resolved BOOLEAN NOT NULL,
+    betting_deadline TIMESTAMP WITHOUT TIME ZONE,
+    created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+    updated_at TIMESTAMP WITHOUT TIME ZONE NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS score_data (
+    id SERIAL PRIMARY KEY,
+    game_id INTEGER,
+    status VARCHAR,
+    home_team VARCHAR,
+    away_team VARCHAR,
+    home_team_score INTEGER,
+    away_team_score INTEGER,
+    is_closed BOOLEAN,
+    date_time_utc TIMESTAMP WITHOUT TIME ZONE,
+    updated TIMESTAMP WITHOUT TIME ZONE,
+    game JSON,
+    quarters JSON,
+    plays JSON
+);
+
+CREATE INDEX IF NOT EXISTS ix_score_data_game_id ON score_data (game_id);
+
+CREATE TABLE IF NOT EXISTS quarter_data (
+    quarter_id SERIAL PRIMARY KEY,
+    score_id INTEGER NOT NULL,
+    number INTEGER NOT NULL,
+    name VARCHAR NOT NULL,
+    description VARCHAR NOT NULL,
+    away_team_score INTEGER NOT NULL,
+    home_team_score INTEGER NOT NULL,
+    updated TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+    created TIMESTAMP WITHOUT TIME ZONE NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS play_stats_data (
+    play_stat_id SERIAL PRIMARY KEY,
+    play_id INTEGER NOT NULL,
+    sequence INTEGER NOT NULL,
+    player_id INTEGER NOT NULL,
+    name VARCHAR NOT NULL,
+    team VARCHAR NOT NULL,
+    opponent VARCHAR NOT NULL,
+    home_or_away VARCHAR NOT NULL,
+    direction VARCHAR,
+    updated TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+    created TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+    passing_attempts INTEGER NOT NULL,
+    passing_completions INTEGER NOT NULL,
+    passing_yards INTEGER NOT NULL,
+    passing_touchdowns INTEGER NOT NULL,
+    passing_interceptions INTEGER NOT NULL,
+    passing_sacks INTEGER NOT NULL,
+    passing_sack_yards INTEGER NOT NULL,
+    rushing_attempts INTEGER NOT NULL,
+    rushing_yards INTEGER NOT NULL,
+    rushing_touchdowns INTEGER NOT NULL,
+    receiving_targets INTEGER NOT NULL,
+    receptions INTEGER NOT NULL,
+    receiving_yards INTEGER NOT NULL,
+    receiving_touchdowns INTEGER NOT NULL,
+    fumbles INTEGER NOT NULL,
+    fumbles_lost INTEGER NOT NULL,
+    two_point_conversion_attempts INTEGER NOT NULL,
+    two_point_conversion_passes INTEGER NOT NULL,
+    two_point_conversion_runs INTEGER NOT NULL,
+    two_point_conversion_receptions INTEGER NOT NULL,
+    two_point_conversion_returns INTEGER NOT NULL,
+    solo_tackles INTEGER NOT NULL,
+    assisted_tackles INTEGER NOT NULL,
+    tackles_for_loss INTEGER NOT NULL,
+    sacks INTEGER NOT NULL,
+    sack_yards INTEGER NOT NULL,
+    passes_defended INTEGER NOT NULL,
+    safeties INTEGER NOT NULL,
+    fumbles_forced INTEGER NOT NULL,
+    fumbles_recovered INTEGER NOT NULL,
+    fumble_return_yards INTEGER NOT NULL,
+    fumble_return_touchdowns INTEGER NOT NULL,
+    interceptions INTEGER NOT NULL,
+    interception_return_yards INTEGER NOT NULL,
+    interception_return_touchdowns INTEGER NOT NULL,
+    punt_returns INTEGER NOT NULL,
+    punt_return_yards INTEGER NOT NULL,
+    punt_return_touchdowns INTEGER NOT NULL,
+    kick_returns INTEGER NOT NULL,
+    kick_return_yards INTEGER NOT NULL,
+    kick_return_touchdowns INTEGER NOT NULL,
+    blocked_kicks INTEGER NOT NULL,
+    blocked_kick_returns INTEGER NOT NULL,
+    blocked_kick_return_yards INTEGER NOT NULL,
+    blocked_kick_return_touchdowns INTEGER NOT NULL,
+    field_goal_returns INTEGER NOT NULL,
+    field_goal_return_yards INTEGER NOT NULL,
+    field_goal_return_touchdowns INTEGER NOT NULL,
+    kickoffs INTEGER NOT NULL,
+    kickoff_yards INTEGER NOT NULL,
+    kickoff_touchbacks INTEGER NOT NULL,
+    punts INTEGER NOT NULL,
+    punt_yards INTEGER NOT NULL,
+    punt_touchbacks INTEGER NOT NULL,
+    punts_had_blocked INTEGER NOT NULL,
+    field_goals_attempted INTEGER NOT NULL,
+    field_goals_made INTEGER NOT NULL,
+    field_goals_yards INTEGER NOT NULL,
+    field_goals_had_blocked INTEGER NOT NULL,
+    extra_points_attempted INTEGER NOT NULL,
+    extra_points_made INTEGER NOT NULL,
+    extra_points_had_blocked INTEGER NOT NULL,
+    penalties INTEGER NOT NULL,
+    penalty_yards INTEGER NOT NULL
+);
@@ -0,0 +1,11 @@
+-- User balances become a real integer column so settlement can do arithmetic in SQL
+ALTER TABLE "user"
+    ALTER COLUMN tokens DROP DEFAULT,
+    ALTER COLUMN tokens TYPE INTEGER USING COALESCE(NULLIF(tokens, ''), '0')::INTEGER,
+    ALTER COLUMN tokens SET DEFAULT 0;
+
+-- Resolution columns written by settle_bets
+ALTER TABLE bet
+    ADD COLUMN IF NOT EXISTS correct_answer VARCHAR,
+    ADD COLUMN IF NOT EXISTS is_correct BOOLEAN,
+    ADD COLUMN IF NOT EXISTS outcome INTEGER;
@@ -0,0 +1,7 @@
+-- Per-user aggregates behind /bet/summary/{username}; fill with scripts/backfill_bet_stats.py
+CREATE TABLE IF NOT EXISTS user_bet_stats (
+    username VARCHAR PRIMARY KEY,
+    total_wins INTEGER NOT NULL DEFAULT 0,
+    total_losses INTEGER NOT NULL DEFAULT 0,
+    total_number_of_bets INTEGER NOT NULL DEFAULT 0
+);
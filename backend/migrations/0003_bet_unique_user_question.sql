@@ -0,0 +1,35 @@
+-- One bet per user per question, enforced by the database so concurrent bets cannot both land.
+-- Duplicates from before are removed, keeping each user's first bet, and undone: the
+-- stake placing one took is refunded, less what settling it paid out (outcome was
+-- added to the balance as is), and it leaves the user's bet stats.
+WITH removed AS (
+    DELETE FROM bet b
+    USING bet dup
+    WHERE b.username = dup.username
+      AND b.question_id = dup.question_id
+      AND b.id > dup.id
+    RETURNING b.username, b.bet_amount, b.is_correct, b.outcome
+), per_user AS (
+    SELECT
+        username,
+        sum(bet_amount - coalesce(outcome, 0)) AS refund,
+        sum(CASE WHEN is_correct THEN bet_amount + outcome ELSE 0 END) AS wins,
+        sum(CASE WHEN NOT is_correct THEN bet_amount ELSE 0 END) AS losses,
+        count(*) AS bets
+    FROM removed
+    GROUP BY username
+), refunded AS (
+    UPDATE "user" u
+    SET tokens = u.tokens + p.refund
+    FROM per_user p
+    WHERE u.username = p.username
+)
+UPDATE user_bet_stats s
+SET total_wins = s.total_wins - p.wins,
+    total_losses = s.total_losses - p.losses,
+    total_number_of_bets = s.total_number_of_bets - p.bets
+FROM per_user p
+WHERE s.username = p.username;
+
+ALTER TABLE bet
+    ADD CONSTRAINT bet_username_question_id_key UNIQUE (username, question_id);
@@ -0,0 +1,4 @@
+-- Questions used to be inserted with explicit max(id) + 1 ids, which never advanced the serial sequence.
+-- 0000 realigns it too now; this covers databases that applied 0000 before it did.
+SELECT setval(pg_get_serial_sequence('questionfr', 'id'), COALESCE(MAX(id), 0) + 1, false)
+FROM questionfr;
@@ -0,0 +1,10 @@
+-- migrate: no-transaction
+-- Indexes for every lookup on a request path. bet(username) is already served
+-- by the leading column of the (username, question_id) unique constraint.
+-- Built concurrently so bets and questions can still be written meanwhile.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_bet_question_id ON bet (question_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_questionfr_room_id_id ON questionfr (room_id, id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_question_game_id_room_id ON question (game_id, room_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_request_username2_username1 ON request (username2, username1);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_usertofriend_username_friend_username ON usertofriend (username, friend_username);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_player_game_id_team ON player (game_id, team);
@@ -0,0 +1,24 @@
+-- Plays normalized out of play-by-play snapshots by the ingestion pipeline
+CREATE TABLE IF NOT EXISTS play (
+    id SERIAL PRIMARY KEY,
+    game_id INTEGER NOT NULL,
+    play_id INTEGER NOT NULL,
+    sequence INTEGER NOT NULL,
+    quarter_id INTEGER,
+    quarter_name VARCHAR,
+    time_remaining_minutes INTEGER,
+    time_remaining_seconds INTEGER,
+    team VARCHAR,
+    opponent VARCHAR,
+    type VARCHAR,
+    description VARCHAR,
+    away_team_score INTEGER,
+    home_team_score INTEGER,
+    updated TIMESTAMP WITHOUT TIME ZONE,
+    payload_hash VARCHAR NOT NULL,
+    payload JSON,
+    CONSTRAINT play_game_id_play_id_key UNIQUE (game_id, play_id)
+);
+
+-- Stats are looked up and replaced per play
+CREATE INDEX IF NOT EXISTS ix_play_stats_data_play_id ON play_stats_data (play_id);
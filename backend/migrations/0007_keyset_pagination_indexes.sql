@@ -0,0 +1,6 @@
+-- migrate: no-transaction
+-- Keyset pagination walks bets in id order within a user or a question.
+-- (question_id, id) also serves every lookup ix_bet_question_id did.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_bet_username_id ON bet (username, id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_bet_question_id_id ON bet (question_id, id);
+DROP INDEX CONCURRENTLY IF EXISTS ix_bet_question_id;
@@ -0,0 +1,22 @@
+-- Game clocks are leased to one worker at a time and resumed from started_at
+CREATE TABLE IF NOT EXISTS game_clock (
+    game_id INTEGER PRIMARY KEY,
+    owner VARCHAR,
+    lease_expires_at TIMESTAMP WITH TIME ZONE,
+    started_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+    finished_at TIMESTAMP WITH TIME ZONE
+);
+
+-- Rooms subscribed to a clock, read by whichever worker owns it
+CREATE TABLE IF NOT EXISTS room_timer (
+    room_id INTEGER PRIMARY KEY REFERENCES room (id) ON DELETE CASCADE,
+    game_id INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_room_timer_game_id ON room_timer (game_id);
+
+-- Settlement survives a takeover: the new owner reschedules what is still open
+ALTER TABLE questionfr
+    ADD COLUMN IF NOT EXISTS closes_at DOUBLE PRECISION,
+    ADD COLUMN IF NOT EXISTS settled BOOLEAN NOT NULL DEFAULT false;
+CREATE INDEX IF NOT EXISTS ix_questionfr_open_room_id ON questionfr (room_id)
+    WHERE NOT settled AND closes_at IS NOT NULL;
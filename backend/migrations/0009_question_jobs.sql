@@ -0,0 +1,27 @@
+-- Question generation runs as durable jobs, claimed by separate worker processes
+CREATE TABLE IF NOT EXISTS question_job (
+    id SERIAL PRIMARY KEY,
+    game_id INTEGER NOT NULL,
+    clock_seconds DOUBLE PRECISION NOT NULL,
+    closes_at DOUBLE PRECISION NOT NULL,
+    room_ids INTEGER[] NOT NULL,
+    plays JSON NOT NULL,
+    prompt_version INTEGER NOT NULL,
+    status VARCHAR NOT NULL DEFAULT 'queued',
+    attempts INTEGER NOT NULL,
+    max_attempts INTEGER NOT NULL,
+    run_after TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+    deadline TIMESTAMP WITH TIME ZONE NOT NULL,
+    locked_by VARCHAR,
+    locked_until TIMESTAMP WITH TIME ZONE,
+    last_error VARCHAR,
+    question_ids INTEGER[],
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+    finished_at TIMESTAMP WITH TIME ZONE
+);
+
+-- Workers only ever scan the jobs still to run, and owners the ones to deliver
+CREATE INDEX IF NOT EXISTS ix_question_job_claimable ON question_job (run_after)
+    WHERE status IN ('queued', 'running');
+CREATE INDEX IF NOT EXISTS ix_question_job_done_game_id ON question_job (game_id)
+    WHERE status = 'done';
@@ -0,0 +1,14 @@
+-- Play ids are only unique within a game, so stats carry the game they belong to
+ALTER TABLE play_stats_data ADD COLUMN IF NOT EXISTS game_id INTEGER;
+
+-- Existing rows whose play id is stored for one game only
+UPDATE play_stats_data s
+SET game_id = p.game_id
+FROM play p
+WHERE s.game_id IS NULL
+  AND p.play_id = s.play_id
+  AND NOT EXISTS (
+      SELECT 1 FROM play other WHERE other.play_id = p.play_id AND other.game_id <> p.game_id
+  );
+
+CREATE INDEX IF NOT EXISTS ix_play_stats_data_game_id_play_id ON play_stats_data (game_id, play_id);
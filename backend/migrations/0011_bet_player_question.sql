@@ -0,0 +1,8 @@
+-- Bets on player questions get their own key, question_id only names room
+-- questions (questionfr), so settling one kind never touches the other's bets
+ALTER TABLE bet ALTER COLUMN question_id DROP NOT NULL;
+ALTER TABLE bet ADD COLUMN IF NOT EXISTS player_question_id INTEGER REFERENCES question (id) ON DELETE CASCADE;
+ALTER TABLE bet
+    ADD CONSTRAINT bet_one_question CHECK (num_nonnulls(question_id, player_question_id) = 1);
+
+-- Its indexes are built concurrently, in 0012
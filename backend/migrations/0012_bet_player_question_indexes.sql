@@ -0,0 +1,6 @@
+-- migrate: no-transaction
+-- Only player question bets are in these, room question bets have their own
+CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS ux_bet_username_player_question_id ON bet (username, player_question_id)
+    WHERE player_question_id IS NOT NULL;
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_bet_player_question_id ON bet (player_question_id)
+    WHERE player_question_id IS NOT NULL;
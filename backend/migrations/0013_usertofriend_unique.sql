@@ -0,0 +1,12 @@
+-- A friendship is stored once per direction. Accepting a request twice used
+-- to insert it again, so keep the first row of each pair before enforcing it.
+DELETE FROM usertofriend a
+USING usertofriend b
+WHERE a.username = b.username
+  AND a.friend_username = b.friend_username
+  AND a.id > b.id;
+
+CREATE UNIQUE INDEX IF NOT EXISTS ux_usertofriend_username_friend_username
+    ON usertofriend (username, friend_username);
+-- The unique index serves every lookup the plain one did
+DROP INDEX IF EXISTS ix_usertofriend_username_friend_username;
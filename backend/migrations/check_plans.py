@@ -0,0 +1,98 @@
+"""Fail if a hot-path query has no index to use.
+
+Run with `python -m backend.migrations.check_plans` against a migrated
+database. Each query below mirrors a service lookup; it is EXPLAINed with
+sequential scans disabled, so the planner picks an index whenever one can
+serve the query and any remaining Seq Scan means the index is missing.
+Keyset pages must also come out of the index already in order, without a
+Sort. The same checks run under pytest in tests/test_query_plans.py.
+"""
+
+import asyncio
+import json
+import sys
+
+from sqlalchemy import and_
+from sqlalchemy.dialects import postgresql
+from sqlmodel import select
+
+from ..db import engine
+from ..models.bet import Bet
+from ..models.play import Play
+from ..models.Player import Player
+from ..models.PlayStatsData import PlayStatsData
+from ..models.question import Question
+from ..models.question_job import QuestionJob
+from ..models.questionFR import QuestionFR
+from ..models.request import Request
+from ..models.room import Room
+from ..models.user import User
+from ..models.usertofriend import UserToFriend
+from ..services.pagination import DEFAULT_PAGE_SIZE, keyset
+from ..services.question_jobs import deliverable_jobs, runnable_jobs
+
+HOT_QUERIES = {
+    "bets by question": select(Bet).where(Bet.question_id == 1),
+    "open bets by question": select(Bet).where(Bet.question_id == 1, Bet.is_correct.is_(None)),
+    "bets by player question": select(Bet).where(Bet.player_question_id == 1, Bet.is_correct.is_(None)),
+    "bets by user": select(Bet).where(Bet.username == "user"),
+    "bet by user and question": select(Bet).where(Bet.username == "user", Bet.question_id == 1),
+    "questions by room": select(QuestionFR).where(QuestionFR.room_id == 1),
+    "questions by game and room": select(Question).where(Question.game_id == "1", Question.room_id == 1),
+    "incoming requests": select(Request.username1).where(Request.username2 == "user"),
+    "request by pair": select(Request).where(Request.username1 == "a", Request.username2 == "b"),
+    "friends of user": select(UserToFriend.friend_username).where(UserToFriend.username == "user"),
+    "user by username": select(User).where(User.username == "user"),
+    "players by game": select(Player).where(Player.game_id == 1),
+    "players by team": select(Player).where(Player.game_id == 1, Player.team == "LAL"),
+    "page of users": keyset(select(User), User.username, "user", DEFAULT_PAGE_SIZE),
+    "page of rooms": keyset(select(Room), Room.id, 1, DEFAULT_PAGE_SIZE),
+    "page of bets by user": keyset(select(Bet).where(Bet.username == "user"), Bet.id, 1, DEFAULT_PAGE_SIZE),
+    "page of bets by question": keyset(select(Bet).where(Bet.question_id == 1), Bet.id, 1, DEFAULT_PAGE_SIZE),
+    "stats of a game": select(PlayStatsData.name).join(
+        Play, and_(Play.game_id == PlayStatsData.game_id, Play.play_id == PlayStatsData.play_id)
+    ).where(Play.game_id == 1),
+    "runnable question jobs": runnable_jobs(8),
+    "deliverable question jobs": select(QuestionJob).where(deliverable_jobs([1])),
+}
+
+
+def plan_problems(plan: dict) -> list:
+    found = []
+    if plan["Node Type"] == "Seq Scan":
+        found.append(f"seq scan on {plan['Relation Name']}")
+    elif plan["Node Type"] in ("Sort", "Incremental Sort"):
+        found.append("sort")
+    for child in plan.get("Plans", []):
+        found += plan_problems(child)
+    return found
+
+
+def explain_sql(query) -> str:
+    sql = query.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True})
+    return f"EXPLAIN (FORMAT JSON) {sql}"
+
+
+def explained_problems(plan) -> list:
+    """plan_problems of an EXPLAIN (FORMAT JSON) result, as text or parsed"""
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan_problems(plan[0]["Plan"])
+
+
+async def check() -> list:
+    failures = []
+    async with engine.connect() as conn:
+        await conn.exec_driver_sql("SET enable_seqscan = off")
+        for name, query in HOT_QUERIES.items():
+            problems = explained_problems((await conn.exec_driver_sql(explain_sql(query))).scalar())
+            print(f"{'FAIL' if problems else 'ok':4}  {name}" + (f"  ({', '.join(problems)})" if problems else ""))
+            if problems:
+                failures.append(name)
+    await engine.dispose()
+    return failures
+
+
+if __name__ == "__main__":
+    engine.echo = False
+    sys.exit(1 if asyncio.run(check()) else 0)
@@ -0,0 +1,75 @@
+"""Apply versioned SQL migrations in order.
+
+Run with `python -m backend.migrations.migrate`. Each NNNN_name.sql file in
+this directory is applied once, in its own transaction, and recorded in
+schema_migrations.
+
+A file starting with the NO_TRANSACTION marker is run one statement at a time
+outside a transaction instead, for CREATE INDEX CONCURRENTLY on tables that
+take writes. Its statements must be safe to rerun (IF NOT EXISTS), since a
+failure part way leaves the earlier ones applied. A concurrent build that
+fails leaves an invalid index behind, which has to be dropped before the file
+is run again.
+"""
+
+import asyncio
+import re
+from pathlib import Path
+
+from ..db import engine
+
+MIGRATIONS_DIR = Path(__file__).resolve().parent
+NO_TRANSACTION = "-- migrate: no-transaction"
+
+INVALID_INDEXES_SQL = "SELECT indexrelid::regclass::text AS name FROM pg_index WHERE NOT indisvalid"
+
+
+def statements(sql: str) -> list:
+    """Split a migration on semicolons that end a line"""
+    return [s.strip() for s in re.split(r";[ \t]*$", sql, flags=re.MULTILINE) if s.strip()]
+
+
+async def apply_without_transaction(raw, sql: str):
+    for statement in statements(sql):
+        await raw.execute(statement)
+    invalid = [row["name"] for row in await raw.fetch(INVALID_INDEXES_SQL)]
+    if invalid:
+        raise RuntimeError(f"Invalid indexes, drop them and migrate again: {', '.join(invalid)}")
+
+
+async def migrate() -> list:
+    applied_now = []
+    async with engine.connect() as conn:
+        # Raw asyncpg connection: migration files hold several statements each
+        raw = (await conn.get_raw_connection()).driver_connection
+        # The app's statement timeout would cancel long backfills and index builds
+        await raw.execute("SET statement_timeout = 0")
+        await raw.execute(
+            """
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                version VARCHAR PRIMARY KEY,
+                applied_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now()
+            )
+            """
+        )
+        applied = {row["version"] for row in await raw.fetch("SELECT version FROM schema_migrations")}
+        for path in sorted(MIGRATIONS_DIR.glob("[0-9][0-9][0-9][0-9]_*.sql")):
+            if path.stem in applied:
+                continue
+            sql = path.read_text()
+            if sql.startswith(NO_TRANSACTION):
+                await apply_without_transaction(raw, sql)
+                await raw.execute("INSERT INTO schema_migrations (version) VALUES ($1)", path.stem)
+            else:
+                async with raw.transaction():
+                    await raw.execute(sql)
+                    await raw.execute("INSERT INTO schema_migrations (version) VALUES ($1)", path.stem)
+            applied_now.append(path.stem)
+    await engine.dispose()
+    return applied_now
+
+
+if __name__ == "__main__":
+    engine.echo = False
+    versions = asyncio.run(migrate())
+    print("\n".join(f"applied {v}" for v in versions) or "database is up to date")
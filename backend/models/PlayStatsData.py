@@ -1,14 +1,17 @@
-from sqlmodel import Field, SQLModel
+from sqlmodel import Field, Index, SQLModel
 from typing import Optional
 from datetime import datetime
 
 
 class PlayStatsData(SQLModel, table=True):
     __tablename__ = "play_stats_data"
+    __table_args__ = (Index("ix_play_stats_data_game_id_play_id", "game_id", "play_id"),)
 
     # Primary fields
     play_stat_id: Optional[int] = Field(default=None, primary_key=True, alias="PlayStatID")
-    play_id: int = Field(alias="PlayID")
+    play_id: int = Field(alias="PlayID", index=True)
+    # Play ids are only unique within a game (play.game_id), set by the ingestor
+    game_id: Optional[int] = Field(default=None)
     sequence: int = Field(alias="Sequence")
     player_id: int = Field(alias="PlayerID")
     name: str = Field(alias="Name")
@@ -1,9 +1,11 @@
-from sqlmodel import Field, SQLModel
+from sqlmodel import Field, Index, SQLModel
 from datetime import datetime
 from typing import Optional
 
 
 class Player(SQLModel, table=True):
+    __table_args__ = (Index("ix_player_game_id_team", "game_id", "team"),)
+
     id: Optional[int] = Field(default=None, primary_key=True)
     name: str = Field()
     game_id: int = Field(foreign_key="game.id")
@@ -1,18 +1,48 @@
-from sqlmodel import Field, SQLModel
+from sqlalchemy import CheckConstraint, text
+from sqlmodel import Field, Index, SQLModel, UniqueConstraint
 from typing import Optional, List
 from datetime import datetime
 
 
 class Bet(SQLModel, table=True):
+    # One bet per user per question
+    __table_args__ = (
+        UniqueConstraint("username", "question_id"),
+        # Either a room question or a player question, never both
+        CheckConstraint("num_nonnulls(question_id, player_question_id) = 1", name="bet_one_question"),
+        Index(
+            "ux_bet_username_player_question_id",
+            "username",
+            "player_question_id",
+            unique=True,
+            postgresql_where=text("player_question_id IS NOT NULL"),
+        ),
+        Index(
+            "ix_bet_player_question_id",
+            "player_question_id",
+            postgresql_where=text("player_question_id IS NOT NULL"),
+        ),
+        # Keyset pages of a user's and a question's bets, in id order
+        Index("ix_bet_username_id", "username", "id"),
+        Index("ix_bet_question_id_id", "question_id", "id"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     username: str = Field()
-    question_id: int = Field(
-        foreign_key="questionfr.id", ondelete="CASCADE"
+    question_id: Optional[int] = Field(
+        default=None, foreign_key="questionfr.id", ondelete="CASCADE"
     )  # Fixed foreign key
+    # Bets on player questions (question table) settle by this key instead
+    player_question_id: Optional[int] = Field(
+        default=None, foreign_key="question.id", ondelete="CASCADE"
+    )
     # Bet details
     user_answer: str = Field(
         alias="user_answer"
     )  # User's prediction (OVER/UNDER, YES/NO)
     bet_amount: int = Field(alias="bet_amount")  # Amount of tokens bet
     # Resolution (filled when question is resolved)
+    correct_answer: Optional[str] = Field(default=None)
+    is_correct: Optional[bool] = Field(default=None)
+    outcome: Optional[int] = Field(default=None)  # Signed token change for the user
     created_at: datetime = Field(default_factory=datetime.now)
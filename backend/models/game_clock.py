@@ -0,0 +1,38 @@
+from sqlmodel import Field, SQLModel
+from typing import Optional
+from sqlalchemy import Column, DateTime, func
+from datetime import datetime
+
+
+class GameClockLease(SQLModel, table=True):
+    """
+    Which worker runs a game's clock, and since when the clock has run.
+
+    A worker owns the clock while lease_expires_at is in the future and keeps
+    renewing it; any worker may take over a clock whose lease ran out. The
+    clock resumes from started_at, so a takeover doesn't restart the game.
+    """
+
+    __tablename__ = "game_clock"
+
+    game_id: int = Field(primary_key=True)
+    owner: Optional[str] = Field(default=None)
+    lease_expires_at: Optional[datetime] = Field(
+        default=None, sa_column=Column(DateTime(timezone=True))
+    )
+    started_at: Optional[datetime] = Field(
+        default=None,
+        sa_column=Column(DateTime(timezone=True), nullable=False, server_default=func.now()),
+    )
+    finished_at: Optional[datetime] = Field(
+        default=None, sa_column=Column(DateTime(timezone=True))
+    )
+
+
+class RoomTimer(SQLModel, table=True):
+    """A room subscribed to its game's clock, whichever worker runs it"""
+
+    __tablename__ = "room_timer"
+
+    room_id: int = Field(primary_key=True, foreign_key="room.id", ondelete="CASCADE")
+    game_id: int = Field(index=True)
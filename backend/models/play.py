@@ -0,0 +1,36 @@
+from sqlmodel import Field, SQLModel, UniqueConstraint
+from typing import Optional, Dict
+from sqlalchemy import Column, JSON
+from datetime import datetime
+
+
+class Play(SQLModel, table=True):
+    """
+    One play of a game, normalized out of the play-by-play snapshots.
+
+    Upstream plays are keyed by PlayID and revised in place (Sequence,
+    Updated), so each row keeps a hash of the raw play to detect changes.
+    """
+
+    __tablename__ = "play"
+    __table_args__ = (UniqueConstraint("game_id", "play_id"),)
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    game_id: int = Field()
+    play_id: int = Field(alias="PlayID")
+    sequence: int = Field(alias="Sequence")
+    quarter_id: Optional[int] = Field(default=None, alias="QuarterID")
+    quarter_name: Optional[str] = Field(default=None, alias="QuarterName")
+    time_remaining_minutes: Optional[int] = Field(default=None, alias="TimeRemainingMinutes")
+    time_remaining_seconds: Optional[int] = Field(default=None, alias="TimeRemainingSeconds")
+    team: Optional[str] = Field(default=None, alias="Team")
+    opponent: Optional[str] = Field(default=None, alias="Opponent")
+    type: Optional[str] = Field(default=None, alias="Type")
+    description: Optional[str] = Field(default=None, alias="Description")
+    away_team_score: Optional[int] = Field(default=None, alias="AwayTeamScore")
+    home_team_score: Optional[int] = Field(default=None, alias="HomeTeamScore")
+    updated: Optional[datetime] = Field(default=None, alias="Updated")
+
+    # Raw upstream play and its hash, for change detection
+    payload_hash: str = Field()
+    payload: Optional[Dict] = Field(default=None, sa_column=Column(JSON))
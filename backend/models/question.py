@@ -1,4 +1,4 @@
-from sqlmodel import Field, SQLModel
+from sqlmodel import Field, Index, SQLModel
 from datetime import datetime
 from typing import Optional, List
 from .PlayerMetricType import PlayerMetricType
@@ -13,6 +13,7 @@ class Question(SQLModel, table=True):
     """
 
     __tablename__ = "question"
+    __table_args__ = (Index("ix_question_game_id_room_id", "game_id", "room_id"),)
 
     id: Optional[int] = Field(default=None, primary_key=True)
     game_id: str = Field(foreign_key="game_data.game_key")
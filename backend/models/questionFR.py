@@ -1,13 +1,26 @@
-from sqlmodel import Field, SQLModel, Relationship
+from sqlmodel import Field, Index, SQLModel, Relationship
 from typing import TYPE_CHECKING, Optional
+from sqlalchemy import text
 
 if TYPE_CHECKING:
     from .room import Room
 
 
 class QuestionFR(SQLModel, table=True):
+    __table_args__ = (
+        Index("ix_questionfr_room_id_id", "room_id", "id"),
+        Index(
+            "ix_questionfr_open_room_id",
+            "room_id",
+            postgresql_where=text("NOT settled AND closes_at IS NOT NULL"),
+        ),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     question: str
     options: str
     answer: int
     room_id: int = Field(foreign_key="room.id", ondelete="CASCADE")
+    # Game clock seconds at which its bets settle, and whether they have
+    closes_at: Optional[float] = Field(default=None)
+    settled: bool = Field(default=False, sa_column_kwargs={"server_default": text("false")})
@@ -0,0 +1,70 @@
+from sqlmodel import Field, Index, SQLModel
+from typing import Dict, List, Optional
+from sqlalchemy import ARRAY, JSON, Column, DateTime, Integer, String, func, text
+from datetime import datetime
+from enum import Enum
+
+
+class QuestionJobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    DELIVERED = "delivered"
+    DEAD = "dead"
+
+
+class QuestionJob(SQLModel, table=True):
+    """
+    One game clock tick's question, to be generated by a question worker.
+
+    Queued by the worker running the game clock, claimed by a question worker
+    with FOR UPDATE SKIP LOCKED (locked_until bounds how long a claim holds),
+    and retried from run_after until it succeeds, runs out of attempts or
+    passes its deadline; the last two are dead-lettered with status dead.
+    Generated questions are inserted with the job marked done, then pushed
+    to the rooms by the clock's owner, or by any worker once the clock has
+    finished, which marks it delivered.
+    """
+
+    __tablename__ = "question_job"
+    __table_args__ = (
+        Index(
+            "ix_question_job_claimable",
+            "run_after",
+            postgresql_where=text("status IN ('queued', 'running')"),
+        ),
+        Index("ix_question_job_done_game_id", "game_id", postgresql_where=text("status = 'done'")),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    game_id: int
+    clock_seconds: float
+    # Game clock seconds at which the question's bets settle
+    closes_at: float
+    room_ids: List[int] = Field(sa_column=Column(ARRAY(Integer), nullable=False))
+    plays: List[Dict] = Field(sa_column=Column(JSON, nullable=False))
+    prompt_version: int
+    status: QuestionJobStatus = Field(
+        default=QuestionJobStatus.QUEUED,
+        sa_column=Column(String, nullable=False, server_default=QuestionJobStatus.QUEUED.value),
+    )
+    attempts: int = Field(default=0)
+    max_attempts: int
+    run_after: Optional[datetime] = Field(
+        default=None,
+        sa_column=Column(DateTime(timezone=True), nullable=False, server_default=func.now()),
+    )
+    deadline: datetime = Field(sa_column=Column(DateTime(timezone=True), nullable=False))
+    locked_by: Optional[str] = Field(default=None)
+    locked_until: Optional[datetime] = Field(
+        default=None, sa_column=Column(DateTime(timezone=True))
+    )
+    last_error: Optional[str] = Field(default=None)
+    question_ids: Optional[List[int]] = Field(default=None, sa_column=Column(ARRAY(Integer)))
+    created_at: Optional[datetime] = Field(
+        default=None,
+        sa_column=Column(DateTime(timezone=True), nullable=False, server_default=func.now()),
+    )
+    finished_at: Optional[datetime] = Field(
+        default=None, sa_column=Column(DateTime(timezone=True))
+    )
@@ -1,7 +1,9 @@
-from sqlmodel import Field, SQLModel
+from sqlmodel import Field, Index, SQLModel
 
 
 class Request(SQLModel, table=True):
+    __table_args__ = (Index("ix_request_username2_username1", "username2", "username1"),)
+
     id: int = Field(primary_key=True)
     username1: str = Field()
     username2: str = Field()
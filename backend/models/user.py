@@ -1,5 +1,5 @@
 from sqlmodel import Field, SQLModel, Relationship
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Optional
 
 if TYPE_CHECKING:
     from .room import Room
@@ -7,6 +7,6 @@ if TYPE_CHECKING:
 
 class User(SQLModel, table=True):
     username: str = Field(primary_key=True)
-    room_id: int = Field(default=None, foreign_key="room.id")
-    tokens: str = Field(default=0)
-    room: "Room" = Relationship(back_populates="players")
+    room_id: Optional[int] = Field(default=None, foreign_key="room.id")
+    tokens: int = Field(default=0)
+    room: Optional["Room"] = Relationship(back_populates="players")
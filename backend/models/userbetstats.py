@@ -0,0 +1,15 @@
+from sqlmodel import Field, SQLModel
+
+
+class UserBetStats(SQLModel, table=True):
+    """
+    Running per-user betting totals, updated when bets are placed and settled
+    so the bet summary is a single primary key read.
+    """
+
+    __tablename__ = "user_bet_stats"
+
+    username: str = Field(primary_key=True)
+    total_wins: int = Field(default=0)
+    total_losses: int = Field(default=0)
+    total_number_of_bets: int = Field(default=0)
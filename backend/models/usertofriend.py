@@ -1,7 +1,11 @@
-from sqlmodel import Field, SQLModel
+from sqlmodel import Field, Index, SQLModel
 
 
 class UserToFriend(SQLModel, table=True):
+    __table_args__ = (
+        Index("ux_usertofriend_username_friend_username", "username", "friend_username", unique=True),
+    )
+
     id: int = Field(primary_key=True)
     username: str = Field()
     friend_username: str = Field()
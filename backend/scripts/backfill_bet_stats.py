@@ -0,0 +1,52 @@
+"""One-time backfill of user_bet_stats from existing bets.
+
+Run with `python -m backend.scripts.backfill_bet_stats` after applying
+migrations/0002_user_bet_stats.sql. Totals are recomputed from scratch with a
+single join and GROUP BY, so rerunning it is safe.
+"""
+
+import asyncio
+
+from sqlalchemy import case, func, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlmodel import select
+
+from ..db import async_session, engine
+from ..models.bet import Bet
+from ..models.questionFR import QuestionFR
+from ..models.userbetstats import UserBetStats
+
+
+async def backfill() -> int:
+    totals = (
+        select(
+            Bet.username,
+            func.coalesce(func.sum(case((Bet.is_correct.is_(True), Bet.bet_amount + Bet.outcome))), 0),
+            func.coalesce(func.sum(case((Bet.is_correct.is_(False), Bet.bet_amount))), 0),
+            func.count(Bet.id),
+        )
+        .join(QuestionFR, QuestionFR.id == Bet.question_id)
+        .group_by(Bet.username)
+    )
+    stmt = pg_insert(UserBetStats).from_select(
+        ["username", "total_wins", "total_losses", "total_number_of_bets"], totals
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[UserBetStats.username],
+        set_={
+            "total_wins": stmt.excluded.total_wins,
+            "total_losses": stmt.excluded.total_losses,
+            "total_number_of_bets": stmt.excluded.total_number_of_bets,
+        },
+    )
+    async with async_session() as db:
+        # Aggregates every bet, longer than the app's statement timeout allows
+        await db.exec(text("SET LOCAL statement_timeout = 0"))
+        result = await db.exec(stmt)
+        await db.commit()
+    await engine.dispose()
+    return result.rowcount
+
+
+if __name__ == "__main__":
+    print(f"Backfilled bet stats for {asyncio.run(backfill())} users")
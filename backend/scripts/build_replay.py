@@ -0,0 +1,29 @@
+"""Build a game's columnar replay file from a recorded play list.
+
+Run with `python -m backend.scripts.build_replay PLAYS.json --game-id 1`.
+The JSON is a list of plays in feed order, each with at least a "timestamp"
+game clock; it is written to backend/replays/<game_id>.arrow (or --out).
+"""
+
+import argparse
+import json
+from pathlib import Path
+
+from ..services.replay_store import REPLAY_DIR, write_replay
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("source", type=Path)
+    parser.add_argument("--game-id", type=int, required=True)
+    parser.add_argument("--out", type=Path, help="output file (default replays/<game_id>.arrow)")
+    args = parser.parse_args()
+
+    plays = json.loads(args.source.read_text())
+    out = args.out or REPLAY_DIR / f"{args.game_id}.arrow"
+    write_replay(out, plays)
+    print(f"Wrote {len(plays)} plays to {out}")
+
+
+if __name__ == "__main__":
+    main()
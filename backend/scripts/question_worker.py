@@ -0,0 +1,39 @@
+"""Generate queued questions, in a process of its own.
+
+Run with `python -m backend.scripts.question_worker` against a migrated
+database (DATABASE_URL), as many processes as generation needs; they share
+the question_job queue. On SIGINT or SIGTERM the jobs still in hand go back
+to the queue for another worker.
+"""
+
+import argparse
+import asyncio
+import signal
+
+from ..db import engine
+from ..services.question_jobs import question_worker_from_env
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", type=int, help="jobs generated at once (QUESTION_WORKER_CONCURRENCY)")
+    args = parser.parse_args()
+    engine.echo = False
+
+    worker = question_worker_from_env(args.concurrency)
+    task = asyncio.create_task(worker.run())
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, task.cancel)
+    print(f"Question worker {worker.worker_id} running {worker.concurrency} jobs at a time")
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+    finally:
+        await worker.release()
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
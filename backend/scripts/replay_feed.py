@@ -0,0 +1,72 @@
+"""Replay recorded play-by-play snapshots through the ingestion pipeline.
+
+Run with `python -m backend.scripts.replay_feed PATH [PATH ...]` against a
+migrated database (DATABASE_URL). A path is a snapshot .json file, a .jsonl
+file of snapshots (one per line) or a directory of them, replayed in name
+order. Only new or changed plays are written, so replaying twice is a no-op.
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from pathlib import Path
+from typing import Iterator, List
+
+from ..db import async_session, engine
+from ..services.ingest import PlayIngestor
+
+
+def snapshots(paths: List[str]) -> Iterator[tuple]:
+    files = []
+    for path in map(Path, paths):
+        if path.is_dir():
+            files.extend(sorted(p for p in path.iterdir() if p.suffix in (".json", ".jsonl")))
+        else:
+            files.append(path)
+    for file in files:
+        if file.suffix == ".jsonl":
+            with file.open() as f:
+                for number, line in enumerate(f, 1):
+                    if line.strip():
+                        yield f"{file.name}:{number}", json.loads(line)
+        else:
+            yield file.name, json.loads(file.read_text())
+
+
+async def replay(paths: List[str], game_id=None) -> dict:
+    ingestor = PlayIngestor()
+    totals = {"snapshots": 0, "new": 0, "changed": 0, "stats": 0}
+    async with async_session() as db:
+        for name, snapshot in snapshots(paths):
+            started = time.perf_counter()
+            result = await ingestor.ingest(db, snapshot, game_id)
+            elapsed = (time.perf_counter() - started) * 1e3
+            print(
+                f"{name}: game {result['game_id']}, {result['plays']} plays, "
+                f"{result['new']} new, {result['changed']} changed, {result['stats']} stats ({elapsed:.1f} ms)"
+            )
+            totals["snapshots"] += 1
+            for key in ("new", "changed", "stats"):
+                totals[key] += result[key]
+    return totals
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("paths", nargs="+")
+    parser.add_argument("--game-id", type=int, help="override the game id found in the snapshots")
+    args = parser.parse_args()
+    engine.echo = False
+    try:
+        totals = await replay(args.paths, args.game_id)
+    finally:
+        await engine.dispose()
+    print(
+        f"{totals['snapshots']} snapshots: {totals['new']} new plays, "
+        f"{totals['changed']} changed, {totals['stats']} stats written"
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,56 +1,132 @@
 from ..db import db_session
-from sqlmodel import Session, select
+from sqlalchemy import Float, Integer, String, and_, case, cast, column, func, literal, or_, update, values
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from fastapi import Depends, HTTPException
 from ..models.bet import Bet
+from ..models.game_clock import GameClockLease
+from ..models.room import Room
 from ..models.user import User
 from ..models.questionFR import QuestionFR
+from ..models.userbetstats import UserBetStats
+from .leaderboard import leaderboards
+from .pagination import DEFAULT_PAGE_SIZE, keyset, split_page
+from .read_cache import read_cache, user_key
 from datetime import datetime
-from typing import List
+from typing import Dict, List, Optional, Tuple
+
+
+async def settle_bets(
+    db: AsyncSession, question_id: int, correct_answer: str, multiplier: float = 1.0, key=Bet.question_id
+) -> Dict[str, int]:
+    """Settle every open bet on a question, credit users and update their stats.
+
+    Bets are marked and their outcomes returned by a data-modifying CTE, which
+    is aggregated per user and applied to balances and to user_bet_stats in
+    the same statement. Returns the new balance of each user settled. The
+    caller owns the transaction, and once it commits drops their cached users
+    and moves them on the leaderboards. key is the bet column question_id
+    matches: Bet.question_id for room questions, Bet.player_question_id for
+    player questions.
+    """
+    return await settle_many_bets(db, [(question_id, correct_answer, multiplier)], key)
+
+
+async def settle_many_bets(
+    db: AsyncSession, outcomes: List[Tuple[int, str, float]], key=Bet.question_id
+) -> Dict[str, int]:
+    """settle_bets for many (question_id, correct_answer, multiplier) at once"""
+    if not outcomes:
+        return {}
+    answers = values(
+        column("question_id", Integer),
+        column("correct_answer", String),
+        column("multiplier", Float),
+        name="answers",
+    ).data([(question_id, answer, multiplier or 1.0) for question_id, answer, multiplier in outcomes])
+    is_correct = Bet.user_answer == answers.c.correct_answer
+    settled = (
+        update(Bet)
+        .where(key == answers.c.question_id, Bet.is_correct.is_(None))
+        .values(
+            correct_answer=answers.c.correct_answer,
+            is_correct=is_correct,
+            # Signed net: the winnings, or the stake lost
+            outcome=case(
+                (is_correct, cast(func.floor(Bet.bet_amount * answers.c.multiplier), Integer)),
+                else_=-Bet.bet_amount,
+            ),
+        )
+        .returning(Bet.username, Bet.outcome, Bet.is_correct, Bet.bet_amount)
+        .cte("settled")
+    )
+    # The stake was taken when the bet was placed, so a winner gets it back
+    # with the winnings and a loser gets nothing
+    payout = case((settled.c.is_correct, settled.c.bet_amount + settled.c.outcome), else_=0)
+    payouts = (
+        select(
+            settled.c.username,
+            # What the summary counts as won, same as the balance credit
+            func.sum(payout).label("payout"),
+            func.sum(case((settled.c.is_correct, 0), else_=settled.c.bet_amount)).label("losses"),
+        )
+        .group_by(settled.c.username)
+        .cte("payouts")
+    )
+    credited = (
+        update(User)
+        .where(User.username == payouts.c.username)
+        .values(tokens=User.tokens + payouts.c.payout)
+        .returning(User.username, User.tokens)
+        .cte("credited")
+    )
+    stats = pg_insert(UserBetStats).from_select(
+        ["username", "total_wins", "total_losses", "total_number_of_bets"],
+        # Bets were already counted when they were placed
+        select(payouts.c.username, payouts.c.payout, payouts.c.losses, literal(0)),
+    )
+    counted = (
+        stats.on_conflict_do_update(
+            index_elements=[UserBetStats.username],
+            set_={
+                "total_wins": UserBetStats.total_wins + stats.excluded.total_wins,
+                "total_losses": UserBetStats.total_losses + stats.excluded.total_losses,
+            },
+        )
+        .returning(UserBetStats.username)
+        .cte("counted")
+    )
+    # Data-modifying CTEs run to completion whether or not they are read
+    result = await db.exec(select(credited.c.username, credited.c.tokens).add_cte(counted))
+    return dict(result.all())
 
 
 class BetService:
     """Service for handling user bets"""
 
-    def __init__(self, db: Session = Depends(db_session)):
+    def __init__(self, db: AsyncSession = Depends(db_session)):
         self.db = db
 
-    def create_bet(
+    async def create_bet(
         self,
         username: str,
         question_id: int,
         user_answer: str,
         bet_amount: int,
     ) -> Bet:
-        """Place a bet and deduct tokens from user"""
-
-        # Validate question exists and betting is still open
-        question = self.db.exec(
-            select(QuestionFR).where(QuestionFR.id == question_id)
-        ).first()
+        """Place a bet and deduct tokens from user in a single atomic statement.
 
-        if not question:
-            raise HTTPException(404, "Question not found")
+        The bet insert, the conditional balance decrement and the stats upsert
+        are chained CTEs, so concurrent bets can neither duplicate a bet (unique
+        username/question_id) nor overdraw the balance (row-locked decrement).
+        Bets are only taken while the question is open: not settled, and its
+        game clock not yet past closes_at. The question row is share-locked,
+        so a bet either commits before settlement starts or sees it settled.
+        """
+        # Deferred, questionFR imports this module for settlement
+        from .questionFR import clock_leases
 
-        # Check if user already has a bet on this question
-        existing_bet = self.db.exec(
-            select(Bet).where(Bet.username == username, Bet.question_id == question_id)
-        ).first()
-
-        if existing_bet:
-            raise HTTPException(400, "User already has a bet on this question")
-
-        # Get user and check if they have enough tokens
-        user = self.db.exec(select(User).where(User.username == username)).first()
-        if not user:
-            raise HTTPException(404, "User not found")
-
-        if user.tokens < bet_amount:
-            raise HTTPException(
-                400,
-                f"Insufficient tokens. You have {user.tokens}, need {bet_amount}",
-            )
-
-        # Create the bet
         bet = Bet(
             username=username,
             question_id=question_id,
@@ -58,55 +134,139 @@ class BetService:
             bet_amount=bet_amount,
         )
 
-        user.tokens -= bet_amount
+        question = (
+            select(QuestionFR.id)
+            .join(Room, Room.id == QuestionFR.room_id)
+            .outerjoin(
+                GameClockLease,
+                and_(GameClockLease.game_id == Room.game_id, GameClockLease.finished_at.is_(None)),
+            )
+            .where(
+                QuestionFR.id == question_id,
+                ~QuestionFR.settled,
+                # Questions outside any running clock close only by settling
+                or_(
+                    QuestionFR.closes_at.is_(None),
+                    GameClockLease.game_id.is_(None),
+                    clock_leases.clock_seconds() > QuestionFR.closes_at,
+                ),
+            )
+            .with_for_update(read=True, of=QuestionFR)
+            .cte("open_question")
+        )
+        row = bet.model_dump(exclude={"id"})
+        placed = (
+            pg_insert(Bet)
+            .from_select(
+                list(row),
+                select(
+                    *(
+                        question.c.id if name == "question_id" else literal(value, Bet.__table__.c[name].type)
+                        for name, value in row.items()
+                    )
+                ),
+            )
+            .on_conflict_do_nothing(index_elements=[Bet.username, Bet.question_id])
+            .returning(Bet.id)
+            .cte("placed")
+        )
+        # Only debit once the bet row exists, and only if the balance covers it
+        debited = (
+            update(User)
+            .where(
+                User.username == username,
+                User.tokens >= bet_amount,
+                select(placed.c.id).exists(),
+            )
+            .values(tokens=User.tokens - bet_amount)
+            .returning(User.tokens)
+            .cte("debited")
+        )
+        counted = (
+            pg_insert(UserBetStats)
+            .from_select(
+                ["username", "total_wins", "total_losses", "total_number_of_bets"],
+                select(literal(username), literal(0), literal(0), literal(1)).where(
+                    select(debited.c.tokens).exists()
+                ),
+            )
+            .on_conflict_do_update(
+                index_elements=[UserBetStats.username],
+                set_={"total_number_of_bets": UserBetStats.total_number_of_bets + 1},
+            )
+            .returning(UserBetStats.username)
+            .cte("counted")
+        )
+        statement = select(
+            select(question.c.id).scalar_subquery().label("question_id"),
+            select(placed.c.id).scalar_subquery().label("bet_id"),
+            select(debited.c.tokens).scalar_subquery().label("balance"),
+        ).add_cte(counted)
+
+        open_id, bet_id, balance = (await self.db.exec(statement)).one()
 
-        # Save everything
-        self.db.add(bet)
-        self.db.commit()
-        self.db.refresh(user)
+        if open_id is None:
+            await self.db.rollback()
+            if await self.db.get(QuestionFR, question_id) is None:
+                raise HTTPException(404, "Question not found")
+            raise HTTPException(400, "Betting on this question has closed")
 
+        if bet_id is None:
+            await self.db.rollback()
+            raise HTTPException(400, "User already has a bet on this question")
+
+        if balance is None:
+            # The bet row was inserted but nothing was debited, so undo it
+            await self.db.rollback()
+            tokens = (
+                await self.db.exec(select(User.tokens).where(User.username == username))
+            ).first()
+            if tokens is None:
+                raise HTTPException(404, "User not found")
+            raise HTTPException(
+                400,
+                f"Insufficient tokens. You have {tokens}, need {bet_amount}",
+            )
+
+        await self.db.commit()
+        await read_cache.invalidate(user_key(username))
+        leaderboards.set_balance(username, balance)
+        bet.id = bet_id
         return bet
 
-    def get_user_bets(self, identifier: str | int) -> List[Bet]:
-        """Get all bets for a user"""
+    async def get_user_bets(
+        self, identifier: str | int, after: Optional[int] = None, limit: int = DEFAULT_PAGE_SIZE
+    ):
+        """Get a page of a user's bets in id order and the next cursor, or one bet by id"""
         if type(identifier) == str:
-            return self.db.exec(select(Bet).where(Bet.username == identifier)).all()
+            statement = keyset(select(Bet).where(Bet.username == identifier), Bet.id, after, limit)
+            return split_page((await self.db.exec(statement)).all(), limit, lambda bet: bet.id)
         elif type(identifier) == int:
-            return self.db.exec(select(Bet).where(Bet.id == identifier)).first()
+            return (await self.db.exec(select(Bet).where(Bet.id == identifier))).first()
         else:
             raise HTTPException(400, "Invalid identifier")
 
-    def get_bets_by_question_id(self, question_id: int) -> List[Bet]:
-        """Get all bets for a specific question"""
-        return self.db.exec(select(Bet).where(Bet.question_id == question_id)).all()
-
-    def get_bet_summary(self, username: str) -> dict:
-        """Get the summary of a bet for a specific question"""
-        total_wins = 0
-        total_losses = 0
-        bets = self.db.exec(select(Bet).where(Bet.username == username)).all()
-        for b in bets:
-            question = self.db.exec(
-                select(QuestionFR).where(QuestionFR.id == b.question_id)
-            ).first()
-            if question.answer == b.user_answer:
-                total_wins += b.bet_amount * 2
-            else:
-                total_losses += b.bet_amount
+    async def get_bets_by_question_id(
+        self, question_id: int, after: Optional[int] = None, limit: int = DEFAULT_PAGE_SIZE
+    ) -> Tuple[List[Bet], Optional[int]]:
+        """Get a page of the bets on a question in id order, and the next cursor"""
+        statement = keyset(select(Bet).where(Bet.question_id == question_id), Bet.id, after, limit)
+        return split_page((await self.db.exec(statement)).all(), limit, lambda bet: bet.id)
+
+    async def get_bet_summary(self, username: str) -> dict:
+        """Get the summary of a user's settled bets"""
+        stats = await self.db.get(UserBetStats, username)
+        total_wins = stats.total_wins if stats else 0
+        total_losses = stats.total_losses if stats else 0
 
         return {
             "total_wins": total_wins,
             "total_losses": total_losses,
-            "total_number_of_bets": len(bets),
+            "total_number_of_bets": stats.total_number_of_bets if stats else 0,
             "total_amount_bet": total_wins + total_losses,
             "total_profit": total_wins - total_losses,
             "total_profit_percentage": (
-                (
-                    (total_wins - total_losses) / (total_wins + total_losses)
-                    if total_wins + total_losses != 0
-                    else 1
-                )
-                * 100
+                (total_wins - total_losses) / (total_wins + total_losses) * 100
                 if (total_wins + total_losses) != 0
                 else 0
             ),
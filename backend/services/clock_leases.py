@@ -0,0 +1,218 @@
+import asyncio
+import os
+from collections import defaultdict
+from datetime import timedelta
+from typing import Dict, FrozenSet, Optional, Set
+
+from sqlalchemy import and_, case, delete, exists, extract, func, or_, update
+from sqlmodel import select
+
+from ..db import async_session
+from ..models.game_clock import GameClockLease, RoomTimer
+from ..models.questionFR import QuestionFR
+from ..models.room import Room
+from .events import WORKER_ID
+from .scheduler import GameScheduler
+
+
+class ClockLeases:
+    """Runs each game clock on exactly one worker, through leases in game_clock.
+
+    Every heartbeat renews the leases this worker holds and takes over clocks
+    whose lease ran out, or that nobody started yet, with FOR UPDATE SKIP
+    LOCKED so workers never take the same clock. A taken over clock resumes
+    from started_at, its rooms come from room_timer, and its questions that
+    haven't settled are scheduled again.
+
+    A lease is only trusted locally until lease_seconds after the heartbeat
+    that renewed it was sent, and the scheduler's clocks hand out nothing
+    while it isn't, so a worker that stops heartbeating (stalled loop, lost
+    database) goes quiet before its lease can pass to another worker.
+    """
+
+    def __init__(
+        self,
+        scheduler: GameScheduler,
+        lease_seconds: float = 15.0,
+        heartbeat_seconds: float = 5.0,
+        acquire_batch: int = 10,
+        worker_id: str = WORKER_ID,
+    ):
+        self.scheduler = scheduler
+        self.lease_seconds = lease_seconds
+        self.heartbeat_seconds = heartbeat_seconds
+        self.acquire_batch = acquire_batch
+        self.worker_id = worker_id
+        # game_id -> loop time the lease is trusted until
+        self.owned: Dict[int, float] = {}
+        # game_id -> rooms of clocks that ran out, until recorded
+        self._finished: Dict[int, FrozenSet[int]] = {}
+        self._lock = asyncio.Lock()
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        scheduler.owns = self.holds
+        scheduler.on_finished = self._clock_finished
+
+    def clock_seconds(self):
+        """SQL for a game clock's current reading, from its game_clock row's started_at"""
+        options = self.scheduler.clock_options
+        elapsed = extract("epoch", func.now() - GameClockLease.started_at)
+        return options.get("start_seconds", 720.0) - elapsed * options.get("speed", 1.0)
+
+    def holds(self, game_id: int) -> bool:
+        expires = self.owned.get(game_id)
+        return expires is not None and expires > asyncio.get_running_loop().time()
+
+    def _clock_finished(self, game_id: int, room_ids: FrozenSet[int]):
+        if game_id in self.owned:
+            self._finished[game_id] = room_ids
+            self.poke()
+
+    def poke(self):
+        """Heartbeat now rather than at the next interval"""
+        self._wake.set()
+
+    def ensure_started(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            try:
+                await self.heartbeat()
+            except Exception as e:
+                print(f"Clock lease heartbeat failed: {e!r}")
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.heartbeat_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+    async def heartbeat(self):
+        """Record finished clocks, renew and take leases, then sync the clocks run here"""
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+            sent_at = loop.time()
+            lease = timedelta(seconds=self.lease_seconds)
+            async with async_session() as db:
+                finished, self._finished = self._finished, {}
+                for game_id, room_ids in finished.items():
+                    await db.exec(
+                        update(GameClockLease)
+                        .where(GameClockLease.game_id == game_id, GameClockLease.owner == self.worker_id)
+                        .values(owner=None, lease_expires_at=None, finished_at=func.now())
+                    )
+                    if room_ids:
+                        await db.exec(delete(RoomTimer).where(RoomTimer.room_id.in_(room_ids)))
+                    self.owned.pop(game_id, None)
+
+                renewed = (await db.exec(
+                    update(GameClockLease)
+                    .where(GameClockLease.owner == self.worker_id, GameClockLease.finished_at.is_(None))
+                    .values(lease_expires_at=func.now() + lease)
+                    .returning(GameClockLease.game_id)
+                )).scalars().all()
+
+                # Clocks to take over: lease ran out or never started, or ran out
+                # of game but has rooms that subscribed since
+                candidates = (
+                    select(GameClockLease.game_id)
+                    .where(
+                        or_(
+                            and_(
+                                GameClockLease.finished_at.is_(None),
+                                or_(
+                                    GameClockLease.owner.is_(None),
+                                    GameClockLease.lease_expires_at < func.now(),
+                                ),
+                            ),
+                            and_(
+                                GameClockLease.finished_at.is_not(None),
+                                exists().where(RoomTimer.game_id == GameClockLease.game_id),
+                            ),
+                        )
+                    )
+                    .limit(self.acquire_batch)
+                    .with_for_update(skip_locked=True)
+                )
+                acquired = (await db.exec(
+                    update(GameClockLease)
+                    .where(GameClockLease.game_id.in_(candidates.scalar_subquery()))
+                    .values(
+                        owner=self.worker_id,
+                        lease_expires_at=func.now() + lease,
+                        started_at=case(
+                            (GameClockLease.finished_at.is_not(None), func.now()),
+                            else_=GameClockLease.started_at,
+                        ),
+                        finished_at=None,
+                    )
+                    .returning(
+                        GameClockLease.game_id,
+                        extract("epoch", func.now() - GameClockLease.started_at),
+                    )
+                )).all()
+                elapsed = {game_id: float(seconds) for game_id, seconds in acquired}
+
+                held = set(renewed) | set(elapsed)
+                rooms: Dict[int, Set[int]] = defaultdict(set)
+                due = []
+                if held:
+                    rows = (await db.exec(
+                        select(RoomTimer.game_id, RoomTimer.room_id).where(RoomTimer.game_id.in_(held))
+                    )).all()
+                    for game_id, room_id in rows:
+                        rooms[game_id].add(room_id)
+                if elapsed:
+                    due = (await db.exec(
+                        select(Room.game_id, QuestionFR.closes_at, QuestionFR.id)
+                        .join(Room, Room.id == QuestionFR.room_id)
+                        .where(
+                            Room.game_id.in_(list(elapsed)),
+                            QuestionFR.closes_at.is_not(None),
+                            ~QuestionFR.settled,
+                        )
+                    )).all()
+                await db.commit()
+
+            for game_id in set(self.owned) - held:
+                print(f"Lost the lease on game {game_id}'s clock")
+                del self.owned[game_id]
+                self.scheduler.drop(game_id)
+            for game_id in held:
+                self.owned[game_id] = sent_at + self.lease_seconds
+                if game_id in elapsed:
+                    # Taken over or restarted, so whatever ran here before is stale
+                    self.scheduler.drop(game_id)
+                self.scheduler.adopt(game_id, rooms[game_id], elapsed.get(game_id, 0.0))
+            open_questions = defaultdict(list)
+            for game_id, closes_at, question_id in due:
+                open_questions[(game_id, closes_at)].append(question_id)
+            for (game_id, closes_at), ids in open_questions.items():
+                self.scheduler.schedule_due(game_id, closes_at, ids)
+
+    async def stop(self):
+        """Stop heartbeating and hand this worker's clocks back for others to take"""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        async with self._lock:
+            for game_id in list(self.owned):
+                self.scheduler.drop(game_id)
+            if self.owned:
+                async with async_session() as db:
+                    await db.exec(
+                        update(GameClockLease)
+                        .where(GameClockLease.owner == self.worker_id)
+                        .values(owner=None, lease_expires_at=None)
+                    )
+                    await db.commit()
+            self.owned = {}
+
+
+def clock_leases_from_env(scheduler: GameScheduler) -> ClockLeases:
+    return ClockLeases(
+        scheduler,
+        lease_seconds=float(os.getenv("CLOCK_LEASE_SECONDS", "15")),
+        heartbeat_seconds=float(os.getenv("CLOCK_HEARTBEAT_SECONDS", "5")),
+    )
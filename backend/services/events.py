@@ -0,0 +1,132 @@
+import asyncio
+import json
+import os
+import socket
+import uuid
+from typing import Callable, Dict, List, Optional
+
+# Names this process in leases, job claims and events
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class EventBus:
+    """Applies in-memory state changes in every API worker.
+
+    emit() runs an event's handler in this process right away. With a Redis
+    (or protocol compatible) url, the event is also published on channel,
+    which every worker subscribes to, and the others run their handler for
+    it. Events from one worker reach the others in the order emitted.
+
+    Without a url it only runs the handlers here, for a single worker.
+    Callbacks added with every() run each heartbeat_seconds, for state that
+    is resent rather than sent as changes.
+    """
+
+    def __init__(
+        self,
+        url: Optional[str],
+        channel: str = "raptor:events",
+        heartbeat_seconds: float = 2.0,
+        worker_id: str = WORKER_ID,
+    ):
+        self.url = url
+        self.channel = channel
+        self.heartbeat_seconds = heartbeat_seconds
+        self.worker_id = worker_id
+        self._handlers: Dict[str, Callable] = {}
+        self._heartbeats: List[Callable[[], None]] = []
+        self._outbox: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._client = None
+
+    def on(self, kind: str, handler: Callable):
+        self._handlers[kind] = handler
+
+    def every(self, callback: Callable[[], None]):
+        self._heartbeats.append(callback)
+
+    def emit(self, kind: str, **data):
+        self._handlers[kind](**data)
+        if self._outbox is not None:
+            self._outbox.put_nowait(json.dumps({"kind": kind, "worker": self.worker_id, "data": data}))
+
+    def receive(self, message: str):
+        """Run the handler of an event published by another worker"""
+        event = json.loads(message)
+        if event["worker"] == self.worker_id:
+            return
+        handler = self._handlers.get(event["kind"])
+        if handler is not None:
+            handler(**event["data"])
+
+    @property
+    def client(self):
+        # Created lazily so a single worker doesn't need redis installed
+        if self._client is None:
+            from redis.asyncio import Redis
+
+            self._client = Redis.from_url(self.url, decode_responses=True)
+        return self._client
+
+    def ensure_started(self):
+        if self.url is None or any(not task.done() for task in self._tasks):
+            return
+        self._outbox = asyncio.Queue()
+        self._tasks = [
+            asyncio.create_task(self._send()),
+            asyncio.create_task(self._listen()),
+            asyncio.create_task(self._beat()),
+        ]
+
+    async def _send(self):
+        while True:
+            message = await self._outbox.get()
+            try:
+                await self.client.publish(self.channel, message)
+            except Exception as e:
+                print(f"Event publish failed: {e!r}")
+
+    async def _listen(self):
+        while True:
+            try:
+                async with self.client.pubsub() as pubsub:
+                    await pubsub.subscribe(self.channel)
+                    async for message in pubsub.listen():
+                        if message["type"] != "message":
+                            continue
+                        try:
+                            self.receive(message["data"])
+                        except Exception as e:
+                            print(f"Event handler failed: {e!r}")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Event subscription lost, resubscribing: {e!r}")
+                await asyncio.sleep(self.heartbeat_seconds)
+
+    async def _beat(self):
+        while True:
+            for callback in self._heartbeats:
+                callback()
+            await asyncio.sleep(self.heartbeat_seconds)
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks, self._outbox = [], None
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+def event_bus_from_env() -> EventBus:
+    """Shares READ_CACHE_URL with the read cache when READ_CACHE_BACKEND=redis"""
+    shared = os.getenv("READ_CACHE_BACKEND", "memory").lower() == "redis"
+    return EventBus(
+        os.getenv("READ_CACHE_URL", "redis://localhost:6379/0") if shared else None,
+        heartbeat_seconds=float(os.getenv("EVENT_HEARTBEAT_SECONDS", "2")),
+    )
+
+
+event_bus = event_bus_from_env()
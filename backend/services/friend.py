@@ -1,31 +1,35 @@
 from ..db import db_session
-from sqlmodel import Session, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from fastapi import Depends, HTTPException
 from ..models.usertofriend import UserToFriend
 from ..models.user import User
 from ..services.user import UserService
+from .friend_graph import friend_graph
 
 
 class FriendService:
     """Service for user operations"""
 
-    def __init__(self, db: Session = Depends(db_session)):
+    def __init__(self, db: AsyncSession = Depends(db_session)):
         self.db = db
 
-    def get_friends(self, username: str):
-        # First, get the friend usernames
-        friend_stmt = select(UserToFriend.friend_username).where(
-            UserToFriend.username == username
+    async def get_friends(self, username: str):
+        # From the database, which every worker sees; the graph is only for the
+        # mutual, in-room and online lookups
+        stmt = (
+            select(User)
+            .join(UserToFriend, UserToFriend.friend_username == User.username)
+            .where(UserToFriend.username == username)
         )
-        friend_usernames = self.db.exec(friend_stmt).all()
+        return (await self.db.exec(stmt)).all()
 
-        # Then get the actual User objects
-        if friend_usernames:
-            user_stmt = select(User).where(User.username.in_(friend_usernames))
-            return self.db.exec(user_stmt).all()
-
-        return []
-
-    def add_friend(self, username: str, friend_username: str):
-        self.db.add(UserToFriend(username=username, friend_username=friend_username))
-        self.db.commit()
+    async def add_friend(self, username: str, friend_username: str):
+        await self.db.exec(
+            pg_insert(UserToFriend)
+            .values(username=username, friend_username=friend_username)
+            .on_conflict_do_nothing(index_elements=[UserToFriend.username, UserToFriend.friend_username])
+        )
+        await self.db.commit()
+        friend_graph.add(username, friend_username)
@@ -0,0 +1,55 @@
+from collections import defaultdict
+from typing import Dict, List, Set
+
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from ..models.usertofriend import UserToFriend
+from .events import EventBus, event_bus
+from .hub import RoomHub, room_hub
+from .leaderboard import Leaderboards, leaderboards
+
+
+class FriendGraph:
+    """Adjacency sets of the user_to_friend rows, loaded in bulk on startup.
+
+    Writers add edges once they commit, through the event bus so every
+    worker's graph gets them. The mutual, in-room and online queries are
+    then set lookups, joined with the rooms users are in (from the
+    leaderboards) and with who has a feed open (from the room hub). The
+    friend list itself is read from the database.
+    """
+
+    def __init__(self, bus: EventBus, hub: RoomHub, boards: Leaderboards):
+        self.bus = bus
+        self.hub = hub
+        self.boards = boards
+        self._friends: Dict[str, Set[str]] = defaultdict(set)
+        bus.on("friend", self._add)
+
+    async def rebuild(self, db: AsyncSession):
+        rows = (await db.exec(select(UserToFriend.username, UserToFriend.friend_username))).all()
+        self._friends = defaultdict(set)
+        for username, friend_username in rows:
+            self._friends[username].add(friend_username)
+
+    def add(self, username: str, friend_username: str):
+        self.bus.emit("friend", username=username, friend_username=friend_username)
+
+    def _add(self, username: str, friend_username: str):
+        self._friends[username].add(friend_username)
+
+    def friends(self, username: str) -> Set[str]:
+        return self._friends.get(username, set())
+
+    def mutual(self, username: str, other: str) -> List[str]:
+        return sorted(self.friends(username) & self.friends(other))
+
+    def in_room(self, username: str, room_id: int) -> List[str]:
+        return sorted(f for f in self.friends(username) if self.boards.room_of(f) == room_id)
+
+    def online(self, username: str) -> List[str]:
+        return sorted(self.hub.online(self.friends(username)))
+
+
+friend_graph = FriendGraph(event_bus, room_hub, leaderboards)
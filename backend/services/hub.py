@@ -0,0 +1,93 @@
+import asyncio
+import time
+from collections import defaultdict
+from typing import Dict, Iterable, List, Set, Tuple
+
+from .events import EventBus, event_bus
+
+
+class RoomHub:
+    """Pub/sub hub that fans room events out to connected clients.
+
+    Events go through the event bus, so clients connected to any worker get
+    them. Each worker resends who is connected to it every bus heartbeat,
+    and forgets another worker's list once it misses three.
+    """
+
+    def __init__(self, bus: EventBus, max_queue_size: int = 100):
+        self.bus = bus
+        self.max_queue_size = max_queue_size
+        self._subscribers: Dict[int, Set[asyncio.Queue]] = defaultdict(set)
+        # username -> open connections, for clients that say who they are
+        self._online: Dict[str, int] = {}
+        # worker id -> (monotonic expiry, usernames connected there)
+        self._remote_online: Dict[str, Tuple[float, Set[str]]] = {}
+        bus.on("room", self._deliver)
+        bus.on("presence", self._presence)
+        bus.every(self._announce)
+
+    def subscribe(self, room_id: int) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._subscribers[room_id].add(queue)
+        return queue
+
+    def unsubscribe(self, room_id: int, queue: asyncio.Queue):
+        subscribers = self._subscribers.get(room_id)
+        if subscribers is None:
+            return
+        subscribers.discard(queue)
+        if not subscribers:
+            del self._subscribers[room_id]
+
+    def publish(self, room_id: int, message: dict) -> int:
+        """Deliver message to every subscriber of the room, returns the number reached here"""
+        self.bus.emit("room", room_id=room_id, message=message)
+        return self.subscriber_count(room_id)
+
+    def _deliver(self, room_id: int, message: dict):
+        subscribers = self._subscribers.get(room_id, ())
+        for queue in subscribers:
+            if queue.full():
+                # Slow consumer: drop its oldest event rather than block the publisher
+                queue.get_nowait()
+            queue.put_nowait(message)
+
+    def connect(self, username: str):
+        self._online[username] = self._online.get(username, 0) + 1
+
+    def disconnect(self, username: str):
+        count = self._online.get(username, 0) - 1
+        if count > 0:
+            self._online[username] = count
+        else:
+            self._online.pop(username, None)
+
+    def _announce(self):
+        self.bus.emit("presence", worker=self.bus.worker_id, usernames=list(self._online))
+
+    def _presence(self, worker: str, usernames: List[str]):
+        if worker != self.bus.worker_id:
+            expires = time.monotonic() + 3 * self.bus.heartbeat_seconds
+            self._remote_online[worker] = (expires, set(usernames))
+
+    def online(self, usernames: Iterable[str]) -> List[str]:
+        """Those of usernames with a connection open to any worker"""
+        now = time.monotonic()
+        for worker, (expires, _) in list(self._remote_online.items()):
+            if expires < now:
+                del self._remote_online[worker]
+        remote = [connected for _, connected in self._remote_online.values()]
+        return [
+            username
+            for username in usernames
+            if username in self._online or any(username in connected for connected in remote)
+        ]
+
+    def subscriber_count(self, room_id: int) -> int:
+        return len(self._subscribers.get(room_id, ()))
+
+    def total_subscribers(self) -> int:
+        return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+
+room_hub = RoomHub(event_bus)
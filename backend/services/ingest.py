@@ -0,0 +1,166 @@
+import hashlib
+import json
+from datetime import datetime
+from typing import Dict, List, Optional, Type
+
+from sqlalchemy import delete, or_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlmodel import SQLModel, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from ..models.play import Play
+from ..models.PlayStatsData import PlayStatsData
+
+# asyncpg caps a statement at 32767 bind parameters
+MAX_PARAMS = 32767
+
+
+def play_hash(play: dict) -> str:
+    return hashlib.sha1(
+        json.dumps(play, sort_keys=True, separators=(",", ":"), default=str).encode()
+    ).hexdigest()
+
+
+def snapshot_game_id(snapshot: dict) -> int:
+    """GameID of an NBA snapshot, ScoreID of an NFL one"""
+    game = snapshot.get("Game") or snapshot.get("Score") or {}
+    game_id = game.get("GameID", game.get("ScoreID"))
+    if game_id is None:
+        raise ValueError("Snapshot has no Game.GameID or Score.ScoreID")
+    return int(game_id)
+
+
+def to_row(model: Type[SQLModel], record: dict, exclude=(), **extra) -> Optional[dict]:
+    """Map an upstream record's aliased keys onto model columns, None if incomplete.
+
+    Every row of a model gets the same keys, as multi-row inserts need.
+    """
+    row = {}
+    for name, field in model.model_fields.items():
+        if name in exclude:
+            continue
+        if name in extra:
+            row[name] = extra[name]
+        elif record.get(field.alias) is not None:
+            value = record[field.alias]
+            if isinstance(value, str) and field.annotation in (datetime, Optional[datetime]):
+                value = datetime.fromisoformat(value)
+            row[name] = value
+        elif field.is_required():
+            return None
+        else:
+            row[name] = field.default
+    return row
+
+
+def _chunks(rows: List[dict]):
+    size = max(1, MAX_PARAMS // max(len(rows[0]), 1))
+    for i in range(0, len(rows), size):
+        yield rows[i : i + size]
+
+
+class PlayIngestor:
+    """Writes play-by-play snapshots into play and play_stats_data.
+
+    Each snapshot is diffed against the hashes of the plays already stored
+    for its game (loaded once per game), so only new or changed plays and
+    their stats are written, as multi-row upserts. The upserts also skip
+    rows whose content is unchanged, so re-ingesting any snapshot is a no-op
+    even for a fresh ingestor.
+    """
+
+    def __init__(self):
+        # game_id -> {play_id: payload hash} of what is stored
+        self._known: Dict[int, Dict[int, str]] = {}
+
+    async def _load_known(self, db: AsyncSession, game_id: int) -> Dict[int, str]:
+        known = self._known.get(game_id)
+        if known is None:
+            rows = (
+                await db.exec(select(Play.play_id, Play.payload_hash).where(Play.game_id == game_id))
+            ).all()
+            known = self._known[game_id] = dict(rows)
+        return known
+
+    async def ingest(self, db: AsyncSession, snapshot: dict, game_id: Optional[int] = None) -> dict:
+        """Write a snapshot's new and changed plays, commits. Returns counts."""
+        game_id = snapshot_game_id(snapshot) if game_id is None else game_id
+        known = await self._load_known(db, game_id)
+
+        # A play listed twice keeps its last version
+        latest = {play["PlayID"]: play for play in snapshot.get("Plays") or []}
+        play_rows, stat_rows, hashes, new = [], [], {}, 0
+        for play in latest.values():
+            play_id = play["PlayID"]
+            digest = play_hash(play)
+            if known.get(play_id) == digest:
+                continue
+            # Stats get their own rows, keep the stored payload to the play itself
+            payload = {key: value for key, value in play.items() if key != "PlayStats"}
+            row = to_row(Play, play, exclude=("id",), game_id=game_id, payload_hash=digest, payload=payload)
+            if row is None:
+                print(f"Skipping incomplete play {play_id} of game {game_id}")
+                continue
+            play_rows.append(row)
+            hashes[play_id] = digest
+            new += play_id not in known
+            for stat in play.get("PlayStats") or []:
+                stat_row = to_row(PlayStatsData, {"PlayID": play_id, **stat}, game_id=game_id)
+                if stat_row is None or stat_row["play_stat_id"] is None:
+                    print(f"Skipping incomplete play stat in play {play_id} of game {game_id}")
+                    continue
+                stat_rows.append(stat_row)
+
+        if play_rows:
+            await self._upsert_plays(db, play_rows)
+            await self._replace_stats(db, game_id, list(hashes), stat_rows)
+            await db.commit()
+            known.update(hashes)
+
+        return {
+            "game_id": game_id,
+            "plays": len(latest),
+            "new": new,
+            "changed": len(play_rows) - new,
+            "stats": len(stat_rows),
+        }
+
+    async def _upsert_plays(self, db: AsyncSession, rows: List[dict]):
+        for chunk in _chunks(rows):
+            statement = pg_insert(Play).values(chunk)
+            columns = [c for c in chunk[0] if c not in ("id", "game_id", "play_id")]
+            await db.exec(
+                statement.on_conflict_do_update(
+                    index_elements=[Play.game_id, Play.play_id],
+                    set_={c: statement.excluded[c] for c in columns},
+                    where=Play.payload_hash != statement.excluded.payload_hash,
+                )
+            )
+
+    async def _replace_stats(self, db: AsyncSession, game_id: int, play_ids: List[int], rows: List[dict]):
+        # Drop stats that a revised play no longer carries
+        stale = delete(PlayStatsData).where(
+            PlayStatsData.game_id == game_id, PlayStatsData.play_id.in_(play_ids)
+        )
+        if rows:
+            stale = stale.where(PlayStatsData.play_stat_id.not_in([row["play_stat_id"] for row in rows]))
+        await db.exec(stale)
+        if not rows:
+            return
+        for chunk in _chunks(rows):
+            statement = pg_insert(PlayStatsData).values(chunk)
+            columns = [c for c in chunk[0] if c != "play_stat_id"]
+            await db.exec(
+                statement.on_conflict_do_update(
+                    index_elements=[PlayStatsData.play_stat_id],
+                    set_={c: statement.excluded[c] for c in columns},
+                    # NULL-safe, and picks up rows stored before they had a game_id
+                    where=or_(
+                        PlayStatsData.updated.is_distinct_from(statement.excluded.updated),
+                        PlayStatsData.game_id.is_distinct_from(statement.excluded.game_id),
+                    ),
+                )
+            )
+
+
+play_ingestor = PlayIngestor()
@@ -0,0 +1,197 @@
+import random
+from typing import Dict, List, Optional, Tuple
+
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from ..models.user import User
+from .events import EventBus, event_bus
+
+# Leaderboard order: most tokens first, ties by username
+Key = Tuple[int, str]
+
+
+class _Node:
+    __slots__ = ("key", "priority", "left", "right", "size")
+
+    def __init__(self, key: Key):
+        self.key = key
+        self.priority = random.random()
+        self.left: Optional["_Node"] = None
+        self.right: Optional["_Node"] = None
+        self.size = 1
+
+
+def _size(node: Optional[_Node]) -> int:
+    return node.size if node is not None else 0
+
+
+def _update(node: _Node) -> _Node:
+    node.size = 1 + _size(node.left) + _size(node.right)
+    return node
+
+
+def _split(node: Optional[_Node], key: Key) -> Tuple[Optional[_Node], Optional[_Node]]:
+    """(keys < key, keys >= key)"""
+    if node is None:
+        return None, None
+    if node.key < key:
+        node.right, right = _split(node.right, key)
+        return _update(node), right
+    left, node.left = _split(node.left, key)
+    return left, _update(node)
+
+
+def _merge(left: Optional[_Node], right: Optional[_Node]) -> Optional[_Node]:
+    if left is None:
+        return right
+    if right is None:
+        return left
+    if left.priority > right.priority:
+        left.right = _merge(left.right, right)
+        return _update(left)
+    right.left = _merge(left, right.left)
+    return _update(right)
+
+
+def _remove(node: Optional[_Node], key: Key) -> Optional[_Node]:
+    if node is None:
+        return None
+    if node.key == key:
+        return _merge(node.left, node.right)
+    if key < node.key:
+        node.left = _remove(node.left, key)
+    else:
+        node.right = _remove(node.right, key)
+    return _update(node)
+
+
+class OrderStatisticTree:
+    """Sorted set of distinct keys with O(log n) insert, remove and rank.
+
+    A treap whose nodes carry their subtree size, so the position of a key
+    and the key at a position are found in one walk down the tree.
+    """
+
+    def __init__(self):
+        self._root: Optional[_Node] = None
+
+    def __len__(self) -> int:
+        return _size(self._root)
+
+    def insert(self, key: Key):
+        left, right = _split(self._root, key)
+        self._root = _merge(_merge(left, _Node(key)), right)
+
+    def remove(self, key: Key):
+        self._root = _remove(self._root, key)
+
+    def rank(self, key: Key) -> int:
+        """Number of keys before key"""
+        node, rank = self._root, 0
+        while node is not None:
+            if key <= node.key:
+                node = node.left
+            else:
+                rank += _size(node.left) + 1
+                node = node.right
+        return rank
+
+    def first(self, n: int) -> List[Key]:
+        """The n smallest keys, in order"""
+        keys, stack, node = [], [], self._root
+        while (stack or node is not None) and len(keys) < n:
+            while node is not None:
+                stack.append(node)
+                node = node.left
+            node = stack.pop()
+            keys.append(node.key)
+            node = node.right
+        return keys
+
+
+class Leaderboards:
+    """Per-room standings by token balance, kept in memory and updated in place.
+
+    Rebuilt from the users table on startup, then every balance or room change
+    that commits is applied here, so reads never touch the database. Changes
+    go through the event bus, so every worker's standings follow them.
+    """
+
+    def __init__(self, bus: EventBus):
+        self.bus = bus
+        self._rooms: Dict[int, OrderStatisticTree] = {}
+        # username -> (room_id, tokens) of every user in a room
+        self._members: Dict[str, Tuple[int, int]] = {}
+        bus.on("leaderboard", self._update)
+        bus.on("balance", self._set_balance)
+
+    async def rebuild(self, db: AsyncSession):
+        rows = (
+            await db.exec(select(User.username, User.room_id, User.tokens).where(User.room_id.is_not(None)))
+        ).all()
+        self._rooms, self._members = {}, {}
+        for username, room_id, tokens in rows:
+            self._update(username, room_id, tokens)
+
+    def _discard(self, username: str):
+        member = self._members.pop(username, None)
+        if member is None:
+            return
+        room_id, tokens = member
+        room = self._rooms[room_id]
+        room.remove((-tokens, username))
+        if not len(room):
+            del self._rooms[room_id]
+
+    def update(self, username: str, room_id: Optional[int], tokens: int):
+        """Place the user in room_id with tokens, or in no room when room_id is None"""
+        self.bus.emit("leaderboard", username=username, room_id=room_id, tokens=tokens)
+
+    def _update(self, username: str, room_id: Optional[int], tokens: int):
+        if self._members.get(username) == (room_id, tokens):
+            return
+        self._discard(username)
+        if room_id is None:
+            return
+        self._members[username] = (room_id, tokens)
+        self._rooms.setdefault(room_id, OrderStatisticTree()).insert((-tokens, username))
+
+    def set_balance(self, username: str, tokens: int):
+        """New balance of a user, a no-op unless they are in a room"""
+        self.bus.emit("balance", username=username, tokens=tokens)
+
+    def _set_balance(self, username: str, tokens: int):
+        member = self._members.get(username)
+        if member is not None:
+            self._update(username, member[0], tokens)
+
+    def room_of(self, username: str) -> Optional[int]:
+        member = self._members.get(username)
+        return member[0] if member is not None else None
+
+    def top(self, room_id: int, n: int) -> List[dict]:
+        room = self._rooms.get(room_id)
+        if room is None:
+            return []
+        return [
+            {"rank": i + 1, "username": username, "tokens": -tokens}
+            for i, (tokens, username) in enumerate(room.first(n))
+        ]
+
+    def rank(self, room_id: int, username: str) -> Optional[dict]:
+        """Standing of a user in the room, None if they aren't in it"""
+        member = self._members.get(username)
+        if member is None or member[0] != room_id:
+            return None
+        room = self._rooms[room_id]
+        tokens = member[1]
+        return {
+            "rank": room.rank((-tokens, username)) + 1,
+            "username": username,
+            "tokens": tokens,
+            "players": len(room),
+        }
+
+
+leaderboards = Leaderboards(event_bus)
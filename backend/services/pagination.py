@@ -0,0 +1,35 @@
+import os
+from typing import Any, Callable, List, Optional, Tuple
+
+from fastapi import Response
+
+DEFAULT_PAGE_SIZE = int(os.getenv("DEFAULT_PAGE_SIZE", "100"))
+MAX_PAGE_SIZE = int(os.getenv("MAX_PAGE_SIZE", "500"))
+
+# Bodies stay plain lists; the cursor of the next page rides in a header
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def keyset(statement, column, after, limit: int):
+    """Rows after the cursor in column order, plus one to tell if there is a next page.
+
+    column must be unique and indexed (alone or after the equality filters),
+    so each page is an index range scan however deep it is.
+    """
+    if after is not None:
+        statement = statement.where(column > after)
+    return statement.order_by(column).limit(limit + 1)
+
+
+def split_page(rows: List, limit: int, key: Callable[[Any], Any]) -> Tuple[List, Optional[Any]]:
+    """(page, cursor of the next page or None) from a keyset() result"""
+    rows = list(rows)
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, key(rows[-1])
+    return rows, None
+
+
+def set_next_cursor(response: Response, cursor):
+    if cursor is not None:
+        response.headers[NEXT_CURSOR_HEADER] = str(cursor)
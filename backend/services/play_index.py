@@ -0,0 +1,76 @@
+from array import array
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+def timestamp_to_seconds(timestamp) -> float:
+    """Convert timestamp string or number to seconds for comparison."""
+    if isinstance(timestamp, (int, float)):
+        return float(timestamp)
+    timestamp = str(timestamp)
+    if ':' in timestamp:
+        parts = timestamp.split(':')
+        return int(parts[0]) * 60 + float(parts[1])
+    return float(timestamp)
+
+
+def get_next_plays(play_by_play: List[Dict], start_timestamp, n: int = 5) -> List[Dict]:
+    """Return next n plays after start_timestamp (game clock counts down)."""
+    start_seconds = timestamp_to_seconds(start_timestamp)
+    start_index = None
+    for i, play in enumerate(play_by_play):
+        play_seconds = timestamp_to_seconds(play["timestamp"])
+        if play_seconds <= start_seconds:  # because time decreases
+            start_index = i
+            break
+    if start_index is None:
+        return []
+    return play_by_play[start_index + 1 : start_index + 1 + n]
+
+
+class PlayIndex:
+    """Clock index over one game's plays, built once and searched by bisect.
+
+    Clock seconds are parsed up front into a flat array. The clock counts down
+    and restarts every quarter, so each quarter's run of plays is stored
+    negated (ascending) and located through its start offset.
+    """
+
+    def __init__(self, plays: Optional[List[Dict]], timestamps: Optional[Iterable] = None):
+        self.plays = plays
+        if timestamps is None:
+            timestamps = (p["timestamp"] for p in plays)
+        self._neg_seconds = array("d", (-timestamp_to_seconds(t) for t in timestamps))
+        # Quarter boundaries: a new quarter starts wherever the clock goes back up
+        self._offsets = array("l", [0])
+        for i in range(1, len(self._neg_seconds)):
+            if self._neg_seconds[i] < self._neg_seconds[i - 1]:
+                self._offsets.append(i)
+        self._offsets.append(len(self._neg_seconds))
+
+    @classmethod
+    def from_timestamps(cls, timestamps: Iterable) -> "PlayIndex":
+        """Index over clock values alone, for plays stored elsewhere"""
+        return cls(None, timestamps)
+
+    @property
+    def quarters(self) -> int:
+        return len(self._offsets) - 1
+
+    def window(self, start_timestamp, n: int = 5, quarter: int = 1) -> Tuple[int, int]:
+        """Return the (start, stop) offsets of the next n plays after start_timestamp."""
+        if not 1 <= quarter <= self.quarters:
+            return 0, 0
+        lo, hi = self._offsets[quarter - 1], self._offsets[quarter]
+        # First play in the quarter at or below the clock, like get_next_plays
+        i = bisect_left(
+            self._neg_seconds, -timestamp_to_seconds(start_timestamp), lo, hi
+        )
+        if i == hi:
+            return 0, 0
+        start = i + 1
+        return start, min(start + n, len(self._neg_seconds))
+
+    def next_plays(self, start_timestamp, n: int = 5, quarter: int = 1) -> List[Dict]:
+        start, stop = self.window(start_timestamp, n, quarter)
+        return self.plays[start:stop]
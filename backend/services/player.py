@@ -1,43 +1,58 @@
 from ..db import db_session
-from sqlmodel import Session, select
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from fastapi import Depends, HTTPException
 from ..models.Player import Player
+from .read_cache import players_key, read_cache
 
 class PlayerService:
-    def __init__(self, db: Session = Depends(db_session)):
+    def __init__(self, db: AsyncSession = Depends(db_session)):
         self.db = db
 
-    def get_players(self, game_id: int):
-        return self.db.exec(select(Player).where(Player.game_id == game_id)).all()
+    async def get_players(self, game_id: int):
+        async def load():
+            return (await self.db.exec(select(Player).where(Player.game_id == game_id))).all()
+
+        return await read_cache.get_or_load(players_key(game_id), Player, load, self.db)
     
-    def get_players_by_team(self, game_id: int, team: str):
-        return self.db.exec(select(Player).where(Player.game_id == game_id, Player.team == team)).all()
+    async def get_players_by_team(self, game_id: int, team: str):
+        async def load():
+            return (await self.db.exec(select(Player).where(Player.game_id == game_id, Player.team == team))).all()
+
+        return await read_cache.get_or_load(players_key(game_id, team), Player, load, self.db)
+
+    async def _invalidate(self, game_id: int, *teams: str):
+        await read_cache.invalidate(players_key(game_id), *(players_key(game_id, team) for team in teams))
     
-    def get_player_by_name(self, game_id: int, team: str, player_name: str):
-        return self.db.exec(select(Player).where(Player.game_id == game_id, Player.team == team, Player.name == player_name)).first()
+    async def get_player_by_name(self, game_id: int, team: str, player_name: str):
+        return (await self.db.exec(select(Player).where(Player.game_id == game_id, Player.team == team, Player.name == player_name))).first()
 
-    def get_player_by_id(self, player_id: int):
-        return self.db.exec(select(Player).where(Player.id == player_id)).first()
+    async def get_player_by_id(self, player_id: int):
+        return (await self.db.exec(select(Player).where(Player.id == player_id))).first()
     
-    def create_player(self, player: Player):
+    async def create_player(self, player: Player):
         self.db.add(player)
-        self.db.commit()
+        await self.db.commit()
+        await self._invalidate(player.game_id, player.team)
         return player
     
-    def update_player(self, player_id: int, player: Player):
-        db_player = self.db.exec(select(Player).where(Player.id == player_id)).first()
+    async def update_player(self, player_id: int, player: Player):
+        db_player = (await self.db.exec(select(Player).where(Player.id == player_id))).first()
         if not db_player:
             raise HTTPException(404, "Player not found")
+        old_team = db_player.team
         db_player.name = player.name
         db_player.team = player.team
-        self.db.commit()
-        self.db.refresh(db_player)
+        await self.db.commit()
+        await self.db.refresh(db_player)
+        await self._invalidate(db_player.game_id, old_team, db_player.team)
         return db_player
     
-    def delete_player(self, player_id: int):
-        db_player = self.db.exec(select(Player).where(Player.id == player_id)).first()
+    async def delete_player(self, player_id: int):
+        db_player = (await self.db.exec(select(Player).where(Player.id == player_id))).first()
         if not db_player:
             raise HTTPException(404, "Player not found")
-        self.db.delete(db_player)
-        self.db.commit()
+        await self.db.delete(db_player)
+        await self.db.commit()
+        await self._invalidate(db_player.game_id, db_player.team)
         return True
\ No newline at end of file
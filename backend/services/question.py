@@ -1,6 +1,7 @@
 from sys import int_info
 from ..db import db_session
-from sqlmodel import Session, select
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from fastapi import Depends, HTTPException
 from ..models.Player import Player
 from ..models.question import Question
@@ -10,46 +11,54 @@ from ..models.QuestionResolution import QuestionType
 from ..models.PlayerMetricType import PlayerMetricType
 from ..models.QuestionResolution import QuestionResolution
 from ..models.game import Game
+from ..models.GameData import GameData
+from .bet import settle_bets, settle_many_bets
+from .leaderboard import leaderboards
+from .read_cache import read_cache, user_key
+from .stat_aggregator import player_totals, resolve_frame
 from datetime import datetime
+from typing import List
+from sqlalchemy import Float, Integer, String, column, update, values
+import polars as pl
 
 
 class QuestionService:
     """Service for user operations"""
 
-    def __init__(self, db: Session = Depends(db_session)):
+    def __init__(self, db: AsyncSession = Depends(db_session)):
         self.db = db
 
-    def create_question(self, q: Question):
+    async def create_question(self, q: Question):
         # Validate referenced entities
-        game = self.db.exec(select(Game).where(Game.id == q.game_id)).first()
+        game = (await self.db.exec(select(Game).where(Game.id == q.game_id))).first()
         if not game:
             raise HTTPException(404, "Game not found")
-        player = self.db.exec(select(Player).where(Player.id == q.player_id)).first()
+        player = (await self.db.exec(select(Player).where(Player.id == q.player_id))).first()
         if not player:
             raise HTTPException(404, "Player not found")
         # Persist
         self.db.add(q)
-        self.db.commit()
-        self.db.refresh(q)
+        await self.db.commit()
+        await self.db.refresh(q)
         return q
 
-    def get_question(self, question_id: int):
-        return self.db.exec(select(Question).where(Question.id == question_id)).first()
+    async def get_question(self, question_id: int):
+        return (await self.db.exec(select(Question).where(Question.id == question_id))).first()
 
-    def get_questions(self, game_id: int):
-        return self.db.exec(select(Question).where(Question.game_id == game_id)).all()
+    async def get_questions(self, game_id: int):
+        return (await self.db.exec(select(Question).where(Question.game_id == game_id))).all()
 
-    def get_questions_by_game_room(self, game_id: int, room_id: int):
-        return self.db.exec(
+    async def get_questions_by_game_room(self, game_id: int, room_id: int):
+        return (await self.db.exec(
             select(Question).where(
                 Question.game_id == game_id, Question.room_id == room_id
             )
-        ).all()
+        )).all()
 
-    def update_question(self, question_id: int, question: Question):
-        existing_question = self.db.exec(
+    async def update_question(self, question_id: int, question: Question):
+        existing_question = (await self.db.exec(
             select(Question).where(Question.id == question_id)
-        ).first()
+        )).first()
         if existing_question is None:
             raise HTTPException(404, "Question not found")
         existing_question.question = question.question
@@ -57,12 +66,12 @@ class QuestionService:
         existing_question.answer = question.answer
         existing_question.betting_deadline = question.betting_deadline
         self.db.add(existing_question)
-        self.db.commit()
+        await self.db.commit()
         return existing_question
 
-    def solve_question(self, question_id: int, actual_value: float) -> Question:
+    async def solve_question(self, question_id: int, actual_value: float) -> Question:
         """Solve a question with the actual result and all associated bets - USER THIS API"""
-        question = self.get_question(question_id)
+        question = await self.get_question(question_id)
         if not question:
             raise HTTPException(404, "Question not found")
 
@@ -90,58 +99,95 @@ class QuestionService:
         question.updated_at = datetime.now()
 
         # Now resolve all bets on this question
-        self._resolve_all_bets_for_question(question_id, answer)
+        await self._resolve_all_bets_for_question(question_id, answer)
 
         self.db.add(question)
-        self.db.commit()
-        self.db.refresh(question)
+        await self.db.commit()
+        await self.db.refresh(question)
         return question
 
-    def _resolve_all_bets_for_question(
+    async def _resolve_all_bets_for_question(
         self, question_id: int, correct_answer: QuestionResolution
     ):
         """Resolve all bets for a specific question and update user tokens"""
-        # Get all bets for this question that haven't been resolved yet
-        bets = self.db.exec(
-            select(Bet).where(Bet.question_id == question_id, Bet.is_correct.is_(None))
-        ).all()
-
-        if not bets:
-            return  # No bets to resolve
-
         # Get the question to access multiplier
-        question = self.get_question(question_id)
+        question = await self.get_question(question_id)
         if not question:
             raise HTTPException(404, "Question not found")
 
-        # Process each bet
-        for bet in bets:
-            # Determine if the bet was correct
-            bet.correct_answer = correct_answer
-            bet.is_correct = bet.user_answer == correct_answer
-
-            # Calculate outcome
-            if bet.is_correct:
-                # Winner gets their bet back + winnings
-                payout = int(bet.bet_amount * question.multiplier)
-                bet.outcome = payout
-            else:
-                bet.outcome = -(bet.bet_amount)
-                # Update user balance
-            user = self.db.exec(
-                select(User).where(User.username == bet.username)
-            ).first()
-            if user:
-                # tokens stored as str; normalize to int for arithmetic
-                try:
-                    current = int(user.tokens)
-                except Exception:
-                    current = 0
-                user.tokens = str(current + int(bet.outcome or 0))
-                self.db.add(user)
-                self.db.add(bet)
-            else:
-                raise HTTPException(404, "User not found")
+        balances = await settle_bets(
+            self.db, question_id, correct_answer.value, question.multiplier or 1.0, Bet.player_question_id
+        )
 
         # Commit all changes at once
-        self.db.commit()
+        await self.db.commit()
+        await read_cache.invalidate(*(user_key(username) for username in balances))
+        for username, tokens in balances.items():
+            leaderboards.set_balance(username, tokens)
+
+    async def resolve_due_questions(self, game_key: str, final: bool = False) -> List[Question]:
+        """Resolve every decided question of a game from its ingested play stats.
+
+        Actual values come from the game's running stat totals, and the
+        questions and all their bets are settled together in one transaction.
+        Until the game is final (or closed) only questions that can no longer
+        change are resolved.
+        """
+        game = await self.db.get(GameData, game_key)
+        if game is None:
+            raise HTTPException(404, "Game not found")
+        final = final or bool(game.is_closed)
+
+        open_questions = (await self.db.exec(
+            select(
+                Question.id, Question.question_type, Question.metric_type,
+                Question.metric_value, Question.multiplier, Player.name, Player.team,
+            )
+            .join(Player, Player.id == Question.player_id)
+            .where(Question.game_id == game_key, Question.is_resolved == False)
+        )).all()
+        if not open_questions:
+            return []
+
+        questions = pl.DataFrame(
+            [
+                (id, question_type.value, metric_type.value, metric_value, multiplier or 1.0, name, team)
+                for id, question_type, metric_type, metric_value, multiplier, name, team in open_questions
+            ],
+            schema={
+                "id": pl.Int64, "question_type": pl.Utf8, "metric_type": pl.Utf8,
+                "metric_value": pl.Float64, "multiplier": pl.Float64, "name": pl.Utf8, "team": pl.Utf8,
+            },
+            orient="row",
+        )
+        totals = await player_totals(self.db, game.score_id)
+        decided = resolve_frame(questions, totals, final)
+        if decided.is_empty():
+            return []
+
+        answers = values(
+            column("id", Integer), column("answer", String), column("actual_value", Float),
+            name="answers",
+        ).data(decided.select("id", "answer", "actual_value").rows())
+        resolved = (await self.db.exec(
+            update(Question)
+            .where(Question.id == answers.c.id, Question.is_resolved == False)
+            .values(
+                answer=answers.c.answer,
+                actual_value=answers.c.actual_value,
+                is_resolved=True,
+                updated_at=datetime.now(),
+            )
+            .returning(Question)
+        )).scalars().all()
+        # A concurrent resolve may have taken some, their bets are settled there
+        settle = decided.filter(pl.col("id").is_in([question.id for question in resolved]))
+        balances = await settle_many_bets(
+            self.db, settle.select("id", "answer", "multiplier").rows(), Bet.player_question_id
+        )
+        await self.db.commit()
+        await read_cache.invalidate(*(user_key(username) for username in balances))
+        for username, tokens in balances.items():
+            leaderboards.set_balance(username, tokens)
+        return resolved
+
@@ -1,873 +1,222 @@
-from ..models.user import User
-from ..db import db_session
-from sqlmodel import Session, select
+from ..db import db_session, async_session
+from sqlalchemy import update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from fastapi import Depends, HTTPException
+from ..models.bet import Bet
+from ..models.game_clock import GameClockLease, RoomTimer
 from ..models.questionFR import QuestionFR
-from time import sleep
-from asyncio import sleep
+from ..models.room import Room
+from .bet import settle_many_bets
+from .clock_leases import clock_leases_from_env
+from .hub import room_hub
+from .leaderboard import leaderboards
+from .question_jobs import enqueue_question_job, release_done_jobs, take_done_jobs
+from .read_cache import latest_question_key, questions_key, read_cache, user_key
+from .play_index import timestamp_to_seconds
+from .replay_store import replay_store
+from .scheduler import GameScheduler
+from collections import defaultdict
 import asyncio
+import os
+from typing import List, FrozenSet, Optional
+
+
+async def enqueue_question(game_id: int, clock_seconds: float, room_ids: FrozenSet[int]):
+    """Queue the question for this game tick, for a question worker to generate."""
+    replay = replay_store.get(game_id)
+    if replay is None:
+        print(f"No replay for game {game_id}, skipping question")
+        return
+    start, stop = replay.index.window(clock_seconds, n=20)
+    if stop <= start:
+        return
+    # Bets settle once the game clock passes the last play the question is about,
+    # and a question that isn't out by then is moot
+    closes_at = replay.clock_at(stop - 1)
+    clock = game_scheduler.clocks.get(game_id)
+    speed = clock.speed if clock is not None else 1.0
+    async with async_session() as db:
+        # Every room on this game shares one generation per tick
+        await enqueue_question_job(
+            db, game_id, clock_seconds, closes_at, room_ids, replay.plays(start, stop),
+            deadline_seconds=(clock_seconds - closes_at) / speed,
+        )
+        await db.commit()
+
+
+async def deliver_questions(game_ids: List[int]):
+    """Push generated questions to their rooms and settle them when their window closes.
+
+    Takes the jobs of the game clocks this worker holds (game_ids), which
+    settle on the clock, and those of games whose clock has finished, which
+    have no clock left to wait on and settle once pushed.
+    """
+    async with async_session() as db:
+        jobs = await take_done_jobs(db, game_ids)
+        await db.commit()
+    # The clock can stop between the poll and here; its next holder, or any
+    # worker once it has finished, takes the job again
+    dropped = [
+        job.id
+        for job in jobs
+        if job.game_id in game_ids and not game_scheduler.schedule_due(job.game_id, job.closes_at, job.question_ids)
+    ]
+    if dropped:
+        async with async_session() as db:
+            await release_done_jobs(db, dropped)
+            await db.commit()
+        jobs = [job for job in jobs if job.id not in dropped]
+
+    question_ids = [question_id for job in jobs for question_id in job.question_ids]
+    if not question_ids:
+        return
+    async with async_session() as db:
+        questions = (await db.exec(
+            select(QuestionFR).where(QuestionFR.id.in_(question_ids)).order_by(QuestionFR.id)
+        )).all()
+    await read_cache.invalidate(*{questions_key(question.room_id) for question in questions})
+    # In id order, so each room's latest is the last one set
+    for question in questions:
+        await read_cache.set_value(
+            latest_question_key(question.room_id), str(question.id), LATEST_QUESTION_TTL
+        )
+    for question in questions:
+        room_hub.publish(question.room_id, {"type": "question", "data": question.model_dump()})
+    for job in jobs:
+        if job.game_id not in game_ids:
+            await settle_questions(job.game_id, job.closes_at, job.question_ids)
+
+
+class QuestionDelivery:
+    """Polls for generated questions of the game clocks this worker holds, and of finished clocks"""
+
+    def __init__(self, poll_seconds: float = 1.0):
+        self.poll_seconds = poll_seconds
+        self._task: Optional[asyncio.Task] = None
+
+    def ensure_started(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            game_ids = [game_id for game_id in clock_leases.owned if clock_leases.holds(game_id)]
+            try:
+                await deliver_questions(game_ids)
+            except Exception as e:
+                print(f"Question delivery failed: {e!r}")
+            await asyncio.sleep(self.poll_seconds)
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+
+async def settle_questions(game_id: int, clock_seconds: float, question_ids: List[int]):
+    """Settle every bet on questions whose play window closed and push the results to their rooms.
+
+    Questions closing at the same game clock, from every room, settle in one
+    transaction. Marking them settled in it means a question is only settled
+    once, even by two workers racing over a clock's lease.
+    """
+    async with async_session() as db:
+        questions = (await db.exec(
+            update(QuestionFR)
+            .where(QuestionFR.id.in_(question_ids), ~QuestionFR.settled)
+            .values(settled=True)
+            .returning(QuestionFR)
+        )).scalars().all()
+        question_ids = [question.id for question in questions]
+        balances = await settle_many_bets(db, [(q.id, str(q.answer), 1.0) for q in questions])
+        results = (await db.exec(
+            select(Bet.question_id, Bet.username, Bet.user_answer, Bet.outcome)
+            .where(Bet.question_id.in_(question_ids))
+        )).all()
+        await db.commit()
+    await read_cache.invalidate(*(user_key(username) for username in balances))
+    for username, tokens in balances.items():
+        leaderboards.set_balance(username, tokens)
+
+    by_question = defaultdict(list)
+    for question_id, username, user_answer, outcome in results:
+        by_question[question_id].append(
+            {"username": username, "user_answer": user_answer, "outcome": outcome, "tokens": balances.get(username)}
+        )
+    for question in questions:
+        room_hub.publish(
+            question.room_id,
+            {
+                "type": "settlement",
+                "data": {
+                    "question_id": question.id,
+                    "answer": question.answer,
+                    "bets": by_question[question.id],
+                },
+            },
+        )
 
-import json
-import asyncio
-import openai
 
-time_for_ques = 10
+# Room versions outlive any game, they only need to beat the cached lists
+LATEST_QUESTION_TTL = 24 * 60 * 60
 
-# Your play-by-play JSON
-play_by_play = [
-  {
-    "timestamp": "12:00",
-    "play": "Kristaps Porzingis vs. Anthony Davis (LeBron James gains possession)",
-    "lakersPoints": 0,
-    "celticsPoints": 0,
-    "mainPlayer": "Kristaps Porzingis"
-  },
-  {
-    "timestamp": "11:45",
-    "play": "Austin Reaves misses 25-foot three point jumper",
-    "lakersPoints": 0,
-    "celticsPoints": 0,
-    "mainPlayer": "Austin Reaves"
-  },
-  {
-    "timestamp": "11:42",
-    "play": "Jayson Tatum defensive rebound",
-    "lakersPoints": 0,
-    "celticsPoints": 0,
-    "mainPlayer": "Jayson Tatum"
-  },
-  {
-    "timestamp": "11:34",
-    "play": "Jrue Holiday misses 22-foot three point jumper",
-    "lakersPoints": 0,
-    "celticsPoints": 0,
-    "mainPlayer": "Jrue Holiday"
-  },
-  {
-    "timestamp": "11:30",
-    "play": "Rui Hachimura defensive rebound",
-    "lakersPoints": 0,
-    "celticsPoints": 0,
-    "mainPlayer": "Rui Hachimura"
-  },
-  {
-    "timestamp": "11:17",
-    "play": "Max Christie makes 22-foot three point jumper (LeBron James assists)",
-    "lakersPoints": 3,
-    "celticsPoints": 0,
-    "mainPlayer": "Max Christie"
-  },
-  {
-    "timestamp": "11:02",
-    "play": "Kristaps Porzingis makes 25-foot three point jumper (Jayson Tatum assists)",
-    "lakersPoints": 3,
-    "celticsPoints": 3,
-    "mainPlayer": "Kristaps Porzingis"
-  },
-  {
-    "timestamp": "10:48",
-    "play": "LeBron James misses 6-foot two point shot",
-    "lakersPoints": 3,
-    "celticsPoints": 3,
-    "mainPlayer": "LeBron James"
-  },
-  {
-    "timestamp": "10:46",
-    "play": "LeBron James offensive rebound",
-    "lakersPoints": 3,
-    "celticsPoints": 3,
-    "mainPlayer": "LeBron James"
-  },
-  {
-    "timestamp": "10:46",
-    "play": "LeBron James misses two point shot",
-    "lakersPoints": 3,
-    "celticsPoints": 3,
-    "mainPlayer": "LeBron James"
-  },
-  {
-    "timestamp": "10:45",
-    "play": "LeBron James offensive rebound",
-    "lakersPoints": 3,
-    "celticsPoints": 3,
-    "mainPlayer": "LeBron James"
-  },
-  {
-    "timestamp": "10:42",
-    "play": "LeBron James makes two point shot",
-    "lakersPoints": 5,
-    "celticsPoints": 3,
-    "mainPlayer": "LeBron James"
-  },
-  {
-    "timestamp": "10:36",
-    "play": "Jaylen Brown misses 27-foot three point step back jumpshot",
-    "lakersPoints": 5,
-    "celticsPoints": 3,
-    "mainPlayer": "Jaylen Brown"
-  },
-  {
-    "timestamp": "10:33",
-    "play": "Max Christie defensive rebound",
-    "lakersPoints": 5,
-    "celticsPoints": 3,
-    "mainPlayer": "Max Christie"
-  },
-  {
-    "timestamp": "10:16",
-    "play": "Rui Hachimura misses driving layup",
-    "lakersPoints": 5,
-    "celticsPoints": 3,
-    "mainPlayer": "Rui Hachimura"
-  },
-  {
-    "timestamp": "10:15",
-    "play": "Rui Hachimura offensive rebound",
-    "lakersPoints": 5,
-    "celticsPoints": 3,
-    "mainPlayer": "Rui Hachimura"
-  },
-  {
-    "timestamp": "10:15",
-    "play": "Rui Hachimura misses tip shot",
-    "lakersPoints": 5,
-    "celticsPoints": 3,
-    "mainPlayer": "Rui Hachimura"
-  },
-  {
-    "timestamp": "10:15",
-    "play": "Celtics defensive team rebound",
-    "lakersPoints": 5,
-    "celticsPoints": 3,
-    "mainPlayer": "Celtics"
-  },
-  {
-    "timestamp": "9:56",
-    "play": "Jrue Holiday misses 6-foot two point shot",
-    "lakersPoints": 5,
-    "celticsPoints": 3,
-    "mainPlayer": "Jrue Holiday"
-  },
-  {
-    "timestamp": "9:54",
-    "play": "Anthony Davis defensive rebound",
-    "lakersPoints": 5,
-    "celticsPoints": 3,
-    "mainPlayer": "Anthony Davis"
-  },
-  {
-    "timestamp": "9:47",
-    "play": "Max Christie misses 22-foot three point jumper",
-    "lakersPoints": 5,
-    "celticsPoints": 3,
-    "mainPlayer": "Max Christie"
-  },
-  {
-    "timestamp": "9:44",
-    "play": "Kristaps Porzingis defensive rebound",
-    "lakersPoints": 5,
-    "celticsPoints": 3,
-    "mainPlayer": "Kristaps Porzingis"
-  },
-  {
-    "timestamp": "9:32",
-    "play": "Jayson Tatum misses 15-foot step back jumpshot",
-    "lakersPoints": 5,
-    "celticsPoints": 3,
-    "mainPlayer": "Jayson Tatum"
-  },
-  {
-    "timestamp": "9:29",
-    "play": "Austin Reaves defensive rebound",
-    "lakersPoints": 5,
-    "celticsPoints": 3,
-    "mainPlayer": "Austin Reaves"
-  },
-  {
-    "timestamp": "9:24",
-    "play": "Anthony Davis makes 2-foot alley oop dunk shot (Austin Reaves assists)",
-    "lakersPoints": 7,
-    "celticsPoints": 3,
-    "mainPlayer": "Anthony Davis"
-  },
-  {
-    "timestamp": "9:04",
-    "play": "Jaylen Brown makes 30-foot three point jumper (Jayson Tatum assists)",
-    "lakersPoints": 7,
-    "celticsPoints": 6,
-    "mainPlayer": "Jaylen Brown"
-  },
-  {
-    "timestamp": "8:53",
-    "play": "Austin Reaves makes 25-foot three pointer",
-    "lakersPoints": 10,
-    "celticsPoints": 6,
-    "mainPlayer": "Austin Reaves"
-  },
-  {
-    "timestamp": "8:45",
-    "play": "Jaylen Brown makes 28-foot three pointer",
-    "lakersPoints": 10,
-    "celticsPoints": 9,
-    "mainPlayer": "Jaylen Brown"
-  },
-  {
-    "timestamp": "8:29",
-    "play": "Anthony Davis makes 10-foot jumper",
-    "lakersPoints": 12,
-    "celticsPoints": 9,
-    "mainPlayer": "Anthony Davis"
-  },
-  {
-    "timestamp": "8:20",
-    "play": "Anthony Davis blocks Jaylen Brown 's 3-foot driving dunk",
-    "lakersPoints": 12,
-    "celticsPoints": 9,
-    "mainPlayer": "Anthony Davis"
-  },
-  {
-    "timestamp": "8:18",
-    "play": "Derrick White offensive rebound",
-    "lakersPoints": 12,
-    "celticsPoints": 9,
-    "mainPlayer": "Derrick White"
-  },
-  {
-    "timestamp": "8:18",
-    "play": "Derrick White misses two point shot",
-    "lakersPoints": 12,
-    "celticsPoints": 9,
-    "mainPlayer": "Derrick White"
-  },
-  {
-    "timestamp": "8:16",
-    "play": "Anthony Davis defensive rebound",
-    "lakersPoints": 12,
-    "celticsPoints": 9,
-    "mainPlayer": "Anthony Davis"
-  },
-  {
-    "timestamp": "8:08",
-    "play": "Max Christie makes 23-foot three point shot (Austin Reaves assists)",
-    "lakersPoints": 15,
-    "celticsPoints": 9,
-    "mainPlayer": "Max Christie"
-  },
-  {
-    "timestamp": "7:49",
-    "play": "Kristaps Porzingis makes 7-foot two point shot (Derrick White assists)",
-    "lakersPoints": 15,
-    "celticsPoints": 11,
-    "mainPlayer": "Kristaps Porzingis"
-  },
-  {
-    "timestamp": "7:26",
-    "play": "LeBron James misses 20-foot jumper",
-    "lakersPoints": 15,
-    "celticsPoints": 11,
-    "mainPlayer": "LeBron James"
-  },
-  {
-    "timestamp": "7:24",
-    "play": "Jayson Tatum defensive rebound",
-    "lakersPoints": 15,
-    "celticsPoints": 11,
-    "mainPlayer": "Jayson Tatum"
-  },
-  {
-    "timestamp": "7:10",
-    "play": "Jrue Holiday bad pass (Rui Hachimura steals)",
-    "lakersPoints": 15,
-    "celticsPoints": 11,
-    "mainPlayer": "Jrue Holiday"
-  },
-  {
-    "timestamp": "7:05",
-    "play": "LeBron James bad pass (Jaylen Brown steals)",
-    "lakersPoints": 15,
-    "celticsPoints": 11,
-    "mainPlayer": "LeBron James"
-  },
-  {
-    "timestamp": "7:00",
-    "play": "Kristaps Porzingis misses two point shot",
-    "lakersPoints": 15,
-    "celticsPoints": 11,
-    "mainPlayer": "Kristaps Porzingis"
-  },
-  {
-    "timestamp": "6:58",
-    "play": "Anthony Davis defensive rebound",
-    "lakersPoints": 15,
-    "celticsPoints": 11,
-    "mainPlayer": "Anthony Davis"
-  },
-  {
-    "timestamp": "6:51",
-    "play": "Max Christie lost ball turnover (Jrue Holiday steals)",
-    "lakersPoints": 15,
-    "celticsPoints": 11,
-    "mainPlayer": "Max Christie"
-  },
-  {
-    "timestamp": "6:46",
-    "play": "Kristaps Porzingis makes dunk (Jaylen Brown assists)",
-    "lakersPoints": 15,
-    "celticsPoints": 13,
-    "mainPlayer": "Kristaps Porzingis"
-  },
-  {
-    "timestamp": "6:28",
-    "play": "LeBron James out of bounds bad pass turnover",
-    "lakersPoints": 15,
-    "celticsPoints": 13,
-    "mainPlayer": "LeBron James"
-  },
-  {
-    "timestamp": "6:28",
-    "play": "Lakers Full timeout",
-    "lakersPoints": 15,
-    "celticsPoints": 13,
-    "mainPlayer": "Lakers"
-  },
-  {
-    "timestamp": "6:28",
-    "play": "Gabe Vincent enters the game for LeBron James",
-    "lakersPoints": 15,
-    "celticsPoints": 13,
-    "mainPlayer": "Gabe Vincent"
-  },
-  {
-    "timestamp": "6:28",
-    "play": "Al Horford enters the game for Jayson Tatum",
-    "lakersPoints": 15,
-    "celticsPoints": 13,
-    "mainPlayer": "Al Horford"
-  },
-  {
-    "timestamp": "6:13",
-    "play": "Derrick White makes 28-foot three point jumper (Kristaps Porzingis assists)",
-    "lakersPoints": 15,
-    "celticsPoints": 16,
-    "mainPlayer": "Derrick White"
-  },
-  {
-    "timestamp": "5:54",
-    "play": "Jrue Holiday shooting foul",
-    "lakersPoints": 15,
-    "celticsPoints": 16,
-    "mainPlayer": "Jrue Holiday"
-  },
-  {
-    "timestamp": "5:54",
-    "play": "Austin Reaves makes free throw 1 of 2",
-    "lakersPoints": 16,
-    "celticsPoints": 16,
-    "mainPlayer": "Austin Reaves"
-  },
-  {
-    "timestamp": "5:54",
-    "play": "Austin Reaves makes free throw 2 of 2",
-    "lakersPoints": 17,
-    "celticsPoints": 16,
-    "mainPlayer": "Austin Reaves"
-  },
-  {
-    "timestamp": "5:40",
-    "play": "Kristaps Porzingis makes 9-foot hook shot (Derrick White assists)",
-    "lakersPoints": 17,
-    "celticsPoints": 18,
-    "mainPlayer": "Kristaps Porzingis"
-  },
-  {
-    "timestamp": "5:27",
-    "play": "Anthony Davis makes driving floating jump shot (Austin Reaves assists)",
-    "lakersPoints": 19,
-    "celticsPoints": 18,
-    "mainPlayer": "Anthony Davis"
-  },
-  {
-    "timestamp": "5:15",
-    "play": "Al Horford misses 24-foot three point jumper",
-    "lakersPoints": 19,
-    "celticsPoints": 18,
-    "mainPlayer": "Al Horford"
-  },
-  {
-    "timestamp": "5:11",
-    "play": "Rui Hachimura defensive rebound",
-    "lakersPoints": 19,
-    "celticsPoints": 18,
-    "mainPlayer": "Rui Hachimura"
-  },
-  {
-    "timestamp": "5:10",
-    "play": "Anthony Davis makes two point shot (Rui Hachimura assists)",
-    "lakersPoints": 21,
-    "celticsPoints": 18,
-    "mainPlayer": "Anthony Davis"
-  },
-  {
-    "timestamp": "5:10",
-    "play": "Al Horford shooting foul",
-    "lakersPoints": 21,
-    "celticsPoints": 18,
-    "mainPlayer": "Al Horford"
-  },
-  {
-    "timestamp": "5:10",
-    "play": "Anthony Davis makes free throw 1 of 1",
-    "lakersPoints": 22,
-    "celticsPoints": 18,
-    "mainPlayer": "Anthony Davis"
-  },
-  {
-    "timestamp": "4:52",
-    "play": "Kristaps Porzingis makes 20-foot jumper (Al Horford assists)",
-    "lakersPoints": 22,
-    "celticsPoints": 20,
-    "mainPlayer": "Kristaps Porzingis"
-  },
-  {
-    "timestamp": "4:42",
-    "play": "Max Christie misses 25-foot three point jumper",
-    "lakersPoints": 22,
-    "celticsPoints": 20,
-    "mainPlayer": "Max Christie"
-  },
-  {
-    "timestamp": "4:39",
-    "play": "Jaylen Brown defensive rebound",
-    "lakersPoints": 22,
-    "celticsPoints": 20,
-    "mainPlayer": "Jaylen Brown"
-  },
-  {
-    "timestamp": "4:21",
-    "play": "Kristaps Porzingis misses 12-foot jumper",
-    "lakersPoints": 22,
-    "celticsPoints": 20,
-    "mainPlayer": "Kristaps Porzingis"
-  },
-  {
-    "timestamp": "4:19",
-    "play": "Max Christie defensive rebound",
-    "lakersPoints": 22,
-    "celticsPoints": 20,
-    "mainPlayer": "Max Christie"
-  },
-  {
-    "timestamp": "4:03",
-    "play": "Austin Reaves makes 28-foot three point jumper (Gabe Vincent assists)",
-    "lakersPoints": 25,
-    "celticsPoints": 20,
-    "mainPlayer": "Austin Reaves"
-  },
-  {
-    "timestamp": "3:38",
-    "play": "Jaylen Brown makes two point shot (Jrue Holiday assists)",
-    "lakersPoints": 25,
-    "celticsPoints": 22,
-    "mainPlayer": "Jaylen Brown"
-  },
-  {
-    "timestamp": "3:29",
-    "play": "Anthony Davis misses 26-foot three point jumper",
-    "lakersPoints": 25,
-    "celticsPoints": 22,
-    "mainPlayer": "Anthony Davis"
-  },
-  {
-    "timestamp": "3:26",
-    "play": "Kristaps Porzingis defensive rebound",
-    "lakersPoints": 25,
-    "celticsPoints": 22,
-    "mainPlayer": "Kristaps Porzingis"
-  },
-  {
-    "timestamp": "3:11",
-    "play": "Anthony Davis blocks Kristaps Porzingis 's 2-foot driving layup",
-    "lakersPoints": 25,
-    "celticsPoints": 22,
-    "mainPlayer": "Anthony Davis"
-  },
-  {
-    "timestamp": "3:11",
-    "play": "Lakers defensive team rebound",
-    "lakersPoints": 25,
-    "celticsPoints": 22,
-    "mainPlayer": "Lakers"
-  },
-  {
-    "timestamp": "3:11",
-    "play": "Dorian Finney-Smith enters the game for Austin Reaves",
-    "lakersPoints": 25,
-    "celticsPoints": 22,
-    "mainPlayer": "Dorian Finney-Smith"
-  },
-  {
-    "timestamp": "3:11",
-    "play": "Jaxson Hayes enters the game for Rui Hachimura",
-    "lakersPoints": 25,
-    "celticsPoints": 22,
-    "mainPlayer": "Jaxson Hayes"
-  },
-  {
-    "timestamp": "3:11",
-    "play": "Sam Hauser enters the game for Jrue Holiday",
-    "lakersPoints": 25,
-    "celticsPoints": 22,
-    "mainPlayer": "Sam Hauser"
-  },
-  {
-    "timestamp": "3:11",
-    "play": "Lakers Full timeout",
-    "lakersPoints": 25,
-    "celticsPoints": 22,
-    "mainPlayer": "Lakers"
-  },
-  {
-    "timestamp": "3:11",
-    "play": "(03:11) [Lakers] COACH'S CHALLENGE (CALL OVERTURNED) [Lakers] retain their timeout",
-    "lakersPoints": 25,
-    "celticsPoints": 22,
-    "mainPlayer": "Lakers"
-  },
-  {
-    "timestamp": "3:11",
-    "play": "Jayson Tatum enters the game for Jaylen Brown",
-    "lakersPoints": 25,
-    "celticsPoints": 22,
-    "mainPlayer": "Jayson Tatum"
-  },
-  {
-    "timestamp": "3:11",
-    "play": "Payton Pritchard enters the game for Derrick White",
-    "lakersPoints": 25,
-    "celticsPoints": 22,
-    "mainPlayer": "Payton Pritchard"
-  },
-  {
-    "timestamp": "2:58",
-    "play": "Gabe Vincent makes 25-foot three point jumper (Anthony Davis assists)",
-    "lakersPoints": 28,
-    "celticsPoints": 22,
-    "mainPlayer": "Gabe Vincent"
-  },
-  {
-    "timestamp": "2:41",
-    "play": "Jayson Tatum bad pass (Dorian Finney-Smith steals)",
-    "lakersPoints": 28,
-    "celticsPoints": 22,
-    "mainPlayer": "Jayson Tatum"
-  },
-  {
-    "timestamp": "2:38",
-    "play": "LeBron James enters the game for Max Christie",
-    "lakersPoints": 28,
-    "celticsPoints": 22,
-    "mainPlayer": "LeBron James"
-  },
-  {
-    "timestamp": "2:38",
-    "play": "Luke Kornet enters the game for Kristaps Porzingis",
-    "lakersPoints": 28,
-    "celticsPoints": 22,
-    "mainPlayer": "Luke Kornet"
-  },
-  {
-    "timestamp": "2:30",
-    "play": "Anthony Davis misses 4-foot hook shot",
-    "lakersPoints": 28,
-    "celticsPoints": 22,
-    "mainPlayer": "Anthony Davis"
-  },
-  {
-    "timestamp": "2:27",
-    "play": "Al Horford defensive rebound",
-    "lakersPoints": 28,
-    "celticsPoints": 22,
-    "mainPlayer": "Al Horford"
-  },
-  {
-    "timestamp": "2:21",
-    "play": "Sam Hauser misses 25-foot three point shot",
-    "lakersPoints": 28,
-    "celticsPoints": 22,
-    "mainPlayer": "Sam Hauser"
-  },
-  {
-    "timestamp": "2:19",
-    "play": "Anthony Davis defensive rebound",
-    "lakersPoints": 28,
-    "celticsPoints": 22,
-    "mainPlayer": "Anthony Davis"
-  },
-  {
-    "timestamp": "2:14",
-    "play": "LeBron James makes two point shot",
-    "lakersPoints": 30,
-    "celticsPoints": 22,
-    "mainPlayer": "LeBron James"
-  },
-  {
-    "timestamp": "1:54",
-    "play": "Jayson Tatum misses 26-foot three point pullup jump shot",
-    "lakersPoints": 30,
-    "celticsPoints": 22,
-    "mainPlayer": "Jayson Tatum"
-  },
-  {
-    "timestamp": "1:51",
-    "play": "LeBron James defensive rebound",
-    "lakersPoints": 30,
-    "celticsPoints": 22,
-    "mainPlayer": "LeBron James"
-  },
-  {
-    "timestamp": "1:40",
-    "play": "LeBron James makes 6-foot two point shot",
-    "lakersPoints": 32,
-    "celticsPoints": 22,
-    "mainPlayer": "LeBron James"
-  },
-  {
-    "timestamp": "1:26",
-    "play": "Payton Pritchard misses 27-foot three point step back jumpshot",
-    "lakersPoints": 32,
-    "celticsPoints": 22,
-    "mainPlayer": "Payton Pritchard"
-  },
-  {
-    "timestamp": "1:22",
-    "play": "LeBron James defensive rebound",
-    "lakersPoints": 32,
-    "celticsPoints": 22,
-    "mainPlayer": "LeBron James"
-  },
-  {
-    "timestamp": "1:16",
-    "play": "LeBron James misses 20-foot pullup jump shot",
-    "lakersPoints": 32,
-    "celticsPoints": 22,
-    "mainPlayer": "LeBron James"
-  },
-  {
-    "timestamp": "1:13",
-    "play": "Sam Hauser defensive rebound",
-    "lakersPoints": 32,
-    "celticsPoints": 22,
-    "mainPlayer": "Sam Hauser"
-  },
-  {
-    "timestamp": "1:09",
-    "play": "Dorian Finney-Smith shooting foul",
-    "lakersPoints": 32,
-    "celticsPoints": 22,
-    "mainPlayer": "Dorian Finney-Smith"
-  },
-  {
-    "timestamp": "1:09",
-    "play": "Jayson Tatum makes free throw 1 of 2",
-    "lakersPoints": 32,
-    "celticsPoints": 23,
-    "mainPlayer": "Jayson Tatum"
-  },
-  {
-    "timestamp": "1:09",
-    "play": "Austin Reaves enters the game for Anthony Davis",
-    "lakersPoints": 32,
-    "celticsPoints": 23,
-    "mainPlayer": "Austin Reaves"
-  },
-  {
-    "timestamp": "1:09",
-    "play": "Jayson Tatum misses free throw 2 of 2",
-    "lakersPoints": 32,
-    "celticsPoints": 23,
-    "mainPlayer": "Jayson Tatum"
-  },
-  {
-    "timestamp": "1:06",
-    "play": "Jaxson Hayes defensive rebound",
-    "lakersPoints": 32,
-    "celticsPoints": 23,
-    "mainPlayer": "Jaxson Hayes"
-  },
-  {
-    "timestamp": "49.0",
-    "play": "Jaxson Hayes misses layup",
-    "lakersPoints": 32,
-    "celticsPoints": 23,
-    "mainPlayer": "Jaxson Hayes"
-  },
-  {
-    "timestamp": "49.0",
-    "play": "Lakers offensive team rebound",
-    "lakersPoints": 32,
-    "celticsPoints": 23,
-    "mainPlayer": "Lakers"
-  },
-  {
-    "timestamp": "44.1",
-    "play": "Austin Reaves misses 23-foot three point shot",
-    "lakersPoints": 32,
-    "celticsPoints": 23,
-    "mainPlayer": "Austin Reaves"
-  },
-  {
-    "timestamp": "44.1",
-    "play": "Lakers offensive team rebound",
-    "lakersPoints": 32,
-    "celticsPoints": 23,
-    "mainPlayer": "Lakers"
-  },
-  {
-    "timestamp": "31.1",
-    "play": "Jayson Tatum misses 26-foot three point pullup jump shot",
-    "lakersPoints": 32,
-    "celticsPoints": 23,
-    "mainPlayer": "Jayson Tatum"
-  },
-  {
-    "timestamp": "31.1",
-    "play": "Gabe Vincent defensive rebound",
-    "lakersPoints": 32,
-    "celticsPoints": 23,
-    "mainPlayer": "Gabe Vincent"
-  },
-  {
-    "timestamp": "8.2",
-    "play": "LeBron James makes 1-foot driving dunk",
-    "lakersPoints": 34,
-    "celticsPoints": 23,
-    "mainPlayer": "LeBron James"
-  },
-  {
-    "timestamp": "0.0",
-    "play": "Payton Pritchard misses 15-foot step back jumpshot",
-    "lakersPoints": 34,
-    "celticsPoints": 23,
-    "mainPlayer": "Payton Pritchard"
-  },
-  {
-    "timestamp": "0.0",
-    "play": "Celtics offensive team rebound",
-    "lakersPoints": 34,
-    "celticsPoints": 23,
-    "mainPlayer": "Celtics"
-  }
-]
 
-from typing import List, Dict
+async def latest_question_id(room_id: int) -> Optional[int]:
+    """Newest question id in the room as of the last insert, None if unknown"""
+    value = await read_cache.get_value(latest_question_key(room_id))
+    return int(value) if value is not None else None
 
-from typing import List, Dict
-from sqlmodel import Session, select
-from ..models.questionFR import QuestionFR
-from ..db import db_session
-import openai
-import asyncio
 
-def timestamp_to_seconds(timestamp) -> float:
-    """Convert timestamp string or number to seconds for comparison."""
-    if isinstance(timestamp, (int, float)):
-        return float(timestamp)
-    timestamp = str(timestamp)
-    if ':' in timestamp:
-        parts = timestamp.split(':')
-        return int(parts[0]) * 60 + float(parts[1])
-    return float(timestamp)
+game_scheduler = GameScheduler(
+    enqueue_question,
+    on_due=settle_questions,
+    start_seconds=timestamp_to_seconds("12:00"),
+    end_seconds=300,
+    question_every=45,
+    initial_delay=10,
+)
+clock_leases = clock_leases_from_env(game_scheduler)
+question_delivery = QuestionDelivery(float(os.getenv("QUESTION_DELIVERY_POLL_SECONDS", "1")))
 
-def get_next_plays(play_by_play: List[Dict], start_timestamp, n: int = 5) -> List[Dict]:
-    """Return next n plays after start_timestamp (game clock counts down)."""
-    start_seconds = timestamp_to_seconds(start_timestamp)
-    start_index = None
-    for i, play in enumerate(play_by_play):
-        play_seconds = timestamp_to_seconds(play["timestamp"])
-        if play_seconds <= start_seconds:  # because time decreases
-            start_index = i
-            break
-    if start_index is None:
-        return []
-    return play_by_play[start_index + 1 : start_index + 1 + n]
 
 class QuestionFRService:
-    def __init__(self, db: Session = Depends(db_session)):
+    def __init__(self, db: AsyncSession = Depends(db_session)):
         self.db = db
 
-    def get_questions(self, room_id: str):
-        return self.db.exec(select(QuestionFR).where(QuestionFR.room_id == room_id)).all()
-
-    async def generate_question(self, play_by_play: List[Dict]) -> dict:
-        """Call OpenAI API to generate a betting-style question with 1-word options."""
-        # Format play_by_play as readable string
-        plays_text = "\n".join(
-            [f"{p['timestamp']}: {p['play']} (Main: {p['mainPlayer']}, Score: Lakers {p['lakersPoints']}-{p['celticsPoints']})"
-             for p in play_by_play]
+    async def get_questions(self, room_id: int, since_id: Optional[int] = None):
+        """Questions in the room in id order, only those after since_id if given"""
+        if since_id is not None:
+            if since_id == await latest_question_id(room_id):
+                return []
+            statement = (
+                select(QuestionFR)
+                .where(QuestionFR.room_id == room_id, QuestionFR.id > since_id)
+                .order_by(QuestionFR.id)
+            )
+            return (await self.db.exec(statement)).all()
+
+        async def load():
+            statement = select(QuestionFR).where(QuestionFR.room_id == room_id).order_by(QuestionFR.id)
+            return (await self.db.exec(statement)).all()
+
+        return await read_cache.get_or_load(questions_key(room_id), QuestionFR, load, self.db)
+
+    async def start_timer(self, room_id: int):
+        """Subscribe the room to its game's shared clock, starting the clock if needed.
+
+        The clock runs on whichever worker holds its lease; when that is another
+        worker, it picks the room up on its next heartbeat.
+        """
+        room = await self.db.get(Room, room_id)
+        if room is None:
+            raise HTTPException(404, "Room not found")
+        await self.db.exec(
+            pg_insert(RoomTimer).values(room_id=room_id, game_id=room.game_id).on_conflict_do_nothing()
         )
-
-        prompt = f"""
-            You are a sports quiz generator. Based on the following NBA play-by-play snippet, 
-            create exactly 1 multiple-choice question suitable for a betting game. 
-            The question should be in future tense, with 4 one-word options.
-            Return JSON ONLY in this format:
-
-            {{
-            "question": "...",
-            "options": ["Option1", "Option2", "Option3", "Option4"],
-            "answer": 0  # correct option index
-            }}
-
-            Play-by-play:
-            {plays_text}
-            """
-
-        response = openai.chat.completions.create(
-            model="gpt-4.1-mini",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.7,
-        )
-
-        result_text = response.choices[0].message.content
-        try:
-            import json
-            result_json = json.loads(result_text)
-        except Exception:
-            result_json = {
-                "question": "Could not generate question",
-                "options": ["A", "B", "C", "D"],
-                "answer": 0
-            }
-        return result_json
-
-    async def timer_start(self, room_id: int, start_time: str = "12:00"):
-        """Start a timer that pushes questions into the DB every interval."""
-        timer_seconds = timestamp_to_seconds(start_time)
-        print("timer_seconds: ", timer_seconds)
-        await asyncio.sleep(10)  # initial delay
-        timer_seconds -= 10
-        while timer_seconds > 300:
-            # For example, generate question every 50 seconds of game time
-            interval = 1
-            curr_play_by_play = get_next_plays(play_by_play, start_timestamp=timer_seconds, n=20)
-            if curr_play_by_play and timer_seconds%45 == 0:
-                question_data = await self.generate_question(curr_play_by_play)
-
-                # Get last ID
-                statement = select(QuestionFR).order_by(QuestionFR.id.desc())
-                last_row = self.db.exec(statement).first()
-                last_id = last_row.id if last_row else 0
-
-                self.db.add(QuestionFR(
-                    id=last_id + 1,
-                    question=question_data["question"],
-                    options="_".join(question_data["options"]),
-                    answer=question_data.get("answer", 0),
-                    room_id=room_id
-                ))
-                self.db.commit()
-
-            timer_seconds -= interval
-            await asyncio.sleep(1)  # non-blocking sleep between intervals
-
-        return "Timer finished"
+        await self.db.exec(pg_insert(GameClockLease).values(game_id=room.game_id).on_conflict_do_nothing())
+        await self.db.commit()
+        clock_leases.ensure_started()
+        question_delivery.ensure_started()
+        await clock_leases.heartbeat()
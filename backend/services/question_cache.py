@@ -0,0 +1,73 @@
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Hashable, Tuple
+
+
+class QuestionCache:
+    """TTL/LRU cache of generated questions with single-flight generation.
+
+    Every room watching the same game window asks for the same key; the first
+    caller runs the generator and everyone else awaits that same result.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 300.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, Tuple[float, dict]]" = OrderedDict()
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+
+    def get(self, key: Hashable):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def put(self, key: Hashable, value: dict):
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def get_or_generate(
+        self, key: Hashable, generate: Callable[[], Awaitable[dict]]
+    ) -> dict:
+        value = self.get(key)
+        if value is not None:
+            return value
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            # Shield so one waiter being cancelled does not cancel everyone's result
+            return await asyncio.shield(inflight)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value = await generate()
+        except BaseException as e:
+            future.set_exception(e)
+            # Waiters see the failure; mark it retrieved so an unawaited future doesn't warn
+            future.exception()
+            raise
+        else:
+            self.put(key, value)
+            future.set_result(value)
+            return value
+        finally:
+            del self._inflight[key]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+question_cache = QuestionCache(
+    max_entries=int(os.getenv("QUESTION_CACHE_SIZE", "1024")),
+    ttl=float(os.getenv("QUESTION_CACHE_TTL_SECONDS", "300")),
+)
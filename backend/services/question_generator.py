@@ -0,0 +1,127 @@
+import asyncio
+import hashlib
+import json
+import os
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional
+
+import openai
+
+# Bump whenever the prompt changes so cached generations are not reused
+PROMPT_VERSION = 1
+
+def build_prompt(play_by_play: List[Dict]) -> str:
+    """Format a play-by-play window into the question generation prompt."""
+    # Format play_by_play as readable string
+    plays_text = "\n".join(
+        [f"{p['timestamp']}: {p['play']} (Main: {p['mainPlayer']}, Score: Lakers {p['lakersPoints']}-{p['celticsPoints']})"
+         for p in play_by_play]
+    )
+
+    return f"""
+            You are a sports quiz generator. Based on the following NBA play-by-play snippet,
+            create exactly 1 multiple-choice question suitable for a betting game.
+            The question should be in future tense, with 4 one-word options.
+            Return JSON ONLY in this format:
+
+            {{
+            "question": "...",
+            "options": ["Option1", "Option2", "Option3", "Option4"],
+            "answer": 0  # correct option index
+            }}
+
+            Play-by-play:
+            {plays_text}
+            """
+
+
+class QuestionProvider(ABC):
+    """Backend that turns a prompt into the raw JSON text of a question"""
+
+    @abstractmethod
+    async def complete(self, prompt: str) -> str: ...
+
+
+class OpenAIQuestionProvider(QuestionProvider):
+    def __init__(self, model: str = "gpt-4.1-mini", temperature: float = 0.7):
+        self.model = model
+        self.temperature = temperature
+        self._client: Optional[openai.AsyncOpenAI] = None
+
+    async def complete(self, prompt: str) -> str:
+        if self._client is None:
+            self._client = openai.AsyncOpenAI()
+        response = await self._client.chat.completions.create(
+            model=self.model,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=self.temperature,
+        )
+        return response.choices[0].message.content
+
+
+class StubQuestionProvider(QuestionProvider):
+    """Deterministic offline provider for benchmarks and local runs"""
+
+    OPTIONS = ["Lakers", "Celtics", "Neither", "Both"]
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+
+    async def complete(self, prompt: str) -> str:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        digest = int(hashlib.sha256(prompt.encode()).hexdigest(), 16)
+        return json.dumps(
+            {
+                "question": f"Which team will score next? (#{digest % 10000})",
+                "options": self.OPTIONS,
+                "answer": digest % len(self.OPTIONS),
+            }
+        )
+
+
+class QuestionGenerator:
+    """Runs a QuestionProvider with a concurrency cap and per-call timeout.
+
+    Failed generations are retried by the question worker, with backoff, as
+    attempts of the job.
+    """
+
+    def __init__(self, provider: QuestionProvider, max_concurrency: int = 8, timeout: float = 15.0):
+        self.provider = provider
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        # Created lazily so it binds to the running event loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    async def _complete(self, prompt: str) -> str:
+        async with self.semaphore:
+            return await asyncio.wait_for(self.provider.complete(prompt), self.timeout)
+
+    async def attempt(self, play_by_play: List[Dict]) -> dict:
+        """One generation, raising when the provider fails or returns a malformed question"""
+        question = json.loads(await self._complete(build_prompt(play_by_play)))
+        if not isinstance(question, dict) or not {"question", "options"} <= question.keys():
+            raise ValueError(f"Malformed question: {question!r}")
+        return question
+
+
+def provider_from_env() -> QuestionProvider:
+    if os.getenv("QUESTION_PROVIDER", "openai") == "stub":
+        return StubQuestionProvider(
+            latency=float(os.getenv("STUB_QUESTION_LATENCY", "0"))
+        )
+    return OpenAIQuestionProvider(model=os.getenv("QUESTION_MODEL", "gpt-4.1-mini"))
+
+
+question_generator = QuestionGenerator(
+    provider_from_env(),
+    max_concurrency=int(os.getenv("QUESTION_MAX_CONCURRENCY", "8")),
+    timeout=float(os.getenv("QUESTION_TIMEOUT_SECONDS", "15")),
+)
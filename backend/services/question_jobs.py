@@ -0,0 +1,325 @@
+import asyncio
+import os
+import random
+from datetime import timedelta
+from typing import Dict, FrozenSet, List, Optional
+
+from sqlalchemy import and_, case, func, or_, update
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from ..db import async_session
+from ..models.game_clock import GameClockLease
+from ..models.question_job import QuestionJob, QuestionJobStatus
+from ..models.questionFR import QuestionFR
+from .clock_leases import WORKER_ID
+from .question_cache import question_cache
+from .question_generator import PROMPT_VERSION, QuestionGenerator, question_generator
+
+QUEUED, RUNNING, DONE, DELIVERED, DEAD = (
+    QuestionJobStatus.QUEUED.value,
+    QuestionJobStatus.RUNNING.value,
+    QuestionJobStatus.DONE.value,
+    QuestionJobStatus.DELIVERED.value,
+    QuestionJobStatus.DEAD.value,
+)
+
+MAX_ATTEMPTS = int(os.getenv("QUESTION_JOB_MAX_ATTEMPTS", "5"))
+
+
+async def enqueue_question_job(
+    db: AsyncSession,
+    game_id: int,
+    clock_seconds: float,
+    closes_at: float,
+    room_ids: FrozenSet[int],
+    plays: List[Dict],
+    deadline_seconds: float,
+) -> QuestionJob:
+    """Queue a tick's question, due within deadline_seconds; the caller commits"""
+    job = QuestionJob(
+        game_id=game_id,
+        clock_seconds=clock_seconds,
+        closes_at=closes_at,
+        room_ids=sorted(room_ids),
+        plays=plays,
+        prompt_version=PROMPT_VERSION,
+        max_attempts=MAX_ATTEMPTS,
+        deadline=func.now() + timedelta(seconds=max(0.0, deadline_seconds)),
+    )
+    db.add(job)
+    await db.flush()
+    return job
+
+
+def runnable_jobs(n: int):
+    """Ids of up to n jobs a worker may claim now: queued, or left by a worker whose claim ran out"""
+    return (
+        select(QuestionJob.id)
+        .where(
+            QuestionJob.status.in_([QUEUED, RUNNING]),
+            or_(QuestionJob.status == QUEUED, QuestionJob.locked_until < func.now()),
+            QuestionJob.run_after <= func.now(),
+            QuestionJob.deadline > func.now(),
+            QuestionJob.attempts < QuestionJob.max_attempts,
+        )
+        .order_by(QuestionJob.run_after)
+        .limit(n)
+    )
+
+
+def deliverable_jobs(game_ids: List[int]):
+    """Generated jobs of game_ids, and of games with no clock running"""
+    clock_running = (
+        select(GameClockLease.game_id)
+        .where(GameClockLease.game_id == QuestionJob.game_id, GameClockLease.finished_at.is_(None))
+        .exists()
+    )
+    return and_(QuestionJob.status == DONE, or_(QuestionJob.game_id.in_(game_ids), ~clock_running))
+
+
+async def take_done_jobs(db: AsyncSession, game_ids: List[int]) -> List[QuestionJob]:
+    """Mark the deliverable_jobs delivered and return them; the caller commits.
+
+    A job is only taken by one worker: a racing update waits for the first
+    to commit, and then no longer finds it done.
+    """
+    return (await db.exec(
+        update(QuestionJob)
+        .where(deliverable_jobs(game_ids))
+        .values(status=DELIVERED)
+        .returning(QuestionJob)
+    )).scalars().all()
+
+
+async def release_done_jobs(db: AsyncSession, job_ids: List[int]):
+    """Hand taken jobs back for another delivery; the caller commits"""
+    await db.exec(
+        update(QuestionJob)
+        .where(QuestionJob.id.in_(job_ids), QuestionJob.status == DELIVERED)
+        .values(status=DONE)
+    )
+
+
+class QuestionWorker:
+    """Generates queued questions, run in its own processes (scripts/question_worker).
+
+    Jobs are claimed in batches with FOR UPDATE SKIP LOCKED, so any number of
+    workers share the queue without waiting on each other. A claim holds for
+    lock_seconds; a worker that dies mid-job leaves it to be claimed again
+    once the claim runs out. Failed attempts go back to the queue after a
+    jittered exponential backoff. Jobs past their deadline, or out of
+    attempts, are dead-lettered.
+    """
+
+    def __init__(
+        self,
+        generator: QuestionGenerator,
+        worker_id: str = WORKER_ID,
+        concurrency: int = 8,
+        lock_seconds: float = 60.0,
+        poll_seconds: float = 1.0,
+        backoff: float = 1.0,
+        max_backoff: float = 30.0,
+    ):
+        self.generator = generator
+        self.worker_id = worker_id
+        self.concurrency = concurrency
+        self.lock_seconds = lock_seconds
+        self.poll_seconds = poll_seconds
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self._in_flight = set()
+
+    async def dead_letter(self) -> int:
+        """Move jobs that can no longer run to dead, returns how many"""
+        async with async_session() as db:
+            expired = QuestionJob.deadline <= func.now()
+            dead = (await db.exec(
+                update(QuestionJob)
+                .where(
+                    QuestionJob.status.in_([QUEUED, RUNNING]),
+                    or_(
+                        expired,
+                        and_(
+                            QuestionJob.status == RUNNING,
+                            QuestionJob.locked_until < func.now(),
+                            QuestionJob.attempts >= QuestionJob.max_attempts,
+                        ),
+                    ),
+                )
+                .values(
+                    status=DEAD,
+                    locked_by=None,
+                    locked_until=None,
+                    finished_at=func.now(),
+                    last_error=case(
+                        (expired, "deadline passed"),
+                        else_="claim ran out on the last attempt",
+                    ),
+                )
+                .returning(QuestionJob.id)
+            )).scalars().all()
+            await db.commit()
+        if dead:
+            print(f"Dead-lettered question jobs {dead}")
+        return len(dead)
+
+    async def claim(self, n: int) -> List[QuestionJob]:
+        """Claim up to n runnable jobs, oldest first"""
+        candidates = runnable_jobs(n).with_for_update(skip_locked=True)
+        async with async_session() as db:
+            jobs = (await db.exec(
+                update(QuestionJob)
+                .where(QuestionJob.id.in_(candidates.scalar_subquery()))
+                .values(
+                    status=RUNNING,
+                    attempts=QuestionJob.attempts + 1,
+                    locked_by=self.worker_id,
+                    locked_until=func.now() + timedelta(seconds=self.lock_seconds),
+                )
+                .returning(QuestionJob)
+            )).scalars().all()
+            await db.commit()
+        return jobs
+
+    async def process(self, job: QuestionJob):
+        # Finish inside the claim, and never past the point the question is moot
+        async with async_session() as db:
+            remaining = (await db.exec(
+                select(func.extract("epoch", func.least(job.deadline, job.locked_until) - func.now()))
+            )).one()
+        try:
+            question = await asyncio.wait_for(
+                question_cache.get_or_generate(
+                    (job.game_id, job.clock_seconds, job.prompt_version),
+                    lambda: self.generator.attempt(job.plays),
+                ),
+                max(0.0, float(remaining)),
+            )
+        except Exception as e:
+            await self.fail(job, e)
+            return
+        await self.complete(job, question)
+
+    async def complete(self, job: QuestionJob, question: dict):
+        """Insert the job's questions and mark it done, in one transaction"""
+        async with async_session() as db:
+            claimed = (await db.exec(
+                select(QuestionJob.id)
+                .where(
+                    QuestionJob.id == job.id,
+                    QuestionJob.status == RUNNING,
+                    QuestionJob.locked_by == self.worker_id,
+                )
+                .with_for_update()
+            )).first()
+            if claimed is None:
+                print(f"Question job {job.id} was claimed by another worker, dropping its result")
+                return
+            questions = [
+                QuestionFR(
+                    question=question["question"],
+                    options="_".join(question["options"]),
+                    answer=question.get("answer", 0),
+                    room_id=room_id,
+                    closes_at=job.closes_at,
+                )
+                for room_id in job.room_ids
+            ]
+            db.add_all(questions)
+            await db.flush()
+            await db.exec(
+                update(QuestionJob)
+                .where(QuestionJob.id == job.id)
+                .values(
+                    status=DONE,
+                    question_ids=[q.id for q in questions],
+                    locked_until=None,
+                    finished_at=func.now(),
+                )
+            )
+            await db.commit()
+
+    async def fail(self, job: QuestionJob, error: Exception):
+        """Requeue the job after a backoff, or dead-letter it on its last attempt"""
+        last = job.attempts >= job.max_attempts
+        delay = random.uniform(0, min(self.max_backoff, self.backoff * 2 ** (job.attempts - 1)))
+        print(f"Question job {job.id} attempt {job.attempts} failed: {error!r}")
+        async with async_session() as db:
+            await db.exec(
+                update(QuestionJob)
+                .where(
+                    QuestionJob.id == job.id,
+                    QuestionJob.status == RUNNING,
+                    QuestionJob.locked_by == self.worker_id,
+                )
+                .values(
+                    status=DEAD if last else QUEUED,
+                    run_after=func.now() + timedelta(seconds=delay),
+                    locked_by=None,
+                    locked_until=None,
+                    last_error=repr(error)[:500],
+                    finished_at=func.now() if last else None,
+                )
+            )
+            await db.commit()
+
+    async def release(self):
+        """Put the jobs this worker still holds back in the queue, without using up an attempt"""
+        async with async_session() as db:
+            await db.exec(
+                update(QuestionJob)
+                .where(QuestionJob.status == RUNNING, QuestionJob.locked_by == self.worker_id)
+                .values(
+                    status=QUEUED,
+                    attempts=QuestionJob.attempts - 1,
+                    locked_by=None,
+                    locked_until=None,
+                )
+            )
+            await db.commit()
+
+    def _job_done(self, task: asyncio.Task):
+        self._in_flight.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            # Its claim runs out and another attempt picks it up
+            print(f"Question job failed to finish: {task.exception()!r}")
+
+    async def run(self):
+        """Claim and generate jobs, up to concurrency at a time, until cancelled"""
+        try:
+            while True:
+                jobs = []
+                try:
+                    await self.dead_letter()
+                    free = self.concurrency - len(self._in_flight)
+                    if free:
+                        jobs = await self.claim(free)
+                except Exception as e:
+                    print(f"Question job claim failed: {e!r}")
+                for job in jobs:
+                    task = asyncio.create_task(self.process(job))
+                    self._in_flight.add(task)
+                    task.add_done_callback(self._job_done)
+                if jobs and len(self._in_flight) < self.concurrency:
+                    # Slots left after a claim that found work, there may be more
+                    continue
+                if self._in_flight:
+                    await asyncio.wait(
+                        self._in_flight, timeout=self.poll_seconds, return_when=asyncio.FIRST_COMPLETED
+                    )
+                else:
+                    await asyncio.sleep(self.poll_seconds)
+        finally:
+            for task in self._in_flight:
+                task.cancel()
+
+
+def question_worker_from_env(concurrency: Optional[int] = None) -> QuestionWorker:
+    return QuestionWorker(
+        question_generator,
+        concurrency=concurrency or int(os.getenv("QUESTION_WORKER_CONCURRENCY", "8")),
+        lock_seconds=float(os.getenv("QUESTION_JOB_LOCK_SECONDS", "60")),
+        poll_seconds=float(os.getenv("QUESTION_JOB_POLL_SECONDS", "1")),
+    )
@@ -0,0 +1,215 @@
+import json
+import os
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Awaitable, Callable, Optional, Tuple, Type
+
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from ..db import PINNED, READ_SOURCE, REPLICA
+
+
+class CacheBackend(ABC):
+    """Stores serialized values by key with a time to live"""
+
+    # Whether every API worker sees the same entries
+    shared = False
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[str]: ...
+
+    @abstractmethod
+    async def set(self, key: str, value: str, ttl: float): ...
+
+    @abstractmethod
+    async def delete(self, *keys: str): ...
+
+
+class MemoryBackend(CacheBackend):
+    """In-process LRU, only shared by the requests of one worker"""
+
+    def __init__(self, max_entries: int = 4096):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+
+    async def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key, value, ttl):
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def delete(self, *keys):
+        for key in keys:
+            self._entries.pop(key, None)
+
+
+class RedisBackend(CacheBackend):
+    """Shared by every worker through a Redis (or protocol compatible) server"""
+
+    shared = True
+
+    def __init__(self, url: str, prefix: str = "raptor:"):
+        self.url = url
+        self.prefix = prefix
+        self._client = None
+
+    @property
+    def client(self):
+        # Created lazily so the in-process backend doesn't need redis installed
+        if self._client is None:
+            from redis.asyncio import Redis
+
+            self._client = Redis.from_url(self.url, decode_responses=True)
+        return self._client
+
+    async def get(self, key):
+        return await self.client.get(self.prefix + key)
+
+    async def set(self, key, value, ttl):
+        await self.client.set(self.prefix + key, value, px=max(1, int(ttl * 1000)))
+
+    async def delete(self, *keys):
+        if keys:
+            await self.client.delete(*(self.prefix + key for key in keys))
+
+
+class ReadCache:
+    """Read-through cache of model query results, invalidated by the writers.
+
+    Values are stored as JSON and rebuilt into fresh model instances on every
+    hit, so callers can't change what other requests see. A failing backend
+    only costs the cache: reads go to the database and the error is printed.
+    """
+
+    def __init__(self, backend: Optional[CacheBackend], ttl: float = 30.0):
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    async def get_or_load(
+        self, key: str, model: Type[SQLModel], load: Callable[[], Awaitable], db: Optional[AsyncSession] = None
+    ):
+        """Return load()'s model or list of models, from the cache when possible.
+
+        db is the session load() reads from. A session pinned to the primary
+        after a write skips the cache, and one on a replica never fills it:
+        a lagging replica could put back rows a write just invalidated.
+        """
+        source = db.info.get(READ_SOURCE) if db is not None else None
+        if self.backend is None or source == PINNED:
+            return await load()
+        try:
+            cached = await self.backend.get(key)
+        except Exception as e:
+            print(f"Read cache get {key} failed: {e!r}")
+            return await load()
+        if cached is not None:
+            self.hits += 1
+            data = json.loads(cached)
+            if isinstance(data, list):
+                return [model.model_validate(item) for item in data]
+            return model.model_validate(data)
+
+        self.misses += 1
+        value = await load()
+        if value is None or source == REPLICA:
+            return value
+        if isinstance(value, (list, tuple)):
+            data = [item.model_dump(mode="json") for item in value]
+        else:
+            data = value.model_dump(mode="json")
+        try:
+            await self.backend.set(key, json.dumps(data), self.ttl)
+        except Exception as e:
+            print(f"Read cache set {key} failed: {e!r}")
+        return value
+
+    async def get_value(self, key: str) -> Optional[str]:
+        """Plain string value, None when missing or unavailable"""
+        if self.backend is None:
+            return None
+        try:
+            return await self.backend.get(key)
+        except Exception as e:
+            print(f"Read cache get {key} failed: {e!r}")
+            return None
+
+    async def set_value(self, key: str, value: str, ttl: Optional[float] = None):
+        if self.backend is None:
+            return
+        try:
+            await self.backend.set(key, value, ttl or self.ttl)
+        except Exception as e:
+            print(f"Read cache set {key} failed: {e!r}")
+
+    async def invalidate(self, *keys: str):
+        """Drop keys; call after the write has committed"""
+        if self.backend is None or not keys:
+            return
+        try:
+            await self.backend.delete(*keys)
+        except Exception as e:
+            print(f"Read cache invalidate {keys} failed: {e!r}")
+
+
+def user_key(username: str) -> str:
+    return f"user:{username}"
+
+
+def players_key(game_id: int, team: Optional[str] = None) -> str:
+    return f"players:{game_id}" if team is None else f"players:{game_id}:{team}"
+
+
+ROOMS_KEY = "rooms"
+
+
+def questions_key(room_id: int) -> str:
+    return f"questions:{room_id}"
+
+
+def latest_question_key(room_id: int) -> str:
+    return f"questions_latest:{room_id}"
+
+
+def backend_from_env() -> Optional[CacheBackend]:
+    """READ_CACHE_BACKEND=memory (default), redis (READ_CACHE_URL) or none"""
+    kind = os.getenv("READ_CACHE_BACKEND", "memory").lower()
+    if kind == "none":
+        return None
+    if kind == "redis":
+        return RedisBackend(os.getenv("READ_CACHE_URL", "redis://localhost:6379/0"))
+    return MemoryBackend(int(os.getenv("READ_CACHE_SIZE", "4096")))
+
+
+def check_workers(backend: Optional[CacheBackend], workers: int):
+    """Refuse to run several API workers without a shared cache server.
+
+    A per-process cache is only invalidated on the worker that served the
+    write, so the others would keep serving the old rows, and question ETags,
+    until the TTL. The server also carries the event bus between workers.
+    """
+    if workers > 1 and (backend is None or not backend.shared):
+        raise RuntimeError(
+            f"WEB_CONCURRENCY={workers} API workers need READ_CACHE_BACKEND=redis, "
+            f"not {type(backend).__name__ if backend is not None else 'none'}"
+        )
+
+
+read_cache = ReadCache(
+    backend_from_env(),
+    ttl=float(os.getenv("READ_CACHE_TTL_SECONDS", "30")),
+)
@@ -0,0 +1,88 @@
+import os
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import polars as pl
+
+from .play_index import PlayIndex, timestamp_to_seconds
+
+REPLAY_DIR = Path(__file__).resolve().parent.parent / "replays"
+
+# Derived when the file is built; not part of a play as the generator sees it
+SECONDS_COLUMN = "seconds"
+
+
+class GameReplay:
+    """One game's plays as a memory-mapped columnar frame plus its clock index"""
+
+    def __init__(self, game_id: int, frame: pl.DataFrame):
+        self.game_id = game_id
+        self.frame = frame
+        self.index = PlayIndex.from_timestamps(frame.get_column(SECONDS_COLUMN).to_list())
+        self._play_columns = [c for c in frame.columns if c != SECONDS_COLUMN]
+
+    def __len__(self) -> int:
+        return self.frame.height
+
+    def plays(self, start: int, stop: int) -> List[Dict]:
+        """Plays [start, stop) as dicts; only this slice is materialized"""
+        return self.frame.slice(start, max(0, stop - start)).select(self._play_columns).to_dicts()
+
+    def clock_at(self, i: int) -> float:
+        """Game clock seconds of play i"""
+        return self.frame.get_column(SECONDS_COLUMN)[i]
+
+    def next_plays(self, start_timestamp, n: int = 5, quarter: int = 1) -> List[Dict]:
+        start, stop = self.index.window(start_timestamp, n, quarter)
+        return self.plays(start, stop)
+
+
+class ReplayStore:
+    """Loads game replays lazily from <directory>/<game_id>.arrow.
+
+    Files are uncompressed Arrow IPC and memory-mapped, so every worker on a
+    host shares the same page-cache copy of a game instead of its own dicts.
+    """
+
+    def __init__(self, directory: Path = REPLAY_DIR):
+        self.directory = Path(directory)
+        self._games: Dict[int, GameReplay] = {}
+        self._lock = threading.Lock()
+
+    def path(self, game_id: int) -> Path:
+        return self.directory / f"{game_id}.arrow"
+
+    def get(self, game_id: int) -> Optional[GameReplay]:
+        """The game's replay, None if there is no file for it yet.
+
+        A missing file isn't remembered, so a replay written after the first
+        lookup is picked up by the next one.
+        """
+        replay = self._games.get(game_id)
+        if replay is not None:
+            return replay
+        with self._lock:
+            if game_id not in self._games:
+                path = self.path(game_id)
+                if not path.exists():
+                    return None
+                # polars memory-maps uncompressed IPC files by default
+                self._games[game_id] = GameReplay(game_id, pl.read_ipc(path))
+        return self._games[game_id]
+
+
+def build_frame(plays: List[Dict]) -> pl.DataFrame:
+    """Columnar frame of a game's plays, in feed order, with parsed clock seconds"""
+    frame = pl.DataFrame(plays)
+    return frame.with_columns(
+        pl.Series(SECONDS_COLUMN, [timestamp_to_seconds(p["timestamp"]) for p in plays], dtype=pl.Float64)
+    )
+
+
+def write_replay(path: Path, plays: List[Dict]):
+    # Uncompressed, so the file can be memory-mapped as is
+    build_frame(plays).write_ipc(path, compression="uncompressed")
+
+
+replay_store = ReplayStore(Path(os.getenv("REPLAY_DIR", REPLAY_DIR)))
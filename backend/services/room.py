@@ -1,27 +1,42 @@
 from ..models.user import User
 from ..db import db_session
-from sqlmodel import Session, select
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from fastapi import Depends, HTTPException
 from ..models.room import Room
+from .pagination import DEFAULT_PAGE_SIZE, keyset, split_page
+from .read_cache import ROOMS_KEY, read_cache
+from typing import Optional
 
 
 class RoomService:
     """Service for user operations"""
 
-    def __init__(self, db: Session = Depends(db_session)):
+    def __init__(self, db: AsyncSession = Depends(db_session)):
         self.db = db
 
-    def get_rooms(self):
-        return self.db.exec(select(Room)).all()
+    async def get_rooms(self, after: Optional[int] = None, limit: int = DEFAULT_PAGE_SIZE):
+        """A page of rooms in id order, and the cursor of the next"""
+        async def load():
+            return (await self.db.exec(keyset(select(Room), Room.id, after, limit))).all()
 
-    def create_room(self, game_id: int):
+        # The default first page is what the lobby polls, only that one is cached
+        if after is None and limit == DEFAULT_PAGE_SIZE:
+            rows = await read_cache.get_or_load(ROOMS_KEY, Room, load, self.db)
+        else:
+            rows = await load()
+        return split_page(rows, limit, lambda room: room.id)
+
+    async def create_room(self, game_id: int):
         room = Room(game_id=game_id)
         self.db.add(room)
-        self.db.commit()
+        await self.db.commit()
+        await read_cache.invalidate(ROOMS_KEY)
         return room
 
-    def update_room(self, room_id: int, started: bool):
-        room = self.db.get(Room, room_id)
+    async def update_room(self, room_id: int, started: bool):
+        room = await self.db.get(Room, room_id)
         room.started = started
-        self.db.commit()
+        await self.db.commit()
+        await read_cache.invalidate(ROOMS_KEY)
         return room
@@ -0,0 +1,178 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, FrozenSet, Iterable, List, Optional, Set
+
+# (game_id, game clock seconds, subscribed room ids)
+QuestionHandler = Callable[[int, float, FrozenSet[int]], Awaitable[None]]
+# (game_id, game clock seconds, ids of the items due then)
+DueHandler = Callable[[int, float, List[int]], Awaitable[None]]
+
+
+class GameClock:
+    """Countdown clock for one game, shared by every room watching it.
+
+    Ticks are scheduled against monotonic deadlines measured from when the
+    clock started, so a slow tick or handler never shifts later ticks. The
+    clock only wakes for question ticks and hands each one to its own task.
+
+    Items scheduled with schedule_due are handed to on_due in one batch per
+    game clock value once the clock passes it. The clock keeps running until
+    they are all handled, even after its last tick or room.
+
+    When guard is given, ticks and due items are only handed out while it
+    returns True, e.g. while this worker holds the clock's lease.
+    """
+
+    def __init__(
+        self,
+        game_id: int,
+        on_question: QuestionHandler,
+        start_seconds: float = 720.0,
+        end_seconds: float = 300.0,
+        question_every: int = 45,
+        initial_delay: float = 10.0,
+        speed: float = 1.0,
+        on_due: Optional[DueHandler] = None,
+        guard: Optional[Callable[[], bool]] = None,
+    ):
+        self.game_id = game_id
+        self.on_question = on_question
+        self.on_due = on_due
+        self.guard = guard
+        self.start_seconds = start_seconds
+        self.end_seconds = end_seconds
+        self.question_every = question_every
+        self.initial_delay = initial_delay
+        # Game seconds per real second; above 1 replays the game faster
+        self.speed = speed
+        self.rooms: Set[int] = set()
+        self.origin: Optional[float] = None
+        self.task: Optional[asyncio.Task] = None
+        self._handlers: Set[asyncio.Task] = set()
+        # Game clock seconds -> ids due then, until handed to on_due
+        self._due: Dict[float, List[int]] = {}
+
+    def clock_seconds(self) -> float:
+        """Current game clock, derived from elapsed monotonic time"""
+        if self.origin is None:
+            return self.start_seconds
+        elapsed = asyncio.get_running_loop().time() - self.origin
+        return self.start_seconds - elapsed * self.speed
+
+    def deadline(self, clock_seconds: float) -> float:
+        return self.origin + (self.start_seconds - clock_seconds) / self.speed
+
+    def _allowed(self) -> bool:
+        return self.guard is None or self.guard()
+
+    async def run(self, elapsed: float = 0.0):
+        """Run the clock, resumed elapsed real seconds after it first started"""
+        loop = asyncio.get_running_loop()
+        self.origin = loop.time() - elapsed
+        first_tick = self.start_seconds - self.initial_delay
+        clock = first_tick - first_tick % self.question_every
+        # A resumed clock doesn't replay the ticks it missed
+        while clock > self.end_seconds and self.deadline(clock) < loop.time():
+            clock -= self.question_every
+        while clock > self.end_seconds and self.rooms:
+            await asyncio.sleep(max(0.0, self.deadline(clock) - loop.time()))
+            if not self.rooms:
+                break
+            if self._allowed():
+                self._spawn(self.on_question(self.game_id, clock, frozenset(self.rooms)))
+            clock -= self.question_every
+        # Ticks in flight may still schedule due items
+        while self._handlers:
+            await asyncio.wait(set(self._handlers))
+
+    def schedule_due(self, clock_seconds: float, ids: Iterable[int]):
+        """Hand ids to on_due once the clock passes clock_seconds"""
+        pending = self._due.get(clock_seconds)
+        if pending is not None:
+            # Already waiting for that clock value, go out in the same batch
+            pending.extend(ids)
+            return
+        self._due[clock_seconds] = list(ids)
+        self._spawn(self._fire_due(clock_seconds))
+
+    async def _fire_due(self, clock_seconds: float):
+        loop = asyncio.get_running_loop()
+        await asyncio.sleep(max(0.0, self.deadline(clock_seconds) - loop.time()))
+        ids = self._due.pop(clock_seconds)
+        if self.on_due is not None and self._allowed():
+            await self.on_due(self.game_id, clock_seconds, ids)
+
+    def _spawn(self, coro):
+        handler = asyncio.create_task(coro)
+        self._handlers.add(handler)
+        handler.add_done_callback(self._handler_done)
+
+    def _handler_done(self, task: asyncio.Task):
+        self._handlers.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            print(f"Clock handler for game {self.game_id} failed: {task.exception()!r}")
+
+
+class GameScheduler:
+    """Runs one GameClock per game and subscribes rooms to it.
+
+    owns(game_id), when set, guards every clock (see GameClock), and
+    on_finished(game_id, room_ids) is called when a clock runs out rather
+    than being dropped.
+    """
+
+    def __init__(self, on_question: QuestionHandler, on_due: Optional[DueHandler] = None, **clock_options):
+        self.on_question = on_question
+        self.on_due = on_due
+        self.clock_options = clock_options
+        self.clocks: Dict[int, GameClock] = {}
+        self.owns: Optional[Callable[[int], bool]] = None
+        self.on_finished: Optional[Callable[[int, FrozenSet[int]], None]] = None
+
+    def _start(self, game_id: int, elapsed: float = 0.0) -> GameClock:
+        guard = None if self.owns is None else (lambda: self.owns(game_id))
+        clock = GameClock(game_id, self.on_question, on_due=self.on_due, guard=guard, **self.clock_options)
+        self.clocks[game_id] = clock
+        clock.task = asyncio.create_task(clock.run(elapsed))
+        clock.task.add_done_callback(lambda _: self._finished(clock))
+        return clock
+
+    def subscribe(self, game_id: int, room_id: int) -> GameClock:
+        clock = self.clocks.get(game_id)
+        if clock is None:
+            clock = self._start(game_id)
+        clock.rooms.add(room_id)
+        return clock
+
+    def adopt(self, game_id: int, room_ids: Iterable[int], elapsed: float = 0.0) -> GameClock:
+        """Run the game's clock here with exactly room_ids, resuming it if it isn't running"""
+        clock = self.clocks.get(game_id)
+        rooms = set(room_ids)
+        if clock is None:
+            clock = self._start(game_id, elapsed)
+        clock.rooms = rooms
+        return clock
+
+    def drop(self, game_id: int):
+        """Stop the game's clock here without finishing it, e.g. after losing its lease"""
+        clock = self.clocks.pop(game_id, None)
+        if clock is not None and clock.task is not None:
+            clock.task.cancel()
+
+    def unsubscribe(self, game_id: int, room_id: int):
+        clock = self.clocks.get(game_id)
+        if clock is not None:
+            clock.rooms.discard(room_id)
+
+    def schedule_due(self, game_id: int, clock_seconds: float, ids: Iterable[int]) -> bool:
+        """GameClock.schedule_due on the game's clock, False if it isn't running"""
+        clock = self.clocks.get(game_id)
+        if clock is None:
+            return False
+        clock.schedule_due(clock_seconds, ids)
+        return True
+
+    def _finished(self, clock: GameClock):
+        if self.clocks.get(clock.game_id) is clock:
+            del self.clocks[clock.game_id]
+            if self.on_finished is not None and not clock.task.cancelled():
+                self.on_finished(clock.game_id, frozenset(clock.rooms))
@@ -0,0 +1,33 @@
+from functools import lru_cache
+from typing import Any, List, Sequence, Type
+
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+from sqlmodel import SQLModel
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered by orjson, or sent as is when given JSON bytes.
+
+    Routes opt in with response_class=FastJSONResponse, which keeps their
+    response_model for the OpenAPI schema, and return list_response(...) so
+    FastAPI neither re-validates the rows nor runs them through
+    jsonable_encoder.
+    """
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, (bytes, bytearray)):
+            return bytes(content)
+        return orjson.dumps(content)
+
+
+@lru_cache(maxsize=None)
+def list_adapter(model: Type[SQLModel]) -> TypeAdapter:
+    """List[model] adapter, built once per model; its serializer is compiled in pydantic-core"""
+    return TypeAdapter(List[model])
+
+
+def list_response(model: Type[SQLModel], rows: Sequence[SQLModel], **kwargs) -> FastJSONResponse:
+    """rows serialized straight to JSON bytes, the same document response_model=List[model] gives"""
+    return FastJSONResponse(list_adapter(model).dump_json(list(rows), by_alias=True), **kwargs)
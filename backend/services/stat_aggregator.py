@@ -0,0 +1,110 @@
+import operator
+from functools import reduce
+from typing import Dict
+
+import polars as pl
+from sqlalchemy import and_, func
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from ..models.play import Play
+from ..models.PlayerMetricType import PlayerMetricType
+from ..models.PlayStatsData import PlayStatsData
+from ..models.QuestionResolution import QuestionResolution, QuestionType
+
+# The play_stats_data columns each question metric adds up
+METRIC_COLUMNS: Dict[PlayerMetricType, tuple] = {
+    PlayerMetricType.passing_yards: ("passing_yards",),
+    PlayerMetricType.rushing_yards: ("rushing_yards",),
+    PlayerMetricType.receiving_yards: ("receiving_yards",),
+    # Touchdowns the player scored, so not the ones thrown as a passer
+    PlayerMetricType.touchdowns: (
+        "rushing_touchdowns",
+        "receiving_touchdowns",
+        "fumble_return_touchdowns",
+        "interception_return_touchdowns",
+        "punt_return_touchdowns",
+        "kick_return_touchdowns",
+        "blocked_kick_return_touchdowns",
+        "field_goal_return_touchdowns",
+    ),
+    # Thrown by a passer, caught by a defender; a player only ever has one kind
+    PlayerMetricType.interceptions: ("passing_interceptions", "interceptions"),
+    PlayerMetricType.fumbles: ("fumbles",),
+    PlayerMetricType.sacks: ("sacks",),
+    PlayerMetricType.tackles: ("solo_tackles", "assisted_tackles"),
+    PlayerMetricType.tackles_for_loss: ("tackles_for_loss",),
+    PlayerMetricType.passes_completed: ("passing_completions",),
+}
+
+# Counts only grow during a game, yardage can still go back down
+MONOTONIC_METRICS = [
+    metric.value for metric in METRIC_COLUMNS if not metric.value.endswith("_yards")
+]
+
+PLAYER_COLUMNS = ["name", "team"]
+
+
+def resolve_frame(questions: pl.DataFrame, totals: pl.DataFrame, final: bool) -> pl.DataFrame:
+    """Answers of the questions that are decided, in one vectorized pass.
+
+    questions has id, question_type, metric_type, metric_value, name and team;
+    totals is player_totals(). Before the game is final, only counting
+    metrics that already passed their line are decided. Players without stats
+    count as zero.
+    """
+    actual = totals.unpivot(
+        index=PLAYER_COLUMNS, on=[metric.value for metric in METRIC_COLUMNS],
+        variable_name="metric_type", value_name="actual_value",
+    )
+    frame = questions.join(actual, on=PLAYER_COLUMNS + ["metric_type"], how="left").with_columns(
+        pl.col("actual_value").fill_null(0).cast(pl.Float64)
+    )
+    over_under = pl.col("question_type") == QuestionType.OVER_UNDER.value
+    value, line = pl.col("actual_value"), pl.col("metric_value")
+    answer = (
+        pl.when(over_under & (value > line)).then(pl.lit(QuestionResolution.OVER.value))
+        .when(over_under & (value < line)).then(pl.lit(QuestionResolution.UNDER.value))
+        .when(over_under).then(pl.lit(QuestionResolution.NEUTRAL.value))
+        .when(value >= line).then(pl.lit(QuestionResolution.YES.value))
+        .otherwise(pl.lit(QuestionResolution.NO.value))
+    )
+    decided = pl.lit(final) | (
+        pl.col("metric_type").is_in(MONOTONIC_METRICS)
+        & ((over_under & (value > line)) | (~over_under & (value >= line)))
+    )
+    return frame.with_columns(answer.alias("answer")).filter(decided)
+
+
+def metric_total(columns: tuple):
+    """SQL sum of a metric's play_stats_data columns over a group"""
+    return func.coalesce(
+        func.sum(reduce(operator.add, (func.coalesce(getattr(PlayStatsData, c), 0) for c in columns))), 0
+    )
+
+
+async def player_totals(db: AsyncSession, game_id: int) -> pl.DataFrame:
+    """One row per player (name, team) with a column per PlayerMetricType.
+
+    Summed by the database on every call: stats are written by the ingestion
+    process, so no copy kept here would see them.
+    """
+    rows = (await db.exec(
+        select(
+            PlayStatsData.name,
+            PlayStatsData.team,
+            *(metric_total(columns).label(metric.value) for metric, columns in METRIC_COLUMNS.items()),
+        )
+        .join(Play, and_(Play.game_id == PlayStatsData.game_id, Play.play_id == PlayStatsData.play_id))
+        .where(Play.game_id == game_id)
+        .group_by(PlayStatsData.name, PlayStatsData.team)
+    )).all()
+    return pl.DataFrame(
+        rows,
+        schema={
+            "name": pl.Utf8,
+            "team": pl.Utf8,
+            **{metric.value: pl.Int64 for metric in METRIC_COLUMNS},
+        },
+        orient="row",
+    )
@@ -1,47 +1,60 @@
 from ..models.user import User
 from ..db import db_session
-from sqlmodel import Session, select
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from fastapi import Depends, HTTPException
 from ..models.room import Room
+from .leaderboard import leaderboards
+from .pagination import DEFAULT_PAGE_SIZE, keyset, split_page
+from .read_cache import read_cache, user_key
+from typing import Optional
 
 
 class UserService:
     """Service for user operations"""
 
-    def __init__(self, db: Session = Depends(db_session)):
+    def __init__(self, db: AsyncSession = Depends(db_session)):
         self.db = db
 
-    def get_user(self, username: str):
-        user = self.db.exec(select(User).where(User.username == username)).first()
+    async def get_user(self, username: str):
+        async def load():
+            return (await self.db.exec(select(User).where(User.username == username))).first()
+
+        user = await read_cache.get_or_load(user_key(username), User, load, self.db)
         if user is None:
             raise HTTPException(status_code=404, detail="User not found")
         return user
 
-    def create_user(self, username: str):
+    async def create_user(self, username: str):
         self.db.add(User(username=username, room_id=None))
-        self.db.commit()
+        await self.db.commit()
         return User(username=username, room_id=None)
 
-    def get_all_users(self):
-        return self.db.exec(select(User)).all()
+    async def get_all_users(self, after: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE):
+        """A page of users in username order, and the cursor of the next"""
+        rows = (await self.db.exec(keyset(select(User), User.username, after, limit))).all()
+        return split_page(rows, limit, lambda user: user.username)
 
-    def update_user_room(self, username: str, room_id: int):
-        user = self.db.exec(select(User).where(User.username == username)).first()
+    async def update_user_room(self, username: str, room_id: int):
+        user = (await self.db.exec(select(User).where(User.username == username))).first()
         if user is None:
             raise HTTPException(status_code=404, detail="User not found")
         user.room_id = room_id
-        room = self.db.exec(select(Room).where(Room.id == room_id)).first()
+        room = (await self.db.exec(select(Room).where(Room.id == room_id))).first()
         if room is None:
             raise HTTPException(status_code=404, detail="Room not found")
-        room.players.append(user)
-        self.db.add(room)
-        self.db.commit()
+        self.db.add(user)
+        await self.db.commit()
+        await read_cache.invalidate(user_key(username))
+        leaderboards.update(username, room_id, user.tokens)
         return user
 
-    def update_user_tokens(self, username: str, tokens: int):
-        user = self.db.exec(select(User).where(User.username == username)).first()
+    async def update_user_tokens(self, username: str, tokens: int):
+        user = (await self.db.exec(select(User).where(User.username == username))).first()
         if user is None:
             raise HTTPException(status_code=404, detail="User not found")
         user.tokens = tokens
-        self.db.commit()
+        await self.db.commit()
+        await read_cache.invalidate(user_key(username))
+        leaderboards.set_balance(username, tokens)
         return user
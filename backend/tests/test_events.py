@@ -0,0 +1,85 @@
+"""Room events, standings and friends reach every worker through the event bus.
+
+Two buses with their own worker ids stand in for two API workers. Runs
+against the Redis server in READ_CACHE_URL (default localhost) and is
+skipped when none answers.
+"""
+
+import asyncio
+import os
+import uuid
+
+import pytest
+
+redis = pytest.importorskip("redis.asyncio")
+
+from ..services.events import EventBus
+from ..services.friend_graph import FriendGraph
+from ..services.hub import RoomHub
+from ..services.leaderboard import Leaderboards
+
+REDIS_URL = os.getenv("READ_CACHE_URL", "redis://localhost:6379/0")
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+async def workers():
+    """Hub, leaderboards and friend graph of two workers sharing a channel"""
+    client = redis.Redis.from_url(REDIS_URL)
+    try:
+        await client.ping()
+    except Exception:
+        pytest.skip(f"needs a Redis server at {REDIS_URL}")
+    finally:
+        await client.aclose()
+    channel = f"test:events:{uuid.uuid4().hex[:8]}"
+    buses = [EventBus(REDIS_URL, channel=channel, heartbeat_seconds=0.1, worker_id=w) for w in ("a", "b")]
+    states = []
+    for bus in buses:
+        hub, boards = RoomHub(bus), Leaderboards(bus)
+        states.append((hub, boards, FriendGraph(bus, hub, boards)))
+    for bus in buses:
+        bus.ensure_started()
+    # Subscribed once a heartbeat has gone both ways
+    await asyncio.sleep(0.3)
+    yield states
+    for bus in buses:
+        await bus.stop()
+
+
+async def eventually(check, timeout: float = 2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not check():
+        assert asyncio.get_running_loop().time() < deadline
+        await asyncio.sleep(0.02)
+
+
+async def test_room_events_reach_other_workers(workers):
+    (hub_a, _, _), (hub_b, _, _) = workers
+    queue = hub_b.subscribe(7)
+    hub_a.publish(7, {"type": "question", "data": {"id": 1}})
+    assert await asyncio.wait_for(queue.get(), 2) == {"type": "question", "data": {"id": 1}}
+
+
+async def test_leaderboards_follow_other_workers(workers):
+    (_, board_a, _), (_, board_b, _) = workers
+    board_a.update("ann", 3, 100)
+    board_a.update("bob", 3, 90)
+    board_a.set_balance("bob", 120)
+    await eventually(lambda: board_b.top(3, 10) == board_a.top(3, 10))
+    assert [row["username"] for row in board_b.top(3, 10)] == ["bob", "ann"]
+
+
+async def test_friends_and_presence_reach_other_workers(workers):
+    (hub_a, _, graph_a), (_, _, graph_b) = workers
+    graph_a.add("ann", "bob")
+    hub_a.connect("bob")
+    await eventually(lambda: graph_b.online("ann") == ["bob"])
+    hub_a.disconnect("bob")
+    await eventually(lambda: graph_b.online("ann") == [])
@@ -0,0 +1,37 @@
+"""Every hot-path query in migrations/check_plans.py has an index to use.
+
+Runs against the migrated database in DATABASE_URL and is skipped without one.
+"""
+
+import os
+
+import pytest
+from sqlalchemy import create_engine
+
+if not os.getenv("DATABASE_URL"):
+    pytest.skip("needs a migrated database in DATABASE_URL", allow_module_level=True)
+
+from ..migrations.check_plans import HOT_QUERIES, explain_sql, explained_problems
+
+
+def sync_db_url(url: str) -> str:
+    """Point any postgres URL at the psycopg2 driver"""
+    for prefix in ("postgres://", "postgresql+asyncpg://"):
+        if url.startswith(prefix):
+            return "postgresql://" + url[len(prefix) :]
+    return url
+
+
+@pytest.fixture(scope="module")
+def conn():
+    engine = create_engine(sync_db_url(os.environ["DATABASE_URL"]))
+    with engine.connect() as conn:
+        conn.exec_driver_sql("SET enable_seqscan = off")
+        yield conn
+    engine.dispose()
+
+
+@pytest.mark.parametrize("name", list(HOT_QUERIES))
+def test_query_uses_index(conn, name):
+    plan = conn.exec_driver_sql(explain_sql(HOT_QUERIES[name])).scalar()
+    assert explained_problems(plan) == []
@@ -0,0 +1,131 @@
+"""The Redis read cache: fills, hits and invalidation, by where a read comes from.
+
+Runs against the Redis server in READ_CACHE_URL (default localhost) and is
+skipped when none answers. Importing the app's database module needs
+DATABASE_URL, though nothing here queries it.
+"""
+
+import asyncio
+import os
+import uuid
+
+import pytest
+
+if not os.getenv("DATABASE_URL"):
+    pytest.skip("needs DATABASE_URL to import the app", allow_module_level=True)
+
+redis = pytest.importorskip("redis.asyncio")
+
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from ..db import PINNED, READ_SOURCE, REPLICA
+from ..models.room import Room  # noqa: F401 (resolves User.room)
+from ..models.user import User
+from ..services.read_cache import ReadCache, RedisBackend, user_key
+
+REDIS_URL = os.getenv("READ_CACHE_URL", "redis://localhost:6379/0")
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+async def backend():
+    """A backend with its own key prefix, emptied afterwards"""
+    client = redis.Redis.from_url(REDIS_URL)
+    try:
+        await client.ping()
+    except Exception:
+        await client.aclose()
+        pytest.skip(f"needs a Redis server at {REDIS_URL}")
+    backend = RedisBackend(REDIS_URL, prefix=f"test:{uuid.uuid4().hex[:8]}:")
+    yield backend
+    keys = await client.keys(backend.prefix + "*")
+    if keys:
+        await client.delete(*keys)
+    await client.aclose()
+    await backend.client.aclose()
+
+
+def session(source=None) -> AsyncSession:
+    """A session marked the way read_db_session marks it; never connected"""
+    db = AsyncSession()
+    if source is not None:
+        db.info[READ_SOURCE] = source
+    return db
+
+
+class Loader:
+    """Stands in for a query, counting how often the cache falls through to it"""
+
+    def __init__(self, tokens: int):
+        self.tokens = tokens
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        return User(username="ann", tokens=self.tokens)
+
+
+async def test_backend_round_trip_and_expiry(backend):
+    await backend.set("a", "1", 60)
+    await backend.set("b", "2", 0.05)
+    assert [await backend.get("a"), await backend.get("b")] == ["1", "2"]
+    await asyncio.sleep(0.1)
+    assert await backend.get("b") is None
+    await backend.delete("a")
+    assert await backend.get("a") is None
+
+
+async def test_primary_reads_fill_the_cache(backend):
+    cache, load = ReadCache(backend), Loader(100)
+    first = await cache.get_or_load(user_key("ann"), User, load, session())
+    second = await cache.get_or_load(user_key("ann"), User, load, session())
+    assert load.calls == 1 and (cache.misses, cache.hits) == (1, 1)
+    assert second == first and second is not first
+
+
+async def test_pinned_reads_skip_the_cache(backend):
+    cache, load = ReadCache(backend), Loader(100)
+    await cache.get_or_load(user_key("ann"), User, Loader(50), session())
+    # Just wrote, so the cached row may be the one the write replaced
+    user = await cache.get_or_load(user_key("ann"), User, load, session(PINNED))
+    assert user.tokens == 100 and load.calls == 1
+    assert (cache.misses, cache.hits) == (1, 0)
+
+
+async def test_replica_reads_never_fill_the_cache(backend):
+    cache, load = ReadCache(backend), Loader(100)
+    await cache.get_or_load(user_key("ann"), User, load, session(REPLICA))
+    assert await backend.get(user_key("ann")) is None
+    await cache.get_or_load(user_key("ann"), User, load, session(REPLICA))
+    assert load.calls == 2
+    # But they are served what a primary read filled
+    await cache.get_or_load(user_key("ann"), User, Loader(70), session())
+    user = await cache.get_or_load(user_key("ann"), User, load, session(REPLICA))
+    assert user.tokens == 70 and load.calls == 2
+
+
+async def test_invalidate_after_write_reloads(backend):
+    cache = ReadCache(backend)
+    await cache.get_or_load(user_key("ann"), User, Loader(100), session())
+    await cache.invalidate(user_key("ann"))
+    load = Loader(90)
+    user = await cache.get_or_load(user_key("ann"), User, load, session())
+    assert user.tokens == 90 and load.calls == 1
+
+
+async def test_lists_round_trip(backend):
+    cache = ReadCache(backend)
+
+    async def load():
+        return [User(username="ann", tokens=1), User(username="bob", tokens=2)]
+
+    await cache.get_or_load("users", User, load, session())
+    users = await cache.get_or_load("users", User, load, session())
+    assert [(u.username, u.tokens) for u in users] == [("ann", 1), ("bob", 2)]
+    assert cache.hits == 1
@@ -0,0 +1,129 @@
+"""Reads go to a fresh enough, reachable replica, and to the primary after a write.
+
+Runs against the database in DATABASE_URL and the replicas in
+DATABASE_REPLICA_URLS, and is skipped without both. The primary itself can be
+listed as a replica; it reports no lag.
+"""
+
+import math
+import os
+import uuid
+
+import pytest
+
+if not (os.getenv("DATABASE_URL") and os.getenv("DATABASE_REPLICA_URLS")):
+    pytest.skip("needs DATABASE_URL and DATABASE_REPLICA_URLS", allow_module_level=True)
+
+import httpx
+from sqlalchemy import delete
+from starlette.requests import Request
+
+from ..db import (
+    PINNED,
+    PRIMARY_PIN_COOKIE,
+    READ_SOURCE,
+    REPLICA,
+    ReplicaRouter,
+    async_session,
+    engine,
+    make_engine,
+    read_db_session,
+    replica_router,
+    replica_urls,
+)
+from ..main import app
+from ..models.user import User
+
+# Nothing listens on port 1, so connecting fails straight away
+UNREACHABLE_URL = "postgresql://postgres@127.0.0.1:1/raptor"
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+async def replica():
+    replica = make_engine(replica_urls[0])
+    yield replica
+    await replica.dispose()
+    await engine.dispose()
+
+
+@pytest.fixture
+async def unreachable():
+    unreachable = make_engine(UNREACHABLE_URL)
+    yield unreachable
+    await unreachable.dispose()
+
+
+async def test_reads_use_a_replica_within_max_lag(replica):
+    router = ReplicaRouter(engine, [replica], max_lag=5.0)
+    assert await router.read_engine() is replica
+    assert router.lags[0] <= 5.0
+
+
+async def test_lagging_replica_falls_back_to_primary(replica):
+    # Any measured lag, even none, is more than a negative max_lag
+    router = ReplicaRouter(engine, [replica], max_lag=-1.0)
+    assert await router.read_engine() is engine
+    assert router.lags[0] != math.inf
+
+
+async def test_unreachable_replica_is_skipped(replica, unreachable):
+    router = ReplicaRouter(engine, [unreachable, replica], max_lag=5.0, check_interval=60.0)
+    assert await router.read_engine() is replica
+    assert router.lags[0] == math.inf
+    # Round robin comes back to it, and it stays skipped until its next check
+    assert await router.read_engine() is replica
+
+
+async def test_only_unreachable_replicas_fall_back_to_primary(unreachable):
+    router = ReplicaRouter(engine, [unreachable], max_lag=5.0)
+    assert await router.read_engine() is engine
+
+
+def read_request(cookies: dict) -> Request:
+    cookie = "; ".join(f"{name}={value}" for name, value in cookies.items())
+    headers = [(b"cookie", cookie.encode())] if cookie else []
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": headers})
+
+
+async def test_pin_cookie_reads_from_primary(replica, monkeypatch):
+    # Every replica caught up, and not checked again during the test
+    monkeypatch.setattr(replica_router, "lags", [0.0] * len(replica_router.replicas))
+    monkeypatch.setattr(replica_router, "_checked_at", [math.inf] * len(replica_router.replicas))
+
+    sessions = read_db_session(read_request({PRIMARY_PIN_COOKIE: "1"}))
+    session = await sessions.__anext__()
+    assert session.bind is engine and session.info[READ_SOURCE] == PINNED
+    await sessions.aclose()
+
+    sessions = read_db_session(read_request({}))
+    session = await sessions.__anext__()
+    assert session.bind in replica_router.replicas and session.info[READ_SOURCE] == REPLICA
+    await sessions.aclose()
+
+
+async def test_successful_writes_set_the_pin_cookie(replica):
+    username = f"test_{uuid.uuid4().hex[:8]}"
+    transport = httpx.ASGITransport(app=app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            created = await client.post(f"/api/user/{username}")
+            assert created.status_code == 200
+            assert created.cookies.get(PRIMARY_PIN_COOKIE) == "1"
+
+            missing = await client.put(f"/api/user/{username}_missing/tokens/5")
+            assert missing.status_code == 404
+            assert PRIMARY_PIN_COOKIE not in missing.cookies
+
+            read = await client.get(f"/api/user/{username}")
+            assert PRIMARY_PIN_COOKIE not in read.cookies
+    finally:
+        async with async_session() as db:
+            await db.exec(delete(User).where(User.username == username))
+            await db.commit()
@@ -0,0 +1,93 @@
+"""Balances after a bet is placed and settled, for a win and a loss.
+
+Runs against the migrated database in DATABASE_URL and is skipped without one.
+"""
+
+import os
+import uuid
+
+import pytest
+
+if not os.getenv("DATABASE_URL"):
+    pytest.skip("needs a migrated database in DATABASE_URL", allow_module_level=True)
+
+from sqlalchemy import delete
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from ..db import engine
+from ..models.bet import Bet
+from ..models.questionFR import QuestionFR
+from ..models.room import Room
+from ..models.user import User
+from ..models.userbetstats import UserBetStats
+from ..services.bet import BetService, settle_many_bets
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+async def db():
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        yield session
+    await engine.dispose()
+
+
+@pytest.fixture
+async def question(db):
+    """An open question in a new room, answer 0, and two users with 100 tokens"""
+    prefix = f"test_{uuid.uuid4().hex[:8]}"
+    room = Room(game_id=1)
+    db.add(room)
+    await db.flush()
+    question = QuestionFR(question="Who scores next?", options="A_B", answer=0, room_id=room.id)
+    users = [User(username=f"{prefix}_{name}", tokens=100) for name in ("winner", "loser")]
+    db.add_all([question, *users])
+    await db.commit()
+    room_id, usernames = room.id, [user.username for user in users]
+    yield question.id, usernames
+    await db.exec(delete(User).where(User.username.in_(usernames)))
+    await db.exec(delete(UserBetStats).where(UserBetStats.username.in_(usernames)))
+    # Its questions and bets cascade
+    await db.exec(delete(Room).where(Room.id == room_id))
+    await db.commit()
+
+
+@pytest.mark.parametrize("multiplier, won", [(1.0, 10), (2.5, 25)])
+async def test_balances_after_settlement(db, question, multiplier, won):
+    question_id, (winner, loser) = question
+    bets = BetService(db)
+    await bets.create_bet(winner, question_id, "0", 10)
+    await bets.create_bet(loser, question_id, "1", 10)
+    db.expire_all()
+    assert [(await db.get(User, u)).tokens for u in (winner, loser)] == [90, 90]
+
+    balances = await settle_many_bets(db, [(question_id, "0", multiplier)])
+    await db.commit()
+    db.expire_all()
+
+    assert balances == {winner: 100 + won, loser: 90}
+    assert (await db.get(User, winner)).tokens == 100 + won
+    assert (await db.get(User, loser)).tokens == 90
+    outcomes = (await db.exec(select(Bet.username, Bet.outcome).where(Bet.question_id == question_id))).all()
+    assert dict(outcomes) == {winner: won, loser: -10}
+    # The summary counts what the balance got back, and the stake lost
+    winner_stats, loser_stats = [await db.get(UserBetStats, u) for u in (winner, loser)]
+    assert (winner_stats.total_wins, winner_stats.total_losses) == (10 + won, 0)
+    assert (loser_stats.total_wins, loser_stats.total_losses) == (0, 10)
+
+
+async def test_player_question_settlement_leaves_room_question_bets(db, question):
+    question_id, (winner, loser) = question
+    await BetService(db).create_bet(winner, question_id, "0", 10)
+    # A player question sharing the room question's id settles by its own key
+    balances = await settle_many_bets(db, [(question_id, "UNDER", 1.0)], Bet.player_question_id)
+    await db.commit()
+    assert balances == {}
+    bet = (await db.exec(select(Bet).where(Bet.question_id == question_id))).one()
+    assert bet.is_correct is None
@@ -28,6 +28,13 @@ const envBaseUrl =
 const normalizedBaseUrl = envBaseUrl.endsWith('/') ? envBaseUrl : `${envBaseUrl}/`;
 
 export async function apiFetch<T>(path: string, init: ApiRequestInit = {}): Promise<T> {
+  return (await apiFetchWithHeaders<T>(path, init)).data;
+}
+
+async function apiFetchWithHeaders<T>(
+  path: string,
+  init: ApiRequestInit = {}
+): Promise<{ data: T; headers: Headers }> {
   const { searchParams, body, headers, method = 'GET', ...rest } = init;
   const url = new URL(path.replace(/^\//, ''), normalizedBaseUrl);
 
@@ -75,7 +82,26 @@ export async function apiFetch<T>(path: string, init: ApiRequestInit = {}): Prom
     );
   }
 
-  return (data as T) ?? (undefined as T);
+  return { data: (data as T) ?? (undefined as T), headers: response.headers };
+}
+
+// Header naming the cursor of the next page of a paginated list route
+export const NEXT_CURSOR_HEADER = 'X-Next-Cursor';
+
+/** Every row of a paginated list route, following X-Next-Cursor page by page. */
+export async function apiFetchAll<T>(path: string, init: ApiRequestInit = {}): Promise<T[]> {
+  const rows: T[] = [];
+  let after: string | null = null;
+  do {
+    const { data, headers } = await apiFetchWithHeaders<T[]>(path, {
+      ...init,
+      method: 'GET',
+      searchParams: { ...init.searchParams, after },
+    });
+    rows.push(...data);
+    after = headers.get(NEXT_CURSOR_HEADER);
+  } while (after !== null);
+  return rows;
 }
 
 export const apiClient = {
@@ -1,8 +1,8 @@
-import { apiClient } from './client';
+import { apiClient, apiFetchAll } from './client';
 import type { Room } from './types';
 
 export async function getRooms(): Promise<Room[]> {
-  return apiClient.get<Room[]>('/room');
+  return apiFetchAll<Room>('/room');
 }
 
 export async function createRoom(username: string): Promise<Room> {
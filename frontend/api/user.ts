@@ -1,4 +1,4 @@
-import { apiClient } from './client';
+import { apiClient, apiFetchAll } from './client';
 import type { User } from './types';
 
 export async function getUser(username: string): Promise<User> {
@@ -10,5 +10,5 @@ export async function createUser(username: string): Promise<User> {
 }
 
 export async function getAllUsers(): Promise<User[]> {
-  return apiClient.get<User[]>('/user/');
+  return apiFetchAll<User>('/user/');
 }